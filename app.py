@@ -6,20 +6,33 @@ Enhanced with project tracking, SAM.gov automation, and persistent browser sessi
 
 import os
 import secrets
+import atexit
+import sys
+import bisect
 from io import BytesIO
 from datetime import datetime, timedelta
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, send_file, session, flash, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, send_file, session, flash, redirect, url_for, g, has_request_context
 from werkzeug.utils import secure_filename
 from werkzeug.security import safe_join
+from werkzeug.exceptions import HTTPException
 import requests
 import shutil
 import logging
+import logging.handlers
+import hashlib
 import json
+import mimetypes
+import queue
+import threading
 import time
+import zipfile
 import re as _re
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path as _Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import quote, urljoin, urlparse
 import openai
 
 # Selenium imports with error handling
@@ -34,19 +47,168 @@ try:
     from selenium.webdriver.edge.options import Options as EdgeOptions
     _SELENIUM_AVAILABLE = True
 except ImportError as e:
-    print(f"[SELENIUM] Not available: {e}")
+    _SELENIUM_IMPORT_ERROR = e  # logged once logging is configured
     _SELENIUM_AVAILABLE = False
 
+# Process memory for browser benchmarks (optional)
+try:
+    import psutil
+    _PSUTIL_AVAILABLE = True
+except ImportError:
+    _PSUTIL_AVAILABLE = False
+
+# Encryption for the persisted SAM.gov cookie jar (optional; cookies are not persisted without it)
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    _CRYPTO_AVAILABLE = True
+except ImportError:
+    _CRYPTO_AVAILABLE = False
+
+# Text extraction from downloaded documents (pypdf/python-docx optional; see doc_extract.py)
+from doc_extract import DOC_TEXT_EXTENSIONS, extract_document_text, tokenize
+
+# Filesystem events for download completion (optional; polling fallback)
+try:
+    from watchdog.observers import Observer as _WatchdogObserver
+    from watchdog.events import FileSystemEventHandler as _WatchdogHandler
+    _WATCHDOG_AVAILABLE = True
+except ImportError:
+    _WATCHDOG_AVAILABLE = False
+
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('government_contracting_tool.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# Records are handed to a queue; a QueueListener thread does the file and console
+# I/O, so a request never waits on disk or a slow terminal. Each subsystem logs
+# under its own name ([DATA], [AI], [SAM], [MY], [DATES], ...) and can be
+# filtered by name and level. LOG_LEVEL sets the threshold (DEBUG adds per-row
+# detail), LOG_FORMAT=json writes one JSON object per line, and repeated INFO /
+# DEBUG lines from one call site are capped at LOG_RATE_LIMIT per LOG_RATE_WINDOW
+# seconds, with the number dropped noted on the next one let through.
+LOG_FILE = 'government_contracting_tool.log'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+LOG_RATE_LIMIT = int(os.environ.get('LOG_RATE_LIMIT', '20'))
+LOG_RATE_WINDOW = float(os.environ.get('LOG_RATE_WINDOW', '10'))
+
+
+class _JsonLogFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra=` fields."""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+    def format(self, record):
+        out = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        out.update({k: v for k, v in vars(record).items() if k not in self._RESERVED})
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+class _RateLimitFilter(logging.Filter):
+    """Let at most LOG_RATE_LIMIT INFO/DEBUG records per call site through each window."""
+
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._sites = {}  # (logger, file, line) -> [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.limit:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """StreamHandler on whatever sys.stderr is at emit time.
+
+    Binding the stream at import would keep writing to a replaced or closed
+    one (a test runner's capture, a closed pipe) while the listener drains at
+    exit. Once the console is gone its records are dropped; the log file
+    still has them.
+    """
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+    def handleError(self, record):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ValueError)):
+            return
+        super().handleError(record)
+
+
+def _configure_logging() -> logging.handlers.QueueListener:
+    """Route every logger through a QueueHandler and start the listener that writes the records."""
+    if LOG_FORMAT == 'json':
+        formatter = _JsonLogFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler(LOG_FILE), _ConsoleHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+_log_listener = _configure_logging()
+# Registered before any shutdown hook that logs: atexit runs hooks in reverse,
+# so the listener stops, and drains the queue, after they have run
+atexit.register(_log_listener.stop)
+
+logger = logging.getLogger("APP")
+data_logger = logging.getLogger("DATA")
+ai_logger = logging.getLogger("AI")
+sam_logger = logging.getLogger("SAM")
+my_logger = logging.getLogger("MY")
+dates_logger = logging.getLogger("DATES")
+projects_logger = logging.getLogger("PROJECTS")
+highlights_logger = logging.getLogger("HIGHLIGHTS")
+docs_logger = logging.getLogger("DOCS")
+
+# Rate-limit the app's own loggers only; werkzeug's request log is left alone
+_log_rate_limit = _RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW)
+for _subsystem_logger in (logger, data_logger, ai_logger, sam_logger, my_logger, dates_logger,
+                          projects_logger, highlights_logger, docs_logger):
+    _subsystem_logger.addFilter(_log_rate_limit)
+
+if not _SELENIUM_AVAILABLE:
+    sam_logger.warning(f"Selenium not available: {_SELENIUM_IMPORT_ERROR}")
 
 # Flask app configuration
 app = Flask(
@@ -65,8 +227,8 @@ def get_secret_key():
     if not secret_key:
         # Generate a secure random key and warn user to set environment variable
         secret_key = secrets.token_hex(32)
-        print("[SECURITY WARNING] No SECRET_KEY environment variable found.")
-        print("[SECURITY WARNING] Generated temporary key. Set SECRET_KEY environment variable for production!")
+        logger.warning("No SECRET_KEY environment variable found.")
+        logger.warning("Generated temporary key. Set SECRET_KEY environment variable for production!")
     return secret_key
 
 app.config.update(
@@ -83,9 +245,9 @@ app.config.update(
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 if OPENAI_API_KEY:
     openai.api_key = OPENAI_API_KEY
-    print("[AI] OpenAI API key configured")
+    ai_logger.info("OpenAI API key configured")
 else:
-    print("[AI] WARNING: OPENAI_API_KEY environment variable not set. AI summary features will be disabled.")
+    ai_logger.warning("OPENAI_API_KEY environment variable not set. AI summary features will be disabled.")
 
 # Directory configuration
 DATA_DIR = "data"
@@ -102,11 +264,20 @@ if not os.environ.get('VERCEL'):
     for directory in [DATA_DIR, UPLOAD_DIR, CONTRACTS_BASE, BACKUP_DIR]:
         os.makedirs(directory, exist_ok=True)
 
-# Global variables for persistent session management
-_persistent_driver = None
-_session_start_time = None
-_session_timeout = 3600  # 1 hour timeout
+# SAM.gov endpoint (override to point the automation at a local stand-in, see sam_standin.py)
+SAM_BASE_URL = os.environ.get('SAM_BASE_URL', 'https://sam.gov').rstrip('/')
+SAM_HOST = urlparse(SAM_BASE_URL).hostname or 'sam.gov'
+
+# Browser session pool configuration
+SAM_POOL_SIZE = max(1, int(os.environ.get('SAM_POOL_SIZE', '1')))
+AUTOMATION_DOWNLOADS_BASE = os.path.join(os.path.expanduser("~"), "EdgeAutomation-downloads")
+_session_timeout = 3600  # 1 hour idle timeout
 _max_session_age = 14400  # 4 hours maximum session age for security
+_max_session_failures = 2  # recycle a session after this many failed runs in a row
+# "visible": normal window; "fast": headless with images/fonts/media/trackers blocked;
+# "auto": fast once saved login cookies exist, otherwise visible so the user can sign in
+SAM_BROWSER_MODE = os.environ.get('SAM_BROWSER_MODE', 'auto').lower()
+SAM_BROWSER_MODES = ("auto", "visible", "fast")
 
 
 # ====================== FILE MANAGEMENT ======================
@@ -194,7 +365,7 @@ def load_data() -> pd.DataFrame:
 
     fpath = find_data_file()
     if not fpath:
-        print("[DATA] No CSV or Excel file found in /data")
+        data_logger.warning("No CSV or Excel file found in /data")
         return pd.DataFrame()
 
     # Store active file in session
@@ -211,7 +382,7 @@ def load_data() -> pd.DataFrame:
             # Requires openpyxl for .xlsx
             df = pd.read_excel(fpath, dtype=str)
         else:
-            print(f"[DATA] Unsupported file type: {ext}")
+            data_logger.warning(f"Unsupported file type: {ext}")
             return pd.DataFrame()
 
         # Normalize cell values to strings; keep header names as-is
@@ -221,11 +392,11 @@ def load_data() -> pd.DataFrame:
             except Exception:
                 pass
 
-        print(f"[DATA] Loaded {len(df)} rows from {os.path.basename(fpath)}")
+        data_logger.info(f"Loaded {len(df)} rows from {os.path.basename(fpath)}")
         return df
 
     except Exception as e:
-        print(f"[DATA] Error reading {fpath}: {e}")
+        data_logger.error(f"Error reading {fpath}: {e}")
         return pd.DataFrame()
 
 
@@ -283,17 +454,9 @@ def add_highlight_summary_column(df: pd.DataFrame) -> pd.DataFrame:
     # Populate existing AI summaries if we have a Notice ID column
     notice_col = _find_notice_col(df_copy)
     if notice_col:
-        # Load existing AI summaries
-        ai_summaries = load_ai_summaries()
-
-        # Populate the Highlight Summary column with existing AI summaries
-        for idx, row in df_copy.iterrows():
-            notice_id = str(row.get(notice_col, "")).strip()
-            if notice_id and notice_id in ai_summaries:
-                existing_summary = ai_summaries[notice_id].get("summary", "")
-                if existing_summary:
-                    df_copy.at[idx, "Highlight Summary"] = existing_summary
-                    print(f"[AI] Loaded existing summary for Notice ID: {notice_id}")
+        summaries = df_copy[notice_col].astype(str).str.strip().map(_ai_summary_map())
+        df_copy["Highlight Summary"] = summaries.fillna("")
+        ai_logger.debug(f"Loaded existing summaries for {int(summaries.notna().sum())} of {len(df_copy)} rows")
 
     return df_copy
 
@@ -350,11 +513,37 @@ Description to analyze:
         return summary
 
     except Exception as e:
-        print(f"[AI] Error generating summary: {str(e)}")
+        ai_logger.error(f"Error generating summary: {str(e)}")
         return ""
 
 
 # ====================== AI SUMMARIES PERSISTENCE ======================
+_ai_summary_map_cache = {"key": None, "map": {}}
+_ai_summary_map_lock = threading.Lock()
+
+
+def _ai_summaries_key():
+    """Identify the version of the AI summaries file on disk."""
+    try:
+        st = os.stat(AI_SUMMARIES_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _ai_summary_map() -> dict:
+    """{notice_id: summary} for notices with a saved summary, re-read only when the file changes."""
+    key = _ai_summaries_key()
+    with _ai_summary_map_lock:
+        if key is None or _ai_summary_map_cache["key"] != key:
+            summaries = load_ai_summaries() if key else {}
+            _ai_summary_map_cache.update(key=key, map={
+                nid: rec.get("summary") for nid, rec in summaries.items()
+                if isinstance(rec, dict) and rec.get("summary")
+            })
+        return _ai_summary_map_cache["map"]
+
+
 def load_ai_summaries() -> dict:
     """Load AI summaries from JSON file."""
     if not os.path.exists(AI_SUMMARIES_FILE):
@@ -363,10 +552,10 @@ def load_ai_summaries() -> dict:
     try:
         with open(AI_SUMMARIES_FILE, 'r', encoding='utf-8') as f:
             summaries = json.load(f)
-        print(f"[AI] Loaded {len(summaries)} AI summaries from {AI_SUMMARIES_FILE}")
+        ai_logger.debug(f"Loaded {len(summaries)} AI summaries from {AI_SUMMARIES_FILE}")
         return summaries
     except Exception as e:
-        print(f"[AI] Error loading AI summaries: {str(e)}")
+        ai_logger.error(f"Error loading AI summaries: {str(e)}")
         return {}
 
 
@@ -378,9 +567,11 @@ def save_ai_summaries(summaries: dict):
 
         with open(AI_SUMMARIES_FILE, 'w', encoding='utf-8') as f:
             json.dump(summaries, f, indent=2, ensure_ascii=False)
-        print(f"[AI] Saved {len(summaries)} AI summaries to {AI_SUMMARIES_FILE}")
+        with _ai_summary_map_lock:
+            _ai_summary_map_cache["key"] = None
+        ai_logger.info(f"Saved {len(summaries)} AI summaries to {AI_SUMMARIES_FILE}")
     except Exception as e:
-        print(f"[AI] Error saving AI summaries: {str(e)}")
+        ai_logger.error(f"Error saving AI summaries: {str(e)}")
 
 
 def save_ai_summary_for_notice(notice_id: str, summary: str):
@@ -394,6 +585,7 @@ def save_ai_summary_for_notice(notice_id: str, summary: str):
         "timestamp": datetime.now().isoformat()
     }
     save_ai_summaries(summaries)
+    _refresh_my_search_entry(notice_id)
 
 
 def get_ai_summary_for_notice(notice_id: str) -> str:
@@ -416,7 +608,7 @@ def load_my_data(columns_fallback=None) -> pd.DataFrame:
                 df[c] = df[c].astype(str).fillna("")
             return df
         except Exception as e:
-            print(f"[MY] Error reading {MY_FILE}: {e}")
+            my_logger.error(f"Error reading {MY_FILE}: {e}")
     if columns_fallback:
         return pd.DataFrame(columns=columns_fallback)
     return pd.DataFrame()
@@ -433,9 +625,119 @@ def save_my_data(df: pd.DataFrame):
         for c in out.columns:
             out[c] = out[c].astype(str).fillna("")
         out.to_excel(MY_FILE, index=False)
-        print(f"[MY] Saved {len(out)} rows -> {os.path.basename(MY_FILE)}")
+        my_logger.info(f"Saved {len(out)} rows -> {os.path.basename(MY_FILE)}")
+    except Exception as e:
+        my_logger.error(f"Error saving {MY_FILE}: {e}")
+
+
+# ====================== MY SOLICITATIONS SEARCH INDEX ======================
+_SEARCH_SEP = "\x1f"  # keeps a keyword from matching across two columns
+_my_search_lock = threading.Lock()
+_my_search_index = {"key": None, "base": None, "docs": None, "notice_ids": None, "extra": {}}
+
+
+def _load_highlights() -> dict:
+    """Load saved solicitation highlights keyed by Notice ID."""
+    try:
+        if os.path.exists(HIGHLIGHTS_FILE):
+            with open(HIGHLIGHTS_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
     except Exception as e:
-        print(f"[MY] Error saving {MY_FILE}: {e}")
+        my_logger.warning(f"Could not load highlights: {e}")
+    return {}
+
+
+def _search_extra_text(notice_id: str, ai_summaries: dict, highlights: dict) -> str:
+    """Lower-cased AI summary plus saved highlights for one notice."""
+    summary = ai_summaries.get(notice_id, {}).get("summary", "")
+    saved = highlights.get(notice_id, "")
+    return " ".join(t for t in (summary, saved if isinstance(saved, str) else "") if t).lower()
+
+
+def _my_search_key():
+    """Identify the My Solicitations file version the index was built from."""
+    try:
+        st = os.stat(MY_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _get_my_search_index(df: pd.DataFrame) -> dict:
+    """Return the per-row search documents for My Solicitations, rebuilding if the file changed.
+
+    Each document is every column plus the notice's AI summary and saved
+    highlights, lower-cased and joined, so a keyword search is one vectorized pass.
+    """
+    key = (_my_search_key(), len(df))
+    with _my_search_lock:
+        if _my_search_index["key"] == key:
+            return _my_search_index
+
+        cols = [c for c in df.columns if c != "Highlight Summary"]
+        base = pd.Series("", index=df.index)
+        for i, col in enumerate(cols):
+            base = base + (_SEARCH_SEP if i else "") + df[col].astype(str)
+        base = base.str.lower()
+
+        notice_col = _find_notice_col(df)
+        if notice_col:
+            notice_ids = df[notice_col].astype(str).str.strip()
+            ai_summaries = load_ai_summaries()
+            highlights = _load_highlights()
+            extra = {nid: _search_extra_text(nid, ai_summaries, highlights) for nid in notice_ids.unique()}
+            docs = base + _SEARCH_SEP + notice_ids.map(extra).fillna("")
+        else:
+            notice_ids, extra, docs = None, {}, base
+
+        _my_search_index.update(key=key, base=base, docs=docs, notice_ids=notice_ids, extra=extra)
+        my_logger.info(f"Built search index for {len(df)} rows")
+        return _my_search_index
+
+
+def _refresh_my_search_entry(notice_id: str):
+    """Update the search document of one notice after its summary or highlights change."""
+    with _my_search_lock:
+        index = _my_search_index
+        if index["notice_ids"] is None or not notice_id:
+            return
+        text = _search_extra_text(notice_id, load_ai_summaries(), _load_highlights())
+        index["extra"][notice_id] = text
+        rows = index["notice_ids"] == notice_id
+        if rows.any():
+            docs = index["docs"].copy()
+            docs[rows] = index["base"][rows] + _SEARCH_SEP + text
+            index["docs"] = docs
+
+
+def _search_my_solicitations(df: pd.DataFrame, keyword: str):
+    """Keyword search across all columns, AI summaries and highlights.
+
+    Returns the row mask, the match count per column and, for every matching
+    row, the list of columns the keyword was found in.
+    """
+    index = _get_my_search_index(df)
+    kw = keyword.lower()
+    mask = index["docs"].str.contains(kw, regex=False)
+
+    matches_by_column = {}
+    matched_columns = {ix: [] for ix in df.index[mask]}
+    if matched_columns:
+        hits = df[mask]
+        for col in df.columns:
+            if col == "Highlight Summary":
+                if index["notice_ids"] is None:
+                    continue
+                col_mask = index["notice_ids"][mask].map(index["extra"]).fillna("").str.contains(kw, regex=False)
+            else:
+                col_mask = hits[col].astype(str).str.lower().str.contains(kw, regex=False)
+            count = int(col_mask.sum())
+            if count:
+                matches_by_column[col] = count
+                for ix in col_mask.index[col_mask]:
+                    matched_columns[ix].append(col)
+
+    return mask, matches_by_column, matched_columns
 
 
 # ====================== NOTICE ID HELPERS ======================
@@ -496,196 +798,750 @@ def _sanitize_folder_name(name: str) -> str:
     return name[:120]
 
 
-def _create_contract_folder(job_title: str) -> str:
-    """Create a folder for contract documents."""
-    folder = os.path.join(CONTRACTS_BASE, _sanitize_folder_name(job_title))
+def _notice_job_title(row, notice_id: str) -> str:
+    """Pick the best title field from a solicitation row, falling back to the Notice ID."""
+    if row:
+        for key in ["Title","Opportunity Title","Notice Title","Name","Project Title","Solicitation Title","Description","Summary"]:
+            if key in row and str(row[key]).strip():
+                return str(row[key]).strip()
+    return f"Notice {notice_id}"
+
+
+def _contract_folder_complete(notice_id: str, folder: str) -> bool:
+    """A folder is complete once it holds the main SAM PDF and no unfinished downloads."""
+    pdf = os.path.join(folder, f"SAM_{notice_id}.pdf")
+    try:
+        if os.path.getsize(pdf) <= 0:
+            return False
+        with os.scandir(folder) as it:
+            return not any(_is_temp_download(e.name) for e in it)
+    except OSError:
+        return False
+
+
+def _create_contract_folder(job_title: str, notice_id: str | None = None) -> str:
+    """Create a folder for contract documents, keyed by Notice ID plus title.
+
+    A folder from before Notice IDs were part of the name is renamed in place
+    when it holds this notice's documents.
+    """
+    if not notice_id:
+        folder = os.path.join(CONTRACTS_BASE, _sanitize_folder_name(job_title))
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    folder = os.path.join(CONTRACTS_BASE, _sanitize_folder_name(f"{notice_id} - {job_title}"))
+    legacy = os.path.join(CONTRACTS_BASE, _sanitize_folder_name(job_title))
+    if not os.path.exists(folder) and os.path.isdir(legacy) and _folder_belongs_to(legacy, notice_id):
+        try:
+            os.rename(legacy, folder)
+            sam_logger.info(f"Renamed {legacy} -> {folder}")
+        except OSError as e:
+            sam_logger.warning(f"Could not rename legacy folder {legacy}: {e}")
     os.makedirs(folder, exist_ok=True)
     return folder
 
 
-def _has_temp_download(dirpath: str):
-    """Check if there are temporary download files."""
-    p = _Path(dirpath)
-    return any(p.glob("*.crdownload")) or any(p.glob("*.tmp")) or any(p.glob("*.partial"))
+def _folder_belongs_to(folder: str, notice_id: str) -> bool:
+    """True when a title-only folder holds documents for this notice."""
+    if os.path.exists(os.path.join(folder, f"SAM_{notice_id}.pdf")):
+        return True
+    return _load_manifest(folder).get("notice_id") == notice_id
 
 
-def _newest_pdf(dirpath: str):
-    """Get the newest PDF file in directory."""
-    p = _Path(dirpath)
-    pdfs = list(p.glob("*.pdf"))
-    if not pdfs: 
-        return None
-    return str(max(pdfs, key=lambda q: q.stat().st_mtime))
+def _sam_progress(notice_id: str, stage: str, **details):
+    """Record a stage on the current SAM job and publish a progress event.
 
+    Repeated events for the same stage (PDF download ticks) are only published.
+    """
+    job_id = getattr(_sam_job_local, "job_id", None)
+    if job_id and getattr(_sam_job_local, "stage", None) != stage:
+        _sam_job_local.stage = stage
+        _update_sam_job(job_id, stage=stage, stage_times={stage: datetime.now().isoformat()})
+    publish_event("sam", {"notice_id": notice_id, "job_id": job_id, "stage": stage, **details})
 
-def _list_non_temp_files(dirpath: str):
-    """List non-temporary files in directory."""
-    p = _Path(dirpath)
-    return [str(x) for x in p.glob("*") if x.is_file() and not any(str(x).endswith(ext) for ext in (".crdownload",".tmp",".partial"))]
 
+TEMP_DOWNLOAD_EXTS = (".crdownload", ".tmp", ".partial")
+DOWNLOAD_RESCAN_SECS = 2.0
 
-# ====================== PERSISTENT BROWSER SESSION ======================
-def _get_persistent_edge_driver(download_dir: str):
-    """Get or create a persistent Edge driver with dedicated automation profile"""
-    global _persistent_driver, _session_start_time
-    
-    # Check if we need to create a new session
-    current_time = time.time()
-    needs_new_session = (
-        _persistent_driver is None or
-        _session_start_time is None or
-        (current_time - _session_start_time) > _session_timeout or
-        (current_time - _session_start_time) > _max_session_age  # Force refresh for security
-    )
-    
-    # Try to check if existing driver is still alive
-    if _persistent_driver and not needs_new_session:
-        try:
-            # Test if driver is still responsive
-            _persistent_driver.current_url
-            print("[SAM] Using existing Edge automation session")
-            
-            # Update download directory for this run
+
+def _is_temp_download(name: str) -> bool:
+    """Check whether a file name is an in-progress browser download."""
+    return name.lower().endswith(TEMP_DOWNLOAD_EXTS)
+
+
+def _final_download_name(name: str) -> str:
+    """Strip the browser's in-progress suffix from a download name."""
+    lower = name.lower()
+    for ext in TEMP_DOWNLOAD_EXTS:
+        if lower.endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+class DownloadWatcher:
+    """
+    Watch a download directory for files that appear after it was opened.
+
+    Uses filesystem events (inotify / ReadDirectoryChangesW via watchdog) when
+    available and falls back to a single os.scandir pass per poll interval.
+    In-progress files are tracked from their temporary name to their final
+    name, and their current size is exposed through progress().
+    """
+
+    def __init__(self, dirpath: str, poll_interval: float = None):
+        self.dirpath = dirpath
+        self.poll_interval = poll_interval or SAM_POLL_INTERVAL
+        self._cond = threading.Condition()
+        self._baseline = set()
+        self._completed = {}
+        self._in_progress = {}
+        self._observer = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def start(self):
+        os.makedirs(self.dirpath, exist_ok=True)
+        with self._cond:
+            self._baseline = {e.name for e in self._scandir() if not _is_temp_download(e.name)}
+        if _WATCHDOG_AVAILABLE:
             try:
-                _persistent_driver.execute_cdp_cmd('Page.setDownloadBehavior', {
-                    'behavior': 'allow',
-                    'downloadPath': download_dir
-                })
-            except Exception:
-                # Fallback if CDP command fails
-                pass
-            
-            return _persistent_driver
-        except Exception:
-            print("[SAM] Existing session is dead, creating new one")
-            needs_new_session = True
-            _persistent_driver = None
-    
-    if needs_new_session:
-        print("[SAM] Creating new persistent Edge automation session...")
-        
-        # Close old driver if it exists
-        if _persistent_driver:
+                self._observer = _WatchdogObserver()
+                self._observer.schedule(_DownloadEventHandler(self), self.dirpath, recursive=False)
+                self._observer.start()
+            except Exception as e:
+                sam_logger.info(f"Download watcher falling back to polling: {e}")
+                self._observer = None
+        return self
+
+    def close(self):
+        if self._observer is not None:
             try:
-                _persistent_driver.quit()
+                self._observer.stop()
+                self._observer.join(timeout=2)
             except Exception:
                 pass
-            _persistent_driver = None
-        
-        # Create dedicated automation profile directory
+            self._observer = None
+
+    def _scandir(self):
         try:
-            # Create a persistent automation profile directory (not temporary)
-            automation_profile_dir = os.path.join(os.path.expanduser("~"), "EdgeAutomation")
-            os.makedirs(automation_profile_dir, exist_ok=True)
-            
-            options = EdgeOptions()
-            
-            # Use dedicated automation profile (separate from your normal Edge)
-            options.add_argument(f"--user-data-dir={automation_profile_dir}")
-            options.add_argument("--profile-directory=SAMAutomation")
-            
-            # Window positioning to not interfere with your browsing
-            options.add_argument("--window-size=1200,800")
-            options.add_argument("--window-position=200,100")
-            
-            # Essential options for stability and security
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            # Removed --disable-web-security and --allow-running-insecure-content for security
-            # Removed --no-sandbox - use proper sandboxing for security
-            
-            # Configure downloads
-            prefs = {
-                "download.default_directory": download_dir,
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": True,
-                "profile.default_content_settings.popups": 0,
-                "profile.default_content_setting_values.automatic_downloads": 1
-            }
-            options.add_experimental_option("prefs", prefs)
-            
-            # Hide automation indicators
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-            
-            # Add user agent to look more like normal browsing
-            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0")
-            
-            print(f"[SAM] Starting Edge with automation profile: {automation_profile_dir}")
-            
-            # Create the driver
+            with os.scandir(self.dirpath) as it:
+                return [e for e in it if e.is_file()]
+        except OSError:
+            return []
+
+    def rescan(self):
+        """Reconcile state with one directory listing and wake any waiters."""
+        in_progress = {}
+        completed = {}
+        for entry in self._scandir():
             try:
-                _persistent_driver = webdriver.Edge(options=options)
-                print("[SAM] Edge automation session created successfully")
-            except Exception as e1:
-                print(f"[SAM] Selenium Manager failed: {e1}")
-                # Try with explicit service
-                try:
-                    service = EdgeService()
-                    _persistent_driver = webdriver.Edge(service=service, options=options)
-                    print("[SAM] Edge automation session created with EdgeService")
-                except Exception as e2:
-                    print(f"[SAM] EdgeService also failed: {e2}")
-                    raise e2
-            
-            _session_start_time = current_time
-            
-            # Navigate to SAM.gov immediately after creating the session
-            print("[SAM] Navigating to SAM.gov...")
-            _persistent_driver.get("https://sam.gov/")
-            time.sleep(3)
-            
-            return _persistent_driver
-            
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if _is_temp_download(entry.name):
+                in_progress[_final_download_name(entry.name)] = size
+            elif entry.name not in self._baseline:
+                completed[entry.name] = size
+        with self._cond:
+            self._in_progress = in_progress
+            for name, size in completed.items():
+                if name not in self._completed:
+                    self._completed[name] = {"path": os.path.join(self.dirpath, name), "bytes": size}
+                else:
+                    self._completed[name]["bytes"] = size
+            for name in list(self._completed):
+                if name not in completed:
+                    del self._completed[name]
+            self._cond.notify_all()
+
+    def progress(self) -> dict:
+        """Bytes on disk per file name, for in-progress and completed downloads."""
+        with self._cond:
+            out = {name: {"bytes": size, "done": False} for name, size in self._in_progress.items()}
+            for name, info in self._completed.items():
+                out[name] = {"bytes": info["bytes"], "done": True}
+            return out
+
+    def wait_for_files(self, timeout: float, count: int = 1, match=None, on_progress=None) -> list:
+        """
+        Block until at least `count` new files matching `match` have finished
+        and nothing else is still downloading. Returns their paths in the order
+        they completed (empty list on timeout).
+        """
+        deadline = time.time() + timeout
+        last_scan = 0.0
+        while True:
+            now = time.time()
+            # Events wake us immediately; the periodic rescan is the polling
+            # fallback and a safety net for events the watcher might miss.
+            if self._observer is None or now - last_scan >= DOWNLOAD_RESCAN_SECS:
+                self.rescan()
+                last_scan = now
+            with self._cond:
+                done = [info["path"] for name, info in self._completed.items()
+                        if match is None or match(name)]
+                busy = bool(self._in_progress)
+            if on_progress:
+                on_progress(self.progress())
+            if len(done) >= count and not busy:
+                return done
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return []
+            with self._cond:
+                self._cond.wait(timeout=min(self.poll_interval if self._observer is None else DOWNLOAD_RESCAN_SECS, remaining))
+
+
+if _WATCHDOG_AVAILABLE:
+    class _DownloadEventHandler(_WatchdogHandler):
+        """Forward filesystem events for a download directory to its watcher."""
+
+        def __init__(self, watcher: DownloadWatcher):
+            super().__init__()
+            self.watcher = watcher
+
+        def on_any_event(self, event):
+            if not getattr(event, "is_directory", False):
+                self.watcher.rescan()
+
+
+def _list_non_temp_files(dirpath: str):
+    """List non-temporary files in directory."""
+    p = _Path(dirpath)
+    return [str(x) for x in p.glob("*") if x.is_file() and not _is_temp_download(x.name)]
+
+
+# ====================== PERSISTENT BROWSER SESSION POOL ======================
+_browser_pool_lock = threading.Lock()
+_browser_sessions = []
+_idle_browser_sessions = queue.Queue()
+
+
+# Requests the fast mode never needs: images, fonts, media and third-party analytics
+_FAST_MODE_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*dap.digitalgov.gov*", "*nr-data.net*", "*newrelic.com*", "*hotjar.com*",
+    "*facebook.net*", "*clarity.ms*"
+]
+
+
+class SamLoginRequired(RuntimeError):
+    """Raised when a headless session finds it is signed out and cannot prompt the user."""
+
+
+def _resolve_browser_mode(mode: str | None = None) -> str:
+    """Turn a requested mode (or the SAM_BROWSER_MODE default) into "visible" or "fast"."""
+    mode = (mode or SAM_BROWSER_MODE).lower()
+    if mode not in SAM_BROWSER_MODES:
+        mode = "auto"
+    if mode == "auto":
+        return "fast" if _CRYPTO_AVAILABLE and os.path.exists(SAM_COOKIE_JAR) else "visible"
+    return mode
+
+
+def _create_edge_driver(profile_dir: str, download_dir: str, mode: str = "visible"):
+    """Launch an Edge automation session on the given profile and download directory."""
+    os.makedirs(profile_dir, exist_ok=True)
+    os.makedirs(download_dir, exist_ok=True)
+
+    options = EdgeOptions()
+    if mode == "fast":
+        options.add_argument("--headless=new")
+
+    # Use dedicated automation profile (separate from your normal Edge)
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument("--profile-directory=SAMAutomation")
+
+    # Window positioning to not interfere with your browsing
+    options.add_argument("--window-size=1200,800")
+    options.add_argument("--window-position=200,100")
+
+    # Essential options for stability and security
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    # Removed --disable-web-security and --allow-running-insecure-content for security
+    # Removed --no-sandbox - use proper sandboxing for security
+
+    # Configure downloads
+    prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+        "profile.default_content_settings.popups": 0,
+        "profile.default_content_setting_values.automatic_downloads": 1
+    }
+    if mode == "fast":
+        prefs["profile.managed_default_content_settings.images"] = 2
+    options.add_experimental_option("prefs", prefs)
+
+    # Hide automation indicators
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    # Add user agent to look more like normal browsing
+    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0")
+
+    sam_logger.info(f"Starting Edge ({mode}) with automation profile: {profile_dir}")
+
+    try:
+        driver = webdriver.Edge(options=options)
+        sam_logger.info("Edge automation session created successfully")
+    except Exception as e1:
+        sam_logger.warning(f"Selenium Manager failed: {e1}")
+        # Try with explicit service
+        try:
+            service = EdgeService()
+            driver = webdriver.Edge(service=service, options=options)
+            sam_logger.info("Edge automation session created with EdgeService")
+        except Exception as e2:
+            sam_logger.warning(f"EdgeService also failed: {e2}")
+            raise e2
+
+    try:
+        driver.execute_cdp_cmd('Page.setDownloadBehavior', {
+            'behavior': 'allow',
+            'downloadPath': download_dir
+        })
+    except Exception:
+        # Prefs above already point downloads at this directory
+        pass
+
+    if mode == "fast":
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': _FAST_MODE_BLOCKED_URLS})
         except Exception as e:
-            print(f"[SAM] Failed to create Edge automation session: {e}")
-            raise e
-    
-    return _persistent_driver
+            sam_logger.warning(f"Could not enable request blocking: {e}")
+
+    # Navigate to SAM.gov immediately after creating the session
+    sam_logger.info("Navigating to SAM.gov...")
+    driver.get(f"{SAM_BASE_URL}/")
+    _wait_for_page_ready(driver)
+
+    return driver
+
+
+def _init_browser_pool():
+    """Create the session slots once; drivers themselves are launched on first lease."""
+    with _browser_pool_lock:
+        if _browser_sessions:
+            return
+        for slot in range(SAM_POOL_SIZE):
+            # Slot 0 keeps the original profile so an existing SAM.gov login carries over
+            suffix = "" if slot == 0 else f"-{slot}"
+            browser = {
+                "slot": slot,
+                "profile_dir": os.path.join(os.path.expanduser("~"), f"EdgeAutomation{suffix}"),
+                "download_dir": os.path.join(AUTOMATION_DOWNLOADS_BASE, f"session-{slot}"),
+                "driver": None,
+                "started": None,
+                "last_used": None,
+                "failures": 0,
+                "mode": None,
+                "login_verified": None,
+                "leased": False,
+                "retire": False
+            }
+            _browser_sessions.append(browser)
+            _idle_browser_sessions.put(browser)
+        sam_logger.info(f"Browser pool ready with {SAM_POOL_SIZE} session slot(s)")
 
 
-def _ensure_sam_login(driver, wait):
-    """Ensure user is logged into SAM.gov, prompt if needed"""
-    
-    print("[SAM] Checking SAM.gov login status...")
+def _close_browser_session(browser: dict):
+    """Quit a session's driver, leaving the slot ready for a fresh launch."""
+    if browser["driver"]:
+        try:
+            browser["driver"].quit()
+            sam_logger.info(f"Closed Edge session {browser['slot']}")
+        except Exception:
+            pass
+    browser["driver"] = None
+    browser["started"] = None
+    browser["failures"] = 0
+    browser["mode"] = None
+    browser["login_verified"] = None
+    browser["retire"] = False
+
+
+def _browser_session_healthy(browser: dict) -> bool:
+    """Check age, idle time, failure count and responsiveness of a session's driver."""
+    if browser["driver"] is None:
+        return False
+    now = time.time()
+    if now - browser["started"] > _max_session_age:
+        return False
+    if browser["last_used"] and now - browser["last_used"] > _session_timeout:
+        return False
+    if browser["failures"] >= _max_session_failures:
+        return False
+    try:
+        browser["driver"].current_url
+        return True
+    except Exception:
+        return False
+
+
+def _launch_browser_session(browser: dict, mode: str):
+    """(Re)start a slot's driver in the given mode and restore saved login cookies."""
+    if browser["driver"]:
+        sam_logger.info(f"Recycling Edge session {browser['slot']}")
+    _close_browser_session(browser)
+    browser["driver"] = _create_edge_driver(browser["profile_dir"], browser["download_dir"], mode)
+    browser["started"] = time.time()
+    browser["last_used"] = None
+    browser["mode"] = mode
+    _restore_sam_cookies(browser["driver"])
+
+
+def _acquire_browser_session(timeout: float | None = None, mode: str | None = None) -> dict:
+    """Lease an idle session (first come, first served), relaunching it if unhealthy
+    or running in a different browser mode than requested."""
+    _init_browser_pool()
+    mode = _resolve_browser_mode(mode)
+    browser = _idle_browser_sessions.get(timeout=timeout)
+    browser["leased"] = True
+    try:
+        if not _browser_session_healthy(browser) or browser["mode"] != mode:
+            _launch_browser_session(browser, mode)
+        else:
+            sam_logger.info(f"Using existing Edge session {browser['slot']}")
+
+        # Start every run with an empty staging directory
+        os.makedirs(browser["download_dir"], exist_ok=True)
+        for leftover in _Path(browser["download_dir"]).iterdir():
+            if leftover.is_file():
+                leftover.unlink()
+        return browser
+    except Exception:
+        _release_browser_session(browser, failed=True)
+        raise
+
+
+def _release_browser_session(browser: dict, failed: bool = False):
+    """Return a leased session to the pool."""
+    browser["failures"] = browser["failures"] + 1 if failed else 0
+    browser["last_used"] = time.time()
+    browser["leased"] = False
+    if browser["retire"] or browser["failures"] >= _max_session_failures:
+        _close_browser_session(browser)
+    _idle_browser_sessions.put(browser)
+
+
+def _collect_session_downloads(staging_dir: str, folder: str) -> dict:
+    """Move finished downloads from a session's staging directory into the contract folder."""
+    moved = {}
+    os.makedirs(folder, exist_ok=True)
+    for path in _list_non_temp_files(staging_dir):
+        dest = os.path.join(folder, os.path.basename(path))
+        try:
+            if os.path.exists(dest):
+                os.remove(dest)
+            shutil.move(path, dest)
+            moved[path] = dest
+        except Exception as e:
+            sam_logger.warning(f"Could not move {path} into {folder}: {e}")
+    return moved
+
+
+def _browser_pool_status() -> list[dict]:
+    """Describe each session slot for diagnostics."""
+    now = time.time()
+    return [{
+        "slot": s["slot"],
+        "running": s["driver"] is not None,
+        "leased": s["leased"],
+        "mode": s["mode"],
+        "age_secs": int(now - s["started"]) if s["started"] else None,
+        "failures": s["failures"]
+    } for s in _browser_sessions]
+
+
+def _browser_rss_mb(driver) -> float | None:
+    """Resident memory of the browser and its child processes, in MB (needs psutil)."""
+    if not _PSUTIL_AVAILABLE:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root, *root.children(recursive=True)]
+        return round(sum(p.memory_info().rss for p in procs) / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def _page_load_ms(driver) -> float | None:
+    """Navigation duration of the current page from the Performance API."""
+    try:
+        return driver.execute_script(
+            "const n = performance.getEntriesByType('navigation')[0]; return n ? n.duration : null;"
+        )
+    except Exception:
+        return None
+
+
+# ====================== BROWSER READINESS WAITS ======================
+SAM_STEP_TIMEOUT = int(os.environ.get('SAM_STEP_TIMEOUT', '20'))
+SAM_POLL_INTERVAL = 0.25
+
+# Counts in-flight fetch/XHR requests so "network idle" can be detected from the page
+_NETWORK_TRACKER_JS = """
+if (!window.__samPending) {
+    window.__samPending = 0;
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            window.__samPending++;
+            return origFetch.apply(this, arguments).finally(() => { window.__samPending--; });
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__samPending++;
+        this.addEventListener('loadend', () => { window.__samPending--; }, { once: true });
+        return origSend.apply(this, arguments);
+    };
+}
+return document.readyState === 'complete' && window.__samPending === 0;
+"""
+
+
+def _wait_until(driver, condition, timeout: float = SAM_STEP_TIMEOUT):
+    """Poll a condition until it returns something truthy; return it, or None on timeout."""
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=SAM_POLL_INTERVAL).until(condition)
+    except Exception:
+        return None
+
+
+def _wait_for_page_ready(driver, timeout: float = SAM_STEP_TIMEOUT) -> bool:
+    """Wait for document.readyState to reach 'complete'."""
+    return bool(_wait_until(
+        driver, lambda d: d.execute_script("return document.readyState") == "complete", timeout
+    ))
+
+
+def _wait_for_network_idle(driver, idle_secs: float = 0.5, timeout: float = SAM_STEP_TIMEOUT) -> bool:
+    """Wait until the page is loaded and no fetch/XHR has been in flight for idle_secs."""
+    idle_since = [None]
+
+    def idle(d):
+        try:
+            quiet = d.execute_script(_NETWORK_TRACKER_JS)
+        except Exception:
+            quiet = False
+        if not quiet:
+            idle_since[0] = None
+            return False
+        idle_since[0] = idle_since[0] or time.monotonic()
+        return time.monotonic() - idle_since[0] >= idle_secs
+
+    return bool(_wait_until(driver, idle, timeout))
+
+
+def _find_first(driver, selectors: list[str], by=None, displayed: bool = False):
+    """Return the first element matching the selectors in priority order, or None."""
+    by = by or By.XPATH
+    for selector in selectors:
+        try:
+            elements = driver.find_elements(by, selector)
+            if elements and (not displayed or elements[0].is_displayed()):
+                return elements[0]
+        except Exception:
+            continue
+    return None
+
+
+def _wait_for_any(driver, selectors: list[str], timeout: float = SAM_STEP_TIMEOUT, by=None, displayed: bool = False):
+    """Wait for any of the selectors to match and return that element, or None on timeout."""
+    return _wait_until(driver, lambda d: _find_first(d, selectors, by, displayed), timeout)
+
+
+def _stage_durations(marks: list[tuple], end: float) -> dict:
+    """Turn (stage, start_time) marks into seconds spent per stage plus the total."""
+    timings = {}
+    for (stage, started), (_, ended) in zip(marks, marks[1:] + [(None, end)]):
+        timings[stage] = round(ended - started, 3)
+    if marks:
+        timings["total"] = round(end - marks[0][1], 3)
+    return timings
+
+
+def _wait_for_url_change(driver, old_url: str, timeout: float = SAM_STEP_TIMEOUT) -> bool:
+    """Wait for navigation away from old_url."""
+    return bool(_wait_until(driver, lambda d: d.current_url != old_url, timeout))
+
+
+# ====================== SAM.GOV LOGIN STATE ======================
+SAM_COOKIE_JAR = os.path.join(DATA_DIR, "sam_cookies.bin")
+SAM_COOKIE_KEY_FILE = os.path.join(DATA_DIR, ".sam_cookie_key")
+SAM_LOGIN_RECHECK_SECS = int(os.environ.get('SAM_LOGIN_RECHECK_SECS', '300'))
+SAM_COOKIE_SAVE_SECS = 600
+SAM_LOGIN_WAIT_SECS = 600
+
+_sam_cookie_lock = threading.Lock()
+_sam_cookies_saved_at = 0.0
+
+_SAM_LOGIN_INDICATORS = [
+    "//button[contains(text(), 'Sign In')]",
+    "//a[contains(text(), 'Sign In')]",
+    "//a[contains(text(), 'Log In')]",
+    "//button[contains(text(), 'Log In')]",
+    "//a[contains(@href, 'login')]",
+    "//button[contains(@class, 'login')]"
+]
+
+_SAM_PROFILE_INDICATORS = [
+    "//span[contains(text(), 'Account')]",
+    "//span[contains(text(), 'Profile')]",
+    "//button[contains(@aria-label, 'Account')]",
+    "//*[contains(text(), 'Welcome')]",
+    "//button[contains(@aria-label, 'User')]",
+    "//*[contains(@class, 'user-menu')]"
+]
+
+# One round trip: "in" when an account menu shows, "out" when only sign-in prompts show
+_SAM_LOGIN_PROBE_JS = """
+const visible = xpath => {
+    const found = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let i = 0; i < found.snapshotLength; i++) {
+        if (found.snapshotItem(i).getClientRects().length) return true;
+    }
+    return false;
+};
+if (document.readyState !== 'complete') return 'loading';
+if (arguments[1].some(visible)) return 'in';
+if (arguments[0].some(visible)) return 'out';
+return 'in';
+"""
+
+
+def _sam_cookie_cipher():
+    """Fernet cipher for the cookie jar, keyed by SAM_COOKIE_KEY or a local key file."""
+    if not _CRYPTO_AVAILABLE:
+        return None
+    key = os.environ.get('SAM_COOKIE_KEY')
+    if not key:
+        if not os.path.exists(SAM_COOKIE_KEY_FILE):
+            os.makedirs(DATA_DIR, exist_ok=True)
+            fd = os.open(SAM_COOKIE_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(Fernet.generate_key())
+        with open(SAM_COOKIE_KEY_FILE, 'rb') as f:
+            key = f.read().strip()
+    return Fernet(key)
+
+
+def _save_sam_cookies(driver, force: bool = False):
+    """Export the driver's authenticated SAM.gov cookies to the encrypted jar."""
+    global _sam_cookies_saved_at
+    if not force and time.time() - _sam_cookies_saved_at < SAM_COOKIE_SAVE_SECS:
+        return
+    try:
+        cipher = _sam_cookie_cipher()
+        if cipher is None:
+            sam_logger.info("cryptography not installed; not persisting login cookies")
+            return
+        cookies = [c for c in driver.get_cookies() if SAM_HOST in (c.get("domain") or "")]
+        if not cookies:
+            return
+        token = cipher.encrypt(json.dumps(cookies).encode("utf-8"))
+        with _sam_cookie_lock:
+            tmp = SAM_COOKIE_JAR + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(token)
+            os.replace(tmp, SAM_COOKIE_JAR)
+            _sam_cookies_saved_at = time.time()
+        sam_logger.info(f"Saved {len(cookies)} login cookies")
+    except Exception as e:
+        sam_logger.warning(f"Could not save login cookies: {e}")
+
+
+def _restore_sam_cookies(driver) -> int:
+    """Inject unexpired cookies from the jar into a fresh driver sitting on sam.gov."""
+    if not os.path.exists(SAM_COOKIE_JAR):
+        return 0
+    try:
+        cipher = _sam_cookie_cipher()
+        if cipher is None:
+            return 0
+        with _sam_cookie_lock:
+            with open(SAM_COOKIE_JAR, 'rb') as f:
+                cookies = json.loads(cipher.decrypt(f.read()))
+    except InvalidToken:
+        sam_logger.warning("Cookie jar could not be decrypted (key changed?); ignoring it")
+        return 0
+    except Exception as e:
+        sam_logger.warning(f"Could not read login cookies: {e}")
+        return 0
+
+    now = time.time()
+    restored = 0
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] <= now:
+            continue
+        if cookie.get("sameSite") not in ("Strict", "Lax", "None"):
+            cookie.pop("sameSite", None)
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except Exception:
+            continue
+    if restored:
+        driver.refresh()
+        _wait_for_page_ready(driver)
+        sam_logger.info(f"Restored {restored} login cookies")
+    return restored
+
+
+def _probe_sam_login(driver) -> bool | None:
+    """Single scripted DOM check: True if signed in, False if not, None while loading."""
+    try:
+        state = driver.execute_script(_SAM_LOGIN_PROBE_JS, _SAM_LOGIN_INDICATORS, _SAM_PROFILE_INDICATORS)
+    except Exception:
+        return None
+    return None if state == "loading" else state == "in"
+
+
+def _ensure_sam_login(driver, wait, browser: dict | None = None):
+    """Ensure user is logged into SAM.gov, prompt if needed.
+
+    A pooled session verified within SAM_LOGIN_RECHECK_SECS skips the check
+    entirely; otherwise one scripted probe decides, and the interactive wait
+    only runs when the user actually has to sign in.
+    """
+    if browser and browser.get("login_verified") and time.time() - browser["login_verified"] < SAM_LOGIN_RECHECK_SECS:
+        sam_logger.info("Login verified recently; skipping check")
+        return
+
+    sam_logger.info("Checking SAM.gov login status...")
     
     # Make sure we're on SAM.gov
     current_url = driver.current_url
-    if "sam.gov" not in current_url.lower():
-        print("[SAM] Navigating to SAM.gov...")
-        driver.get("https://sam.gov/")
-        time.sleep(5)  # Give more time for page to load
-    
-    # Check if we're logged in by looking for login indicators
+    if SAM_HOST not in current_url.lower():
+        sam_logger.info("Navigating to SAM.gov...")
+        driver.get(f"{SAM_BASE_URL}/")
+        _wait_for_network_idle(driver)
+
     try:
-        # Look for common login indicators
-        login_indicators = [
-            "//button[contains(text(), 'Sign In')]",
-            "//a[contains(text(), 'Sign In')]",
-            "//a[contains(text(), 'Log In')]",
-            "//button[contains(text(), 'Log In')]",
-            "//a[contains(@href, 'login')]",
-            "//button[contains(@class, 'login')]"
-        ]
-        
-        login_needed = False
-        for indicator in login_indicators:
-            try:
-                elements = driver.find_elements(By.XPATH, indicator)
-                if elements and elements[0].is_displayed():
-                    login_needed = True
-                    print(f"[SAM] Login required - found indicator: {indicator}")
-                    break
-            except Exception:
-                continue
-        
-        if login_needed:
-            print("[SAM] ============================================")
-            print("[SAM] LOGIN REQUIRED")
-            print("[SAM] Please log in to SAM.gov in the browser window")
-            print("[SAM] The automation will wait for you to complete login")
-            print("[SAM] ============================================")
+        state = _wait_until(driver, lambda d: {True: "in", False: "out"}.get(_probe_sam_login(d)))
+        logged_in = state == "in"
+
+        if logged_in:
+            sam_logger.info("Already logged in to SAM.gov")
+        elif browser and browser.get("mode") == "fast":
+            raise SamLoginRequired("Signed out of SAM.gov in headless mode")
+        else:
+            sam_logger.warning("LOGIN REQUIRED: please log in to SAM.gov in the browser window; "
+                               "the automation will wait for you to complete login")
             
             # Bring the browser window to front
             try:
@@ -693,211 +1549,143 @@ def _ensure_sam_login(driver, wait):
                 driver.switch_to.window(driver.current_window_handle)
             except Exception:
                 pass
-            
-            # Wait for login to complete
-            login_complete = False
-            max_wait_time = 600  # 10 minutes
+
             start_wait = time.time()
-            check_interval = 3  # Check every 3 seconds
-            
-            while not login_complete and (time.time() - start_wait) < max_wait_time:
-                time.sleep(check_interval)
-                
-                # Check if login indicators are gone
-                still_needs_login = False
-                for indicator in login_indicators:
-                    try:
-                        elements = driver.find_elements(By.XPATH, indicator)
-                        if elements and elements[0].is_displayed():
-                            still_needs_login = True
-                            break
-                    except Exception:
-                        continue
-                
-                if not still_needs_login:
-                    login_complete = True
-                    print("[SAM] Login detected as complete!")
-                    break
-                
-                # Also check for profile/account indicators that suggest login
-                profile_indicators = [
-                    "//span[contains(text(), 'Account')]",
-                    "//span[contains(text(), 'Profile')]",
-                    "//button[contains(@aria-label, 'Account')]",
-                    "//*[contains(text(), 'Welcome')]",
-                    "//button[contains(@aria-label, 'User')]",
-                    "//*[contains(@class, 'user-menu')]"
-                ]
-                
-                for indicator in profile_indicators:
-                    try:
-                        elements = driver.find_elements(By.XPATH, indicator)
-                        if elements and elements[0].is_displayed():
-                            login_complete = True
-                            print("[SAM] Login detected via profile indicator!")
-                            break
-                    except Exception:
-                        continue
-                
-                if login_complete:
-                    break
-                
-                # Show progress every 30 seconds
-                elapsed = time.time() - start_wait
-                if int(elapsed) % 30 == 0:
-                    remaining = max_wait_time - elapsed
-                    print(f"[SAM] Still waiting for login... {remaining:.0f} seconds remaining")
-            
-            if not login_complete:
+            while not logged_in and (time.time() - start_wait) < SAM_LOGIN_WAIT_SECS:
+                # Re-probe continuously, reporting progress every 30 seconds
+                logged_in = bool(_wait_until(driver, lambda d: _probe_sam_login(d) is True,
+                                             timeout=min(30, SAM_LOGIN_WAIT_SECS - (time.time() - start_wait))))
+                if not logged_in:
+                    remaining = SAM_LOGIN_WAIT_SECS - (time.time() - start_wait)
+                    sam_logger.info(f"Still waiting for login... {remaining:.0f} seconds remaining")
+
+            if not logged_in:
                 raise RuntimeError("Login timeout - please ensure you're logged into SAM.gov and try again")
-            
-            print("[SAM] Login successful!")
-        
-        else:
-            print("[SAM] Already logged in to SAM.gov")
-    
+
+            sam_logger.info("Login successful!")
+
+        _save_sam_cookies(driver, force=state != "in")
+        if browser is not None:
+            browser["login_verified"] = time.time()
+
+    except SamLoginRequired:
+        raise
     except Exception as e:
-        print(f"[SAM] Login check failed: {e}")
+        sam_logger.warning(f"Login check failed: {e}")
         # Continue anyway - maybe we're logged in but indicators changed
-        print("[SAM] Continuing with automation...")
+        sam_logger.info("Continuing with automation...")
     
-    time.sleep(2)  # Give page time to settle after login
+    _wait_for_page_ready(driver)
+
+
+# XPath of each candidate, in priority order; the script clicks the first that matches
+_ATTACHMENTS_TAB_XPATHS = [
+    "//a[normalize-space()='Attachments/Links']",
+    "//button[normalize-space()='Attachments/Links']",
+    "//a[contains(text(),'Attachments/Links')]",
+    "//button[contains(text(),'Attachments/Links')]",
+    "//a[contains(text(),'Attachments')]",
+    "//button[contains(text(),'Attachments')]",
+    "//*[@role='tab'][contains(text(),'Attachments')]",
+    "//*[contains(@class,'tab')][contains(text(),'Attachments')]"
+]
+
+_CLICK_FIRST_XPATH_JS = """
+for (const xpath of arguments[0]) {
+    const el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (el) { el.click(); return xpath; }
+}
+return null;
+"""
+
+# Collects external links and attachment rows in one pass; dedup happens in Sets
+_EXTRACT_LINKS_AND_ATTACHMENTS_JS = """
+const fileSelectors = arguments[0], samHost = arguments[1];
+const fileExtensions = ['.pdf', '.doc', '.docx', '.xlsx', '.xls', '.zip', '.txt'];
+const sizeRe = /(\\d+(?:\\.\\d+)?\\s*(?:KB|MB|bytes))/i;
+const text = el => (el.innerText || el.textContent || '').trim();
+
+const links = [], seenUrls = new Set();
+for (const a of document.querySelectorAll('a[href]')) {
+    const href = a.href;
+    if (href && href.startsWith('http') && !href.includes(samHost) && !seenUrls.has(href)) {
+        seenUrls.add(href);
+        links.push({url: href, text: text(a) || href, type: 'external'});
+    }
+}
+
+const attachments = [], seenFiles = new Set();
+for (const xpath of fileSelectors) {
+    const found = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let i = 0; i < found.snapshotLength; i++) {
+        const el = found.snapshotItem(i);
+        const t = text(el);
+        const href = el.href || el.getAttribute('href') || '';
+        let filename = '';
+        if (t && fileExtensions.some(ext => t.toLowerCase().includes(ext))) {
+            filename = t;
+        } else if (href && fileExtensions.some(ext => href.toLowerCase().includes(ext))) {
+            filename = href.split('/').pop();
+        }
+        if (!filename || seenFiles.has(filename)) continue;
+        seenFiles.add(filename);
+        const parentText = el.parentElement ? text(el.parentElement) : '';
+        const size = parentText.match(sizeRe);
+        attachments.push({filename: filename, url: href, text: t, size: size ? size[1] : '', type: 'file'});
+    }
+}
+return {links: links, attachments: attachments};
+"""
+
+_ATTACHMENT_FILE_XPATHS = [
+    "//a[contains(@href, '.pdf')]",
+    "//a[contains(@href, '.doc')]",
+    "//a[contains(@href, '.xlsx')]",
+    "//a[contains(@href, '.zip')]",
+    "//span[contains(text(), '.pdf')]",
+    "//span[contains(text(), '.doc')]",
+    "//span[contains(text(), '.xlsx')]",
+    "//div[contains(@class, 'attachment')]",
+    "//div[contains(@class, 'file')]"
+]
 
 
 def _extract_links_and_attachments_info(driver, wait):
-    """Extract links and attachment information from SAM.gov opportunity page"""
+    """Extract links and attachment information from SAM.gov opportunity page.
+
+    The tab click and the extraction each run as one injected script, so the
+    cost per page no longer grows with the number of links on it.
+    """
     result = {"links": [], "attachments": []}
     
     try:
         # Navigate to Attachments/Links tab
-        print("[SAM] Looking for Attachments/Links tab...")
+        sam_logger.info("Looking for Attachments/Links tab...")
+        clicked = driver.execute_script(_CLICK_FIRST_XPATH_JS, _ATTACHMENTS_TAB_XPATHS)
         
-        tab_candidates = [
-            "//a[normalize-space()='Attachments/Links']",
-            "//button[normalize-space()='Attachments/Links']",
-            "//a[contains(text(),'Attachments/Links')]",
-            "//button[contains(text(),'Attachments/Links')]",
-            "//a[contains(text(),'Attachments')]",
-            "//button[contains(text(),'Attachments')]",
-            "//*[@role='tab'][contains(text(),'Attachments')]",
-            "//*[contains(@class,'tab')][contains(text(),'Attachments')]"
-        ]
+        if not clicked:
+            sam_logger.warning("Attachments/Links tab not found")
+            return result
         
-        tab = None
-        for xpath in tab_candidates:
-            try:
-                elements = driver.find_elements(By.XPATH, xpath)
-                if elements:
-                    tab = elements[0]
-                    print(f"[SAM] Found tab with xpath: {xpath}")
-                    break
-            except Exception:
-                continue
+        sam_logger.info(f"Found tab with xpath: {clicked}")
+        _wait_for_network_idle(driver)
         
-        if tab is None:
-            print("[SAM] Attachments/Links tab not found")
-            return result
+        sam_logger.info("Extracting links and attachments...")
+        extracted = driver.execute_script(_EXTRACT_LINKS_AND_ATTACHMENTS_JS, _ATTACHMENT_FILE_XPATHS, SAM_HOST) or {}
+        result["links"] = extracted.get("links", [])
+        result["attachments"] = extracted.get("attachments", [])
         
-        # Click the tab
-        driver.execute_script("arguments[0].click();", tab)
-        time.sleep(3)  # Wait for content to load
-        
-        # Extract external links
-        print("[SAM] Extracting external links...")
-        try:
-            link_elements = driver.find_elements(By.XPATH, "//a[@href]")
-            for link_el in link_elements:
-                try:
-                    href = link_el.get_attribute('href')
-                    text = link_el.text.strip()
-                    
-                    # Filter for external links (not sam.gov internal links)
-                    if href and href.startswith('http') and 'sam.gov' not in href:
-                        if href not in [item['url'] for item in result['links']]:
-                            result['links'].append({
-                                'url': href,
-                                'text': text or href,
-                                'type': 'external'
-                            })
-                except Exception as e:
-                    print(f"[SAM] Error processing link: {e}")
-                    
-        except Exception as e:
-            print(f"[SAM] Error extracting links: {e}")
-        
-        # Extract attachment information
-        print("[SAM] Extracting attachment information...")
-        try:
-            # Look for file elements with various selectors
-            file_selectors = [
-                "//a[contains(@href, '.pdf')]",
-                "//a[contains(@href, '.doc')]", 
-                "//a[contains(@href, '.xlsx')]",
-                "//a[contains(@href, '.zip')]",
-                "//span[contains(text(), '.pdf')]",
-                "//span[contains(text(), '.doc')]",
-                "//span[contains(text(), '.xlsx')]",
-                "//div[contains(@class, 'attachment')]",
-                "//div[contains(@class, 'file')]"
-            ]
-            
-            for selector in file_selectors:
-                try:
-                    elements = driver.find_elements(By.XPATH, selector)
-                    for el in elements:
-                        try:
-                            text = el.text.strip()
-                            href = el.get_attribute('href') or ''
-                            
-                            # Extract filename
-                            filename = ''
-                            file_extensions = ['.pdf', '.doc', '.docx', '.xlsx', '.xls', '.zip', '.txt']
-                            
-                            if text and any(ext in text.lower() for ext in file_extensions):
-                                filename = text
-                            elif href and any(ext in href.lower() for ext in file_extensions):
-                                filename = href.split('/')[-1]
-                            
-                            if filename and filename not in [item['filename'] for item in result['attachments']]:
-                                file_size = ""
-                                # Try to find file size in nearby elements
-                                try:
-                                    parent = el.find_element(By.XPATH, "./..")
-                                    size_text = parent.text
-                                    if 'KB' in size_text or 'MB' in size_text or 'bytes' in size_text:
-                                        size_match = _re.search(r'(\d+(?:\.\d+)?\s*(?:KB|MB|bytes))', size_text, _re.IGNORECASE)
-                                        if size_match:
-                                            file_size = size_match.group(1)
-                                except Exception:
-                                    pass
-                                
-                                result['attachments'].append({
-                                    'filename': filename,
-                                    'url': href,
-                                    'text': text,
-                                    'size': file_size,
-                                    'type': 'file'
-                                })
-                        except Exception as e:
-                            print(f"[SAM] Error processing attachment element: {e}")
-                except Exception as e:
-                    print(f"[SAM] Error with selector {selector}: {e}")
-                    
-        except Exception as e:
-            print(f"[SAM] Error extracting attachments: {e}")
-        
-        print(f"[SAM] Extracted {len(result['links'])} links and {len(result['attachments'])} attachments")
+        sam_logger.info(f"Extracted {len(result['links'])} links and {len(result['attachments'])} attachments")
         
     except Exception as e:
-        print(f"[SAM] Error in link/attachment extraction: {e}")
+        sam_logger.error(f"Error in link/attachment extraction: {e}")
     
     return result
 
 
 def _download_attachments_on_page(driver, download_dir: str, wait):
     """Download attachments from the current page"""
-    before = set(_list_non_temp_files(download_dir))
-    
+    watcher = DownloadWatcher(download_dir).start()
     try:
         # Look for Download All button
         download_all_selectors = [
@@ -926,44 +1714,422 @@ def _download_attachments_on_page(driver, download_dir: str, wait):
             except Exception as e2:
                 raise RuntimeError("Download All button not found.") from e2
 
-        # Wait for downloads to finish
-        start = time.time()
-        while time.time() - start < 240:
-            time.sleep(1)
-            if _has_temp_download(download_dir):
-                continue
-            after = set(_list_non_temp_files(download_dir))
-            new = list(after - before)
-            if new:
-                return new
-        
-        # Return empty list if no new files (don't raise error)
-        return []
+        # Wait for downloads to finish (empty list on timeout, don't raise)
+        return watcher.wait_for_files(timeout=240)
         
     except Exception as e:
-        print(f"[SAM] Attachment download failed: {e}")
+        sam_logger.warning(f"Attachment download failed: {e}")
+        return []
+    finally:
+        watcher.close()
+
+
+# ====================== DIRECT ATTACHMENT DOWNLOADS ======================
+ATTACHMENT_DOWNLOAD_WORKERS = int(os.environ.get('ATTACHMENT_DOWNLOAD_WORKERS', '4'))
+ATTACHMENT_RETRIES = 3
+ATTACHMENT_TIMEOUT = 60
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+
+
+def _driver_cookies(driver) -> tuple[list[dict], str | None]:
+    """Read the authenticated cookies and user agent out of a browser session."""
+    cookies = driver.get_cookies()
+    try:
+        user_agent = driver.execute_script("return navigator.userAgent;")
+    except Exception:
+        user_agent = None
+    return cookies, user_agent
+
+
+def _build_http_session(cookies: list[dict], user_agent: str | None = None,
+                        pool_size: int = ATTACHMENT_DOWNLOAD_WORKERS) -> requests.Session:
+    """Create a requests session carrying the browser's cookies, sized for parallel downloads."""
+    http = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    if user_agent:
+        http.headers["User-Agent"] = user_agent
+    for c in cookies:
+        http.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+    return http
+
+
+def _attachment_filename(response, url: str) -> str:
+    """Pick a filename from Content-Disposition, else from the final URL path."""
+    disposition = response.headers.get("Content-Disposition", "")
+    match = _re.search(r"filename\*=(?:UTF-8'')?([^;]+)|filename=\"?([^\";]+)\"?", disposition, _re.IGNORECASE)
+    if match:
+        name = requests.utils.unquote(match.group(1) or match.group(2)).strip()
+    else:
+        name = requests.utils.unquote(os.path.basename(urlparse(response.url or url).path))
+    return secure_filename(name) or f"attachment_{hashlib.sha1(url.encode()).hexdigest()[:10]}"
+
+
+def _reserve_name(name: str, reserved: set, reserved_lock: threading.Lock) -> str:
+    """Claim a filename in the target folder; two URLs can resolve to the same name, so suffix the later one."""
+    with reserved_lock:
+        stem, ext = os.path.splitext(name)
+        n = 1
+        while name.lower() in reserved:
+            name = f"{stem} ({n}){ext}"
+            n += 1
+        reserved.add(name.lower())
+    return name
+
+
+def _download_attachment(http: requests.Session, url: str, folder: str,
+                         reserved: set, reserved_lock: threading.Lock,
+                         known: dict | None = None) -> dict:
+    """Stream one attachment to disk with a SHA-256 checksum, retrying transient failures.
+
+    `known` is the manifest entry from a previous sync; when the server reports
+    the same ETag / Last-Modified / size the body is not downloaded again.
+    """
+    headers = {}
+    if known:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    for attempt in range(1, ATTACHMENT_RETRIES + 1):
+        name = None
+        partial = None
+        last_error = None
+        try:
+            with http.get(url, stream=True, timeout=ATTACHMENT_TIMEOUT, headers=headers) as resp:
+                if resp.status_code >= 500:
+                    raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+                if known and (resp.status_code == 304 or _same_remote_identity(known, resp)):
+                    if known.get("from_store"):
+                        # Another notice already fetched this exact file; link it instead
+                        name = _reserve_name(known["name"], reserved, reserved_lock)
+                        dest = os.path.join(folder, name)
+                        _link_or_copy(known["path"], dest)
+                        return {**_manifest_record(known), "url": url, "ok": True, "path": dest,
+                                "change": "new", "store_hit": True}
+                    return {**_manifest_record(known), "url": url, "ok": True, "change": "unchanged"}
+                resp.raise_for_status()
+
+                name = _reserve_name(_attachment_filename(resp, url), reserved, reserved_lock)
+
+                dest = os.path.join(folder, name)
+                partial = dest + ".partial"
+                digest = hashlib.sha256()
+                size = 0
+                with open(partial, "wb") as out:
+                    for chunk in resp.iter_content(chunk_size=ATTACHMENT_CHUNK_SIZE):
+                        if chunk:
+                            out.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                os.replace(partial, dest)
+
+            sha256 = digest.hexdigest()
+            if known and known.get("sha256") == sha256:
+                change = "unchanged"
+            else:
+                change = "updated" if known else "new"
+            return {
+                "url": url, "ok": True, "path": dest, "size": size, "sha256": sha256,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "change": change
+            }
+
+        except requests.HTTPError as e:
+            last_error = e
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and status < 500:
+                break  # 4xx will not fix itself on retry
+        except (requests.RequestException, OSError) as e:
+            last_error = e
+        finally:
+            if last_error is not None:
+                if name:
+                    with reserved_lock:
+                        reserved.discard(name.lower())
+                if partial and os.path.exists(partial):
+                    os.remove(partial)
+        if attempt < ATTACHMENT_RETRIES:
+            time.sleep(0.5 * 2 ** attempt)
+
+    sam_logger.warning(f"Direct download failed for {url}: {last_error}")
+    return {"url": url, "ok": False, "error": str(last_error)}
+
+
+def download_attachments_direct(cookies: list[dict], urls: list[str], folder: str,
+                                user_agent: str | None = None,
+                                workers: int = ATTACHMENT_DOWNLOAD_WORKERS,
+                                manifest: dict | None = None) -> list[dict]:
+    """Fetch attachment URLs in parallel over HTTP using cookies copied from the browser.
+
+    Returns one record per URL with the saved path, size and SHA-256, or the error.
+    With a manifest, attachments whose remote identity has not changed are
+    reported as "unchanged" and keep their existing local path. URLs another
+    notice already fetched are linked from the attachment store when the server
+    confirms they have not changed.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u and u.startswith("http")))
+    if not urls:
         return []
 
+    known = (manifest or {}).get("attachments", {})
+    os.makedirs(folder, exist_ok=True)
+    reserved = {f.lower() for f in os.listdir(folder)}
+    reserved_lock = threading.Lock()
+    with _build_http_session(cookies, user_agent, pool_size=workers) as http:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as pool:
+            results = list(pool.map(
+                lambda u: _download_attachment(http, u, folder, reserved, reserved_lock,
+                                               _manifest_known(known.get(u)) or _store_known(u)), urls
+            ))
+
+    ok = sum(1 for r in results if r["ok"])
+    unchanged = sum(1 for r in results if r.get("change") == "unchanged")
+    sam_logger.info(f"Direct download: {ok}/{len(urls)} attachments ok, {unchanged} unchanged")
+    return results
+
+
+# ====================== CONTENT-ADDRESSED ATTACHMENT STORE ======================
+# Every downloaded file is kept once under CONTRACTS_BASE/.store/<sha[:2]>/<sha>;
+# contract folders hold hardlinks to it. The store lives inside CONTRACTS_BASE so
+# both are on the same filesystem.
+ATTACHMENT_STORE_DIR = os.path.join(CONTRACTS_BASE, ".store")
+ATTACHMENT_STORE_INDEX = os.path.join(ATTACHMENT_STORE_DIR, "index.json")
+
+_store_lock = threading.Lock()
+_store_index = None  # url -> {sha256, size, name, etag, last_modified}
+
+
+def _store_path(sha256: str) -> str:
+    """Where the blob for a content hash lives in the store."""
+    return os.path.join(ATTACHMENT_STORE_DIR, sha256[:2], sha256)
+
+
+def _load_store_index() -> dict:
+    """Return the URL index of the attachment store, reading it on first use."""
+    global _store_index
+    if _store_index is None:
+        _store_index = {}
+        if os.path.exists(ATTACHMENT_STORE_INDEX):
+            try:
+                with open(ATTACHMENT_STORE_INDEX, 'r', encoding='utf-8') as f:
+                    _store_index = json.load(f)
+            except Exception as e:
+                sam_logger.error(f"Error reading attachment store index: {e}")
+    return _store_index
+
+
+def _persist_store_index():
+    """Write the URL index atomically."""
+    os.makedirs(ATTACHMENT_STORE_DIR, exist_ok=True)
+    tmp = ATTACHMENT_STORE_INDEX + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(_store_index, f, indent=2)
+    os.replace(tmp, ATTACHMENT_STORE_INDEX)
+
+
+def _link_or_copy(src: str, dest: str):
+    """Hardlink src to dest, copying when the filesystem cannot link."""
+    tmp = dest + ".link"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
+def store_file(path: str, sha256: str | None = None) -> str:
+    """
+    Put a downloaded file into the store and turn `path` into a hardlink to it.
+
+    When the store already holds the same content, the new copy is dropped in
+    favour of a link to the existing blob. Returns the file's SHA-256.
+    """
+    sha256 = sha256 or _file_sha256(path)
+    blob = _store_path(sha256)
+    with _store_lock:
+        if os.path.exists(blob):
+            if not os.path.samefile(blob, path):
+                _link_or_copy(blob, path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+            except OSError:
+                shutil.copy2(path, blob)
+    return sha256
+
+
+def _store_known(url: str) -> dict | None:
+    """A stored copy of this URL, usable as a `known` entry for a conditional request."""
+    with _store_lock:
+        entry = _load_store_index().get(url)
+    if not entry or not os.path.exists(_store_path(entry["sha256"])):
+        return None
+    return {**entry, "path": _store_path(entry["sha256"]), "from_store": True}
+
+
+def store_downloads(main_pdf: str | None, downloaded: list[str], attachment_downloads: list[dict]):
+    """Deduplicate this run's files into the store and remember where each URL's content lives."""
+    hashes = {r["path"]: r.get("sha256") for r in attachment_downloads if r.get("ok") and r.get("path")}
+    for path in dict.fromkeys([main_pdf, *downloaded, *hashes]):
+        if path and os.path.isfile(path):
+            try:
+                hashes[path] = store_file(path, hashes.get(path))
+            except OSError as e:
+                sam_logger.warning(f"Could not add {path} to the attachment store: {e}")
+
+    remembered = [r for r in attachment_downloads
+                  if r.get("ok") and r.get("sha256") and r.get("change") != "unchanged"]
+    if not remembered:
+        return
+    with _store_lock:
+        index = _load_store_index()
+        for r in remembered:
+            index[r["url"]] = {
+                "sha256": r["sha256"],
+                "size": r.get("size"),
+                "name": os.path.basename(r["path"]),
+                "etag": r.get("etag"),
+                "last_modified": r.get("last_modified")
+            }
+        try:
+            _persist_store_index()
+        except Exception as e:
+            sam_logger.warning(f"Could not write attachment store index: {e}")
+
+
+# ====================== ATTACHMENT MANIFEST ======================
+MANIFEST_NAME = ".sam_manifest.json"
+
+
+def _load_manifest(folder: str) -> dict:
+    """Read a contract folder's sync manifest (empty when it has never been synced)."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            sam_logger.error(f"Error reading manifest in {folder}: {e}")
+    return {"attachments": {}}
+
+
+def _save_manifest(folder: str, manifest: dict):
+    """Write the manifest atomically so an interrupted sync never leaves it half-written."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _manifest_known(entry: dict | None) -> dict | None:
+    """Only trust a manifest entry whose local file is still there at the recorded size."""
+    if not entry or not entry.get("path"):
+        return None
+    try:
+        if os.path.getsize(entry["path"]) != entry.get("size"):
+            return None
+    except OSError:
+        return None
+    return entry
+
+
+def _same_remote_identity(known: dict, resp) -> bool:
+    """True when the response headers identify the same remote file as the manifest entry."""
+    etag = resp.headers.get("ETag")
+    if etag and known.get("etag"):
+        return etag == known["etag"]
+    last_modified = resp.headers.get("Last-Modified")
+    length = resp.headers.get("Content-Length")
+    if last_modified and known.get("last_modified") and length is not None:
+        return last_modified == known["last_modified"] and int(length) == known.get("size")
+    return False
+
+
+def _manifest_record(entry: dict) -> dict:
+    """The manifest fields describing one synced file."""
+    return {k: entry.get(k) for k in ("path", "size", "sha256", "etag", "last_modified")}
+
+
+def _file_sha256(path: str) -> str:
+    """SHA-256 of a file on disk, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ATTACHMENT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _update_manifest(folder: str, manifest: dict, notice_id: str, main_pdf: str | None,
+                     attachment_downloads: list[dict]) -> dict:
+    """Record the files this sync produced and persist the manifest."""
+    now = datetime.now().isoformat()
+    manifest["notice_id"] = notice_id
+    manifest["synced"] = now
+    attachments = manifest.setdefault("attachments", {})
+    for record in attachment_downloads:
+        if record.get("ok") and record.get("path"):
+            entry = _manifest_record(record)
+            entry["url"] = record["url"]
+            entry["synced"] = now if record.get("change") != "unchanged" else attachments.get(record["url"], {}).get("synced", now)
+            attachments[record["url"]] = entry
+    if main_pdf and os.path.exists(main_pdf):
+        previous = manifest.get("main_pdf") or {}
+        if previous.get("path") != main_pdf or previous.get("size") != os.path.getsize(main_pdf):
+            manifest["main_pdf"] = {"path": main_pdf, "size": os.path.getsize(main_pdf),
+                                    "sha256": _file_sha256(main_pdf), "synced": now}
+    try:
+        _save_manifest(folder, manifest)
+    except Exception as e:
+        sam_logger.warning(f"Could not write manifest in {folder}: {e}")
+    return manifest
+
+
+def _sam_download_with_persistent_session(notice_id: str, job_title: str, download_dir: str,
+                                         timeout_secs=300, force: bool = False, mode: str | None = None):
+    """SAM.gov automation using persistent Edge session with login maintenance.
+
+    The contract folder's manifest makes re-runs incremental: only new or
+    changed attachments are fetched, and the main PDF is regenerated only when
+    it is missing, an attachment changed (an amendment), or `force` is set.
 
-def _sam_download_with_persistent_session(notice_id: str, job_title: str, download_dir: str, timeout_secs=300):
-    """SAM.gov automation using persistent Edge session with login maintenance"""
+    `mode` picks the browser profile ("visible", "fast" or "auto"). A headless
+    run that finds itself signed out is retried once in a visible window.
+    """
     
     if not _SELENIUM_AVAILABLE:
         raise RuntimeError("Selenium not installed. Run: pip install selenium")
     
-    print(f"[SAM] Starting automation for Notice ID: {notice_id}")
-    print(f"[SAM] Download directory: {download_dir}")
+    sam_logger.info(f"Starting automation for Notice ID: {notice_id}")
+    sam_logger.info(f"Download directory: {download_dir}")
     
-    # Get persistent driver (maintains login across runs)
-    driver = _get_persistent_edge_driver(download_dir)
+    # Lease a pooled driver (maintains login across runs); it downloads into its own staging dir
+    browser = _acquire_browser_session(mode=mode)
+    driver = browser["driver"]
+    staging_dir = browser["download_dir"]
     wait = WebDriverWait(driver, 30)
+    failed = False
+    retry_visible = False
+    marks = []
+    manifest = {"attachments": {}} if force else _load_manifest(download_dir)
+
+    def enter_stage(stage):
+        marks.append((stage, time.monotonic()))
+        _sam_progress(notice_id, stage)
     
     try:
         # Ensure we're logged into SAM.gov
-        _ensure_sam_login(driver, wait)
+        enter_stage("login")
+        _ensure_sam_login(driver, wait, browser)
         
         # Now proceed with the automation
-        print(f"[SAM] Searching for notice ID: {notice_id}")
+        sam_logger.info(f"Searching for notice ID: {notice_id}")
+        enter_stage("search")
         
         # Find search input
         search = None
@@ -976,13 +2142,9 @@ def _sam_download_with_persistent_session(notice_id: str, job_title: str, downlo
             "input[name*='search']"
         ]
         
-        for selector in search_selectors:
-            try:
-                search = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                print(f"[SAM] Found search input with selector: {selector}")
-                break
-            except Exception:
-                continue
+        search = _wait_for_any(driver, search_selectors, by=By.CSS_SELECTOR)
+        if search:
+            sam_logger.info("Found search input")
         
         if not search:
             # Fallback: look for any input that might be the search
@@ -1003,222 +2165,1421 @@ def _sam_download_with_persistent_session(notice_id: str, job_title: str, downlo
             search.send_keys(str(notice_id))
             search.send_keys(Keys.ENTER)
         except Exception as e:
-            print(f"[SAM] Search input failed, trying click approach: {e}")
+            sam_logger.warning(f"Search input failed, trying click approach: {e}")
             # Alternative: click the search input first
-            driver.execute_script("arguments[0].click();", search)
-            time.sleep(1)
-            driver.execute_script("arguments[0].value = '';", search)
+            driver.execute_script("arguments[0].click(); arguments[0].value = '';", search)
             search.send_keys(str(notice_id))
             search.send_keys(Keys.ENTER)
         
         # Wait for search results
-        print("[SAM] Waiting for search results...")
-        time.sleep(5)
-        
-        # Find the opportunity link
-        opportunity_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/opp/')]")
-        
-        if not opportunity_links:
-            # Try alternative selectors
-            opportunity_links = driver.find_elements(By.XPATH, "//a[contains(@href, 'opportunity')]")
+        sam_logger.info("Waiting for search results...")
+        target_link = _wait_for_any(driver, [
+            "//a[contains(@href, '/opp/')]",
+            "//a[contains(@href, 'opportunity')]"
+        ])
         
-        if not opportunity_links:
+        if not target_link:
             raise RuntimeError("No opportunity links found in search results. You may need to refine the search or check if you're on the right page.")
         
-        # Select the best matching link
-        target_link = opportunity_links[0]  # Take the first one
-        
-        print(f"[SAM] Found opportunity: {target_link.text.strip()}")
+        sam_logger.info(f"Found opportunity: {target_link.text.strip()}")
         
         # Click the link using JavaScript to avoid interception
+        enter_stage("open")
+        results_url = driver.current_url
         driver.execute_script("arguments[0].click();", target_link)
         
         # Wait for opportunity page to load
-        time.sleep(5)
+        _wait_for_url_change(driver, results_url)
+        _wait_for_network_idle(driver)
         
+        opp_load_ms = _page_load_ms(driver)
+
         # Extract links and attachments information
-        print("[SAM] Extracting links and attachments information...")
+        sam_logger.info("Extracting links and attachments information...")
         links_and_attachments = _extract_links_and_attachments_info(driver, wait)
         
+        # Download attachments first: straight over HTTP with the session's cookies
+        # (skipping ones the manifest shows unchanged), falling back to Download All
+        downloaded_attachments = []
+        attachment_downloads = []
+        enter_stage("attachments")
+        attachment_urls = [a.get("url") for a in links_and_attachments.get("attachments", [])]
+        if any(attachment_urls):
+            try:
+                sam_logger.info("Downloading attachments directly over HTTP...")
+                cookies, user_agent = _driver_cookies(driver)
+                attachment_downloads = download_attachments_direct(cookies, attachment_urls, staging_dir,
+                                                                   user_agent, manifest=manifest)
+                downloaded_attachments = [r["path"] for r in attachment_downloads
+                                          if r["ok"] and r["change"] != "unchanged"]
+            except Exception as e:
+                sam_logger.warning(f"Direct attachment download failed: {e}")
+        if not any(r["ok"] for r in attachment_downloads):
+            try:
+                sam_logger.info("Attempting to download additional attachments...")
+                downloaded_attachments = _download_attachments_on_page(driver, staging_dir, wait)
+            except Exception as e:
+                sam_logger.warning(f"Additional attachments download failed: {e}")
+
+        changed = [r for r in attachment_downloads if r.get("change") in ("new", "updated")]
+        known_pdf = _manifest_known(manifest.get("main_pdf"))
+        refresh_pdf = force or not known_pdf or bool(changed) or (downloaded_attachments and not attachment_downloads)
+        
         # Download main PDF
         main_pdf = None
-        try:
-            print("[SAM] Looking for download options...")
+        enter_stage("pdf")
+        if not refresh_pdf:
+            main_pdf = known_pdf["path"]
+            sam_logger.info(f"Main PDF unchanged: {main_pdf}")
+        else:
+            try:
+                sam_logger.info("Looking for download options...")
             
-            # Look for More/Actions menu with various selectors
-            more_selectors = [
-                "//button[contains(@aria-label, 'More')]",
-                "//button[contains(text(), 'More')]", 
-                "//button[contains(text(), '⋯')]",
-                "//button[contains(@aria-label, 'Actions')]",
-                "//button[contains(text(), 'Actions')]",
-                "//button[contains(@class, 'more')]",
-                "//*[contains(@role, 'button') and contains(., 'More')]"
-            ]
+                # Look for More/Actions menu with various selectors
+                more_selectors = [
+                    "//button[contains(@aria-label, 'More')]",
+                    "//button[contains(text(), 'More')]", 
+                    "//button[contains(text(), '⋯')]",
+                    "//button[contains(@aria-label, 'Actions')]",
+                    "//button[contains(text(), 'Actions')]",
+                    "//button[contains(@class, 'more')]",
+                    "//*[contains(@role, 'button') and contains(., 'More')]"
+                ]
             
-            more_button = None
-            for selector in more_selectors:
-                try:
-                    buttons = driver.find_elements(By.XPATH, selector)
-                    if buttons:
-                        more_button = buttons[0]
-                        print(f"[SAM] Found More button with selector: {selector}")
-                        break
-                except Exception:
-                    continue
+                more_button = _find_first(driver, more_selectors)
             
-            if more_button:
-                print("[SAM] Clicking More menu...")
-                driver.execute_script("arguments[0].click();", more_button)
-                time.sleep(2)
+                if more_button:
+                    sam_logger.info("Clicking More menu...")
+                    driver.execute_script("arguments[0].click();", more_button)
                 
-                # Look for Download option
-                download_selectors = [
-                    "//button[contains(text(), 'Download')]",
-                    "//a[contains(text(), 'Download')]",
-                    "//li[contains(text(), 'Download')]",
-                    "//*[contains(@role, 'menuitem') and contains(text(), 'Download')]"
-                ]
+                    # Look for Download option
+                    download_selectors = [
+                        "//button[contains(text(), 'Download')]",
+                        "//a[contains(text(), 'Download')]",
+                        "//li[contains(text(), 'Download')]",
+                        "//*[contains(@role, 'menuitem') and contains(text(), 'Download')]"
+                    ]
                 
-                download_button = None
-                for selector in download_selectors:
-                    try:
-                        buttons = driver.find_elements(By.XPATH, selector)
-                        if buttons:
-                            download_button = buttons[0]
-                            print(f"[SAM] Found Download button with selector: {selector}")
-                            break
-                    except Exception:
-                        continue
+                    download_button = _wait_for_any(driver, download_selectors, displayed=True)
                 
-                if download_button:
-                    print("[SAM] Clicking Download option...")
-                    driver.execute_script("arguments[0].click();", download_button)
-                    time.sleep(2)
-                    
-                    # Look for PDF option if available
-                    pdf_selectors = [
-                        "//input[@value='PDF']",
-                        "//button[contains(text(), 'PDF')]",
-                        "//label[contains(text(), 'PDF')]",
-                        "//*[contains(text(), 'PDF') and (@type='radio' or @role='radio')]"
-                    ]
+                    if download_button:
+                        sam_logger.info("Clicking Download option...")
+                        driver.execute_script("arguments[0].click();", download_button)
                     
-                    pdf_option = None
-                    for selector in pdf_selectors:
-                        try:
-                            options = driver.find_elements(By.XPATH, selector)
-                            if options:
-                                pdf_option = options[0]
-                                print(f"[SAM] Found PDF option with selector: {selector}")
-                                break
-                        except Exception:
-                            continue
+                        # Wait for the download dialog: a PDF format option and/or the submit button
+                        pdf_selectors = [
+                            "//input[@value='PDF']",
+                            "//button[contains(text(), 'PDF')]",
+                            "//label[contains(text(), 'PDF')]",
+                            "//*[contains(text(), 'PDF') and (@type='radio' or @role='radio')]"
+                        ]
+                        final_selectors = [
+                            "//button[@type='submit' and contains(text(), 'Download')]",
+                            "//button[contains(@class, 'btn') and contains(text(), 'Download')]",
+                            "//input[@type='submit' and contains(@value, 'Download')]",
+                            "//button[contains(text(), 'Submit')]"
+                        ]
+                        _wait_for_any(driver, pdf_selectors + final_selectors)
                     
-                    if pdf_option:
-                        print("[SAM] Selecting PDF option...")
-                        driver.execute_script("arguments[0].click();", pdf_option)
-                        time.sleep(1)
+                        pdf_option = _find_first(driver, pdf_selectors)
+                        if pdf_option:
+                            sam_logger.info("Selecting PDF option...")
+                            driver.execute_script("arguments[0].click();", pdf_option)
                     
-                    # Click final download/submit button
-                    final_selectors = [
-                        "//button[@type='submit' and contains(text(), 'Download')]",
-                        "//button[contains(@class, 'btn') and contains(text(), 'Download')]",
-                        "//input[@type='submit' and contains(@value, 'Download')]",
-                        "//button[contains(text(), 'Submit')]"
-                    ]
+                        # Click final download/submit button
+                        final_button = _wait_for_any(driver, final_selectors, displayed=True)
                     
-                    final_button = None
-                    for selector in final_selectors:
-                        try:
-                            buttons = driver.find_elements(By.XPATH, selector)
-                            if buttons:
-                                final_button = buttons[0]
-                                print(f"[SAM] Found final download button with selector: {selector}")
-                                break
-                        except Exception:
-                            continue
-                    
-                    if final_button:
-                        print("[SAM] Triggering final download...")
-                        driver.execute_script("arguments[0].click();", final_button)
-                        
-                        # Wait for download
-                        print("[SAM] Waiting for PDF download...")
-                        start_time = time.time()
-                        
-                        while time.time() - start_time < timeout_secs:
-                            time.sleep(2)
-                            
-                            if _has_temp_download(download_dir):
-                                continue
-                            
-                            newest_pdf = _newest_pdf(download_dir)
-                            if newest_pdf:
+                        if final_button:
+                            sam_logger.info("Triggering final download...")
+                            # Wait for the PDF this click produced, not whichever is newest
+                            sam_logger.info("Waiting for PDF download...")
+                            last_report = [0.0]
+
+                            def report_pdf_progress(progress):
+                                if progress and time.time() - last_report[0] >= 1.0:
+                                    last_report[0] = time.time()
+                                    _sam_progress(notice_id, "pdf", downloads=progress)
+
+                            with DownloadWatcher(staging_dir) as watcher:
+                                driver.execute_script("arguments[0].click();", final_button)
+                                pdfs = watcher.wait_for_files(
+                                    timeout=timeout_secs,
+                                    match=lambda name: name.lower().endswith(".pdf"),
+                                    on_progress=report_pdf_progress,
+                                )
+
+                            if pdfs:
+                                newest_pdf = pdfs[0]
                                 # Rename to standard format
                                 try:
-                                    new_name = os.path.join(download_dir, f"SAM_{notice_id}.pdf")
+                                    new_name = os.path.join(staging_dir, f"SAM_{notice_id}.pdf")
                                     if os.path.abspath(newest_pdf) != os.path.abspath(new_name):
                                         shutil.move(newest_pdf, new_name)
                                         newest_pdf = new_name
                                 except Exception as e:
-                                    print(f"[SAM] Could not rename PDF: {e}")
-                                
+                                    sam_logger.warning(f"Could not rename PDF: {e}")
+                            
                                 main_pdf = newest_pdf
-                                print(f"[SAM] Downloaded PDF: {main_pdf}")
-                                break
+                                sam_logger.info(f"Downloaded PDF: {main_pdf}")
                         
-                        if not main_pdf:
-                            print("[SAM] PDF download timed out or failed")
+                            if not main_pdf:
+                                sam_logger.warning("PDF download timed out or failed")
+                        else:
+                            sam_logger.warning("Could not find final download button")
                     else:
-                        print("[SAM] Could not find final download button")
+                        sam_logger.warning("Could not find Download option in menu")
                 else:
-                    print("[SAM] Could not find Download option in menu")
-            else:
-                print("[SAM] Could not find More/Actions menu")
+                    sam_logger.warning("Could not find More/Actions menu")
                 
-        except Exception as e:
-            print(f"[SAM] PDF download failed: {e}")
-        
-        # Download additional attachments
-        downloaded_attachments = []
-        try:
-            print("[SAM] Attempting to download additional attachments...")
-            downloaded_attachments = _download_attachments_on_page(driver, download_dir, wait)
-        except Exception as e:
-            print(f"[SAM] Additional attachments download failed: {e}")
+            except Exception as e:
+                sam_logger.warning(f"PDF download failed: {e}")
         
-        print(f"[SAM] Automation completed!")
-        print(f"[SAM] Main PDF: {main_pdf}")
-        print(f"[SAM] Additional files: {len(downloaded_attachments)}")
-        print(f"[SAM] Links found: {len(links_and_attachments.get('links', []))}")
-        print(f"[SAM] Attachments detected: {len(links_and_attachments.get('attachments', []))}")
+        # Move everything this session downloaded into the contract folder
+        moved = _collect_session_downloads(staging_dir, download_dir)
+        main_pdf = moved.get(main_pdf, main_pdf)
+        downloaded_attachments = [moved.get(f, f) for f in downloaded_attachments]
+        for record in attachment_downloads:
+            if record.get("path"):
+                record["path"] = moved.get(record["path"], record["path"])
+        store_downloads(main_pdf if refresh_pdf else None, downloaded_attachments, attachment_downloads)
+        manifest = _update_manifest(download_dir, manifest, notice_id, main_pdf, attachment_downloads)
+        changed_files = [os.path.basename(r["path"]) for r in changed]
+        if refresh_pdf and main_pdf:
+            changed_files.insert(0, os.path.basename(main_pdf))
+        timings = _stage_durations(marks, time.monotonic())
+
+        sam_logger.info(
+            f"Automation completed for {notice_id}: main PDF {main_pdf}, "
+            f"{len(downloaded_attachments)} additional files, "
+            f"{len(links_and_attachments.get('links', []))} links, "
+            f"{len(links_and_attachments.get('attachments', []))} attachments detected, "
+            f"changed: {changed_files or 'none'}, stage timings (s): {timings}",
+            extra={"notice_id": notice_id, "changed_files": changed_files, "timings": timings}
+        )
         
         return {
             "pdf": main_pdf,
             "attachments": downloaded_attachments,
             "links_info": links_and_attachments.get("links", []),
-            "attachments_info": links_and_attachments.get("attachments", [])
+            "attachments_info": links_and_attachments.get("attachments", []),
+            "attachment_downloads": attachment_downloads,
+            "changed_files": changed_files,
+            "unchanged": sum(1 for r in attachment_downloads if r.get("change") == "unchanged"),
+            "timings": timings,
+            "browser": {
+                "mode": browser["mode"],
+                "page_load_ms": opp_load_ms,
+                "rss_mb": _browser_rss_mb(driver)
+            }
         }
         
+    except SamLoginRequired as e:
+        sam_logger.warning(f"{e}; retrying with a visible browser so you can sign in")
+        retry_visible = True
     except Exception as e:
-        print(f"[SAM] Automation error: {e}")
-        # Don't quit the driver on error - keep session alive for next attempt
+        sam_logger.error(f"Automation error: {e}")
+        # Keep the session alive for the next attempt; repeated failures recycle it
+        failed = True
         raise e
 
+    finally:
+        _release_browser_session(browser, failed=failed)
+
+    if retry_visible:
+        return _sam_download_with_persistent_session(notice_id, job_title, download_dir,
+                                                     timeout_secs, force, mode="visible")
+
+
+def _cleanup_persistent_session():
+    """Close every idle pooled browser session; leased ones close when released."""
+    for browser in list(_browser_sessions):
+        if browser["leased"]:
+            browser["retire"] = True
+        else:
+            _close_browser_session(browser)
+    sam_logger.info("Browser session pool cleaned up")
+
+
+# ====================== BROWSER POOL WARMER ======================
+# Opt-in: launch every pool slot at startup and keep them hot so user-triggered
+# jobs never pay for browser launch, profile load or an expired session.
+SAM_PREWARM = os.environ.get('SAM_PREWARM', '0').lower() in ('1', 'true', 'yes')
+SAM_KEEPALIVE_SECS = int(os.environ.get('SAM_KEEPALIVE_SECS', '120'))
+SAM_KEEPALIVE_MARGIN = 600  # relaunch this long before a session would expire
+
+_browser_keepalive = None
+_browser_keepalive_lock = threading.Lock()
+
+
+def _session_expiring(browser: dict) -> bool:
+    """True when a running session will hit its age or idle limit within the margin."""
+    now = time.time()
+    if now - browser["started"] > _max_session_age - SAM_KEEPALIVE_MARGIN:
+        return True
+    return bool(browser["last_used"]) and now - browser["last_used"] > _session_timeout - SAM_KEEPALIVE_MARGIN
+
+
+def _keep_session_warm(browser: dict):
+    """Launch, refresh or recycle one idle session so it is ready for the next lease."""
+    mode = _resolve_browser_mode()
+    if not _browser_session_healthy(browser) or _session_expiring(browser) or browser["mode"] != mode:
+        _launch_browser_session(browser, mode)
+        sam_logger.info(f"Warmed Edge session {browser['slot']} ({mode})")
+        return
+    # Touch SAM.gov so its server-side session does not lapse between jobs
+    driver = browser["driver"]
+    if SAM_HOST not in driver.current_url.lower():
+        driver.get(f"{SAM_BASE_URL}/")
+    else:
+        driver.refresh()
+    _wait_for_page_ready(driver)
+    browser["last_used"] = time.time()
+    signed_in = _probe_sam_login(driver)
+    if signed_in:
+        browser["login_verified"] = time.time()
+        _save_sam_cookies(driver)
+    elif signed_in is False:
+        browser["login_verified"] = None
+    # None: the page was still loading; keep the previous verification
+
+
+def _warm_browser_pool():
+    """One keepalive pass over every idle session; leased sessions are left alone."""
+    _init_browser_pool()
+    for _ in range(len(_browser_sessions)):
+        try:
+            browser = _idle_browser_sessions.get_nowait()
+        except queue.Empty:
+            return
+        browser["leased"] = True
+        try:
+            _keep_session_warm(browser)
+        except Exception as e:
+            sam_logger.warning(f"Keepalive failed for session {browser['slot']}: {e}")
+            _close_browser_session(browser)
+        finally:
+            if browser["retire"]:
+                _close_browser_session(browser)
+            browser["leased"] = False
+            _idle_browser_sessions.put(browser)
+
+
+def _browser_keepalive_loop():
+    """Warm the pool immediately, then re-check it every SAM_KEEPALIVE_SECS."""
+    while True:
+        _warm_browser_pool()
+        time.sleep(SAM_KEEPALIVE_SECS)
+
+
+def _start_browser_keepalive():
+    """Start the warmer thread once, when SAM_PREWARM is enabled."""
+    global _browser_keepalive
+    if not (SAM_PREWARM and _SELENIUM_AVAILABLE):
+        return
+    with _browser_keepalive_lock:
+        if _browser_keepalive is not None:
+            return
+        _browser_keepalive = threading.Thread(target=_browser_keepalive_loop, name="sam-keepalive", daemon=True)
+        _browser_keepalive.start()
+    sam_logger.info(f"Pre-warming {SAM_POOL_SIZE} browser session(s); keepalive every {SAM_KEEPALIVE_SECS}s")
+
+
+# ====================== OPPORTUNITY METADATA CACHE ======================
+# Scraped links/attachments per Notice ID. An entry stays valid for the TTL and
+# only while the dataset's "Last Modified Date" for the notice is unchanged.
+OPPORTUNITY_CACHE_FILE = os.path.join(DATA_DIR, "opportunity_cache.json")
+OPPORTUNITY_CACHE_TTL = int(os.environ.get('OPPORTUNITY_CACHE_TTL_HOURS', '24')) * 3600
+
+_opportunity_cache_lock = threading.Lock()
+_opportunity_cache = None
+
+
+def _notice_last_modified(row) -> str:
+    """The notice's Last Modified Date from a dataset row ('' when unknown)."""
+    if not row:
+        return ""
+    for key in ["Last Modified Date", "Last Modified", "Modified Date", "Last Updated"]:
+        if key in row and str(row[key]).strip() and str(row[key]).strip().lower() != "nan":
+            return str(row[key]).strip()
+    return ""
+
+
+def _load_opportunity_cache() -> dict:
+    """Return the in-memory cache, reading it from disk on first use."""
+    global _opportunity_cache
+    if _opportunity_cache is None:
+        _opportunity_cache = {}
+        if os.path.exists(OPPORTUNITY_CACHE_FILE):
+            try:
+                with open(OPPORTUNITY_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    _opportunity_cache = json.load(f)
+            except Exception as e:
+                sam_logger.error(f"Error reading opportunity cache: {e}")
+    return _opportunity_cache
+
+
+def get_cached_opportunity(notice_id: str, last_modified: str) -> dict | None:
+    """Cached metadata for a notice, or None when missing, expired or the notice changed."""
+    with _opportunity_cache_lock:
+        entry = _load_opportunity_cache().get(notice_id)
+    if not entry or entry.get("last_modified") != last_modified:
+        return None
+    try:
+        age = (datetime.now() - datetime.fromisoformat(entry["scraped"])).total_seconds()
+    except (KeyError, ValueError):
+        return None
+    return entry if age < OPPORTUNITY_CACHE_TTL else None
+
+
+def _notice_changed(notice_id: str, last_modified: str) -> bool:
+    """True when the dataset's Last Modified Date differs from the one last scraped."""
+    with _opportunity_cache_lock:
+        entry = _load_opportunity_cache().get(notice_id)
+    return bool(entry) and entry.get("last_modified") != last_modified
+
+
+def cache_opportunity(notice_id: str, last_modified: str, result: dict):
+    """Remember what a finished SAM job scraped and downloaded for a notice."""
+    entry = {
+        "last_modified": last_modified,
+        "scraped": datetime.now().isoformat(),
+        "pdf": result.get("pdf"),
+        "attachments": result.get("attachments", []),
+        "links_info": result.get("links_info", []),
+        "attachments_info": result.get("attachments_info", [])
+    }
+    with _opportunity_cache_lock:
+        cache = _load_opportunity_cache()
+        cache[notice_id] = entry
+        try:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            tmp = OPPORTUNITY_CACHE_FILE + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp, OPPORTUNITY_CACHE_FILE)
+        except Exception as e:
+            sam_logger.warning(f"Could not write opportunity cache: {e}")
+
+
+# ====================== DOCUMENT TEXT INDEX ======================
+# Text pulled out of downloaded contract documents, stored once per file hash
+# (data/doc_text/<sha>.txt). The index maps each notice to its files so
+# My Solicitations search can match inside solicitation documents.
+DOC_TEXT_DIR = os.path.join(DATA_DIR, "doc_text")
+DOC_INDEX_FILE = os.path.join(DATA_DIR, "doc_index.json")
+DOC_EXTRACT_WORKERS = int(os.environ.get('DOC_EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+DOC_TEXT_CACHE_SIZE = int(os.environ.get('DOC_TEXT_CACHE_SIZE', '64'))
+DOC_SNIPPETS_PER_FILE = 3
+DOC_SNIPPET_RADIUS = 80
+
+_doc_index_lock = threading.Lock()
+_doc_index = None  # {"files": {sha: {...}}, "notices": {notice_id: [{name, path, sha256}]}}
+_doc_texts = OrderedDict()  # sha -> (text, lowercased text), LRU of DOC_TEXT_CACHE_SIZE for snippets
+_doc_texts_lock = threading.Lock()
+_doc_tokens = None  # word token -> set of shas whose text contains it, built on first search
+_doc_terms = []     # sorted _doc_tokens keys for prefix lookups, re-sorted when new terms arrive
+_doc_terms_stale = True
+_doc_pending = set()
+_doc_pool = None
+
+
+def _load_doc_index() -> dict:
+    """Return the in-memory document index, reading it from disk on first use."""
+    global _doc_index
+    if _doc_index is None:
+        _doc_index = {"files": {}, "notices": {}}
+        if os.path.exists(DOC_INDEX_FILE):
+            try:
+                with open(DOC_INDEX_FILE, 'r', encoding='utf-8') as f:
+                    _doc_index = json.load(f)
+            except Exception as e:
+                docs_logger.error(f"Error reading document index: {e}")
+    return _doc_index
+
+
+def _persist_doc_index():
+    """Write the document index atomically (caller holds _doc_index_lock)."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = DOC_INDEX_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(_doc_index, f, indent=2)
+    os.replace(tmp, DOC_INDEX_FILE)
+
+
+def _get_doc_pool() -> ProcessPoolExecutor:
+    """Process pool for extraction, so PDF parsing never blocks request threads on the GIL."""
+    global _doc_pool
+    if _doc_pool is None:
+        # Workers run doc_extract.extract_document_text, which does not import the app
+        _doc_pool = ProcessPoolExecutor(max_workers=max(1, DOC_EXTRACT_WORKERS))
+    return _doc_pool
+
+
+def _doc_extracted(sha256: str, name: str, future):
+    """Store the text of a finished extraction and record it in the index."""
+    try:
+        text = future.result()
+        os.makedirs(DOC_TEXT_DIR, exist_ok=True)
+        with open(os.path.join(DOC_TEXT_DIR, f"{sha256}.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+        record = {"chars": len(text), "extracted": datetime.now().isoformat(), "error": None}
+        _cache_doc_text(sha256, text)
+        tokens = tokenize(text)
+        docs_logger.info(f"Indexed {name} ({len(text)} chars)")
+    except Exception as e:
+        record = {"chars": 0, "extracted": datetime.now().isoformat(), "error": str(e)}
+        tokens = ()
+        docs_logger.warning(f"Could not extract text from {name}: {e}")
+    with _doc_index_lock:
+        _doc_pending.discard(sha256)
+        _load_doc_index()["files"][sha256] = record
+        _persist_doc_index()
+        if _doc_tokens is not None:
+            _add_doc_tokens(sha256, tokens)
+
+
+def index_contract_folder(notice_id: str, folder: str) -> int:
+    """
+    Register a notice's documents and queue extraction for content not seen yet.
+
+    Hashes come from the folder's sync manifest when it has them. Files whose
+    hash is already indexed (the same clause in another notice, or an
+    unchanged re-download) are not extracted again. Returns how many
+    extractions were queued.
+    """
+    manifest = _load_manifest(folder)
+    known = {e.get("path"): e.get("sha256") for e in manifest.get("attachments", {}).values()}
+    if manifest.get("main_pdf"):
+        known[manifest["main_pdf"].get("path")] = manifest["main_pdf"].get("sha256")
+
+    files = []
+    try:
+        with os.scandir(folder) as it:
+            entries = [e for e in it if e.is_file() and e.name.lower().endswith(DOC_TEXT_EXTENSIONS)]
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            sha256 = known.get(entry.path) or _file_sha256(entry.path)
+        except OSError:
+            continue
+        files.append({"name": entry.name, "path": entry.path, "sha256": sha256})
+
+    queued = []
+    with _doc_index_lock:
+        index = _load_doc_index()
+        index["notices"][notice_id] = files
+        for f in files:
+            if f["sha256"] not in index["files"] and f["sha256"] not in _doc_pending:
+                _doc_pending.add(f["sha256"])
+                queued.append(f)
+        _persist_doc_index()
+
+    for f in queued:
+        future = _get_doc_pool().submit(extract_document_text, f["path"])
+        future.add_done_callback(lambda fut, sha=f["sha256"], name=f["name"]: _doc_extracted(sha, name, fut))
+    return len(queued)
+
+
+def _contract_folders():
+    """Yield (notice_id, folder) for every contract folder that can be tied to a notice."""
+    try:
+        with os.scandir(CONTRACTS_BASE) as it:
+            entries = [e for e in it if e.is_dir() and not e.name.startswith(".")]
+    except OSError:
+        return
+    for entry in entries:
+        notice_id = _load_manifest(entry.path).get("notice_id")
+        if not notice_id and " - " in entry.name:
+            notice_id = entry.name.split(" - ", 1)[0].strip()
+        if notice_id:
+            yield notice_id, entry.path
+
+
+def _read_doc_text(sha256: str) -> str:
+    """Stored extracted text for a hash ('' when missing)."""
+    try:
+        with open(os.path.join(DOC_TEXT_DIR, f"{sha256}.txt"), 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _cache_doc_text(sha256: str, text: str) -> tuple[str, str]:
+    """Keep (text, lowercased text) in the LRU, evicting the least recently used."""
+    texts = (text, text.lower())
+    with _doc_texts_lock:
+        _doc_texts[sha256] = texts
+        _doc_texts.move_to_end(sha256)
+        while len(_doc_texts) > max(1, DOC_TEXT_CACHE_SIZE):
+            _doc_texts.popitem(last=False)
+    return texts
+
+
+def _doc_text(sha256: str) -> tuple[str, str]:
+    """(text, lowercased text) for a hash, through the LRU."""
+    with _doc_texts_lock:
+        texts = _doc_texts.get(sha256)
+        if texts is not None:
+            _doc_texts.move_to_end(sha256)
+            return texts
+    return _cache_doc_text(sha256, _read_doc_text(sha256))
+
+
+def _add_doc_tokens(sha256: str, tokens):
+    """Add one document to the inverted index (caller holds _doc_index_lock)."""
+    global _doc_terms_stale
+    for token in tokens:
+        shas = _doc_tokens.get(token)
+        if shas is None:
+            shas = _doc_tokens[token] = set()
+            _doc_terms_stale = True
+        shas.add(sha256)
+
+
+def _load_doc_tokens():
+    """Build the inverted index from the stored texts on first search (caller holds _doc_index_lock).
+
+    Afterwards it is kept current by _doc_extracted as documents are indexed.
+    """
+    global _doc_tokens
+    if _doc_tokens is None:
+        _doc_tokens = {}
+        for sha256, rec in _load_doc_index()["files"].items():
+            if not rec.get("error"):
+                _add_doc_tokens(sha256, tokenize(_read_doc_text(sha256)))
+        docs_logger.info(f"Built document search index: {len(_doc_tokens)} terms")
+    return _doc_tokens
+
+
+def _candidate_docs(kw: str, indexed: set) -> set:
+    """Hashes that may contain the keyword, from the inverted index.
+
+    Each word of the keyword is looked up as an exact term. A word that is
+    not a term is treated as a partial word: first as a prefix ("cyber" ->
+    "cybersecurity") through the sorted term list, and only when nothing
+    starts with it by scanning the terms for it. Candidates still get a
+    substring check against the text.
+    """
+    global _doc_terms, _doc_terms_stale
+    words = tokenize(kw)
+    if not words:
+        return indexed
+    candidates = None
+    with _doc_index_lock:
+        tokens = _load_doc_tokens()
+        for word in words:
+            matches = tokens.get(word)
+            if matches is None:
+                if _doc_terms_stale:
+                    _doc_terms = sorted(tokens)
+                    _doc_terms_stale = False
+                start = bisect.bisect_left(_doc_terms, word)
+                end = bisect.bisect_left(_doc_terms, word + "\uffff", start)
+                partial = _doc_terms[start:end] or [term for term in _doc_terms if word in term]
+                matches = set().union(*(tokens[term] for term in partial))
+            candidates = set(matches) if candidates is None else candidates & matches
+            if not candidates:
+                break
+    return candidates & indexed
+
+
+def _snippets(text: str, lower: str, kw: str) -> list[str]:
+    """Up to DOC_SNIPPETS_PER_FILE whitespace-normalised excerpts around the keyword."""
+    out = []
+    start = lower.find(kw)
+    while start != -1 and len(out) < DOC_SNIPPETS_PER_FILE:
+        lo = max(0, start - DOC_SNIPPET_RADIUS)
+        hi = min(len(text), start + len(kw) + DOC_SNIPPET_RADIUS)
+        excerpt = " ".join(text[lo:hi].split())
+        out.append(("…" if lo else "") + excerpt + ("…" if hi < len(text) else ""))
+        start = lower.find(kw, hi)
+    return out
+
+
+def search_documents(keyword: str, notice_ids=None) -> dict:
+    """Full-text search of indexed documents: {notice_id: [{file, snippets}]}."""
+    kw = (keyword or "").strip().lower()
+    if not kw:
+        return {}
+    with _doc_index_lock:
+        index = _load_doc_index()
+        notices = {nid: list(files) for nid, files in index["notices"].items()
+                   if notice_ids is None or nid in notice_ids}
+        indexed = {sha for sha, rec in index["files"].items() if not rec.get("error")}
+
+    candidates = _candidate_docs(kw, indexed)
+    results = {}
+    for notice_id, files in notices.items():
+        hits = []
+        for f in files:
+            if f["sha256"] not in candidates:
+                continue
+            text, lower = _doc_text(f["sha256"])
+            if kw in lower:
+                hits.append({"file": f["name"], "path": f["path"], "snippets": _snippets(text, lower, kw)})
+        if hits:
+            results[notice_id] = hits
+    return results
+
+
+# ====================== FOLDER LISTING CACHE ======================
+# My Solicitations asks for the files of every row's folder on each page view.
+# Listings are cached per folder and reused until the directory's mtime changes
+# (a file added, removed or renamed), so a repeat view costs one stat per folder
+# instead of an isfile + getsize per file.
+#
+# Folders live under two roots: the app's Contracts directory (created from My
+# Solicitations) and CONTRACTS_BASE (filled by the SAM automation, with sync
+# manifests). Both are listed and served; the local one wins on a name clash.
+LOCAL_CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "Contracts")
+CONTRACT_FILE_ROOTS = (LOCAL_CONTRACTS_DIR, CONTRACTS_BASE)
+
+_folder_listing_cache = {}  # folder path -> (dir mtime_ns, value)
+_folder_listing_lock = threading.Lock()
+
+
+def _format_file_size(size: int) -> str:
+    """Human-readable size for file links."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _cached_scandir(path: str, build):
+    """build(entries) for a directory, cached until its mtime changes; None if it is missing."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        with _folder_listing_lock:
+            _folder_listing_cache.pop(path, None)
+        return None
+
+    with _folder_listing_lock:
+        cached = _folder_listing_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with os.scandir(path) as it:
+            value = build(it)
+    except OSError as e:
+        logger.error(f"Error reading folder contents: {e}")
+        return None
+
+    with _folder_listing_lock:
+        _folder_listing_cache[path] = (mtime, value)
+    return value
+
+
+def _contract_folder_names() -> dict:
+    """{folder name: root} for the opportunity folders under every contract root."""
+    def build(entries):
+        return {e.name for e in entries if e.is_dir() and not e.name.startswith(".")}
+    names = {}
+    for root in CONTRACT_FILE_ROOTS:
+        for name in _cached_scandir(root, build) or ():
+            names.setdefault(name, root)
+    return names
+
+
+def _contract_folder_path(folder_name: str) -> str:
+    """Absolute path of a folder name returned by _resolve_local_folder."""
+    return os.path.join(_contract_folder_names().get(folder_name, LOCAL_CONTRACTS_DIR), folder_name)
+
+
+def _resolve_local_folder(title: str = "", notice_id: str = "") -> str:
+    """Folder name for a row: its sanitized title, else a "<Notice ID> - ..." folder."""
+    names = _contract_folder_names()
+    if title:
+        name = _sanitize_folder_name(title)
+        if name in names or not notice_id:
+            return name
+    prefix = _sanitize_folder_name(notice_id) + " - "
+    for name in sorted(names):
+        if name.startswith(prefix):
+            return name
+    return _sanitize_folder_name(title or notice_id)
+
+
+def list_folder_files(folder_name: str) -> dict:
+    """File listing of one contract folder, as /get-folder-files returns it."""
+    folder_path = _contract_folder_path(folder_name)
+
+    def build(entries):
+        files = []
+        for entry in entries:
+            try:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append({
+                "name": entry.name,
+                "size": _format_file_size(st.st_size),
+                # Relative to the Contracts directory, with forward slashes for web URLs
+                "path": f"{folder_name}/{entry.name}",
+                "version": _file_version(entry.path, st)
+            })
+        files.sort(key=lambda x: x['name'].lower())
+        return files
+
+    files = _cached_scandir(folder_path, build)
+    return {
+        "ok": True,
+        "files": files or [],
+        "folder_path": folder_path,
+        "folder_exists": files is not None
+    }
+
+
+# ====================== CONTRACT FILE SERVING ======================
+# /open-file supports Range requests and ETag / Last-Modified revalidation (304).
+# Links carry a ?v=<version> (the file's SHA-256 from the folder manifest, or
+# size+mtime) so a versioned URL can be cached for a year; a bare URL is always
+# revalidated.
+#
+# OPEN_FILE_ACCEL hands the transfer to a fronting web server instead of Python:
+#   "nginx"    -> X-Accel-Redirect: <prefix> + <relative path>, using
+#                 OPEN_FILE_ACCEL_PREFIX for the app's Contracts directory and
+#                 OPEN_FILE_ACCEL_SAM_PREFIX for CONTRACTS_BASE (each an
+#                 `internal` location aliased to that directory)
+#   "sendfile" -> X-Sendfile: <absolute path> (Apache mod_xsendfile, lighttpd)
+OPEN_FILE_ACCEL = os.environ.get('OPEN_FILE_ACCEL', '').lower()
+OPEN_FILE_ACCEL_PREFIX = '/' + os.environ.get('OPEN_FILE_ACCEL_PREFIX', '/protected-contracts/').strip('/') + '/'
+OPEN_FILE_ACCEL_SAM_PREFIX = '/' + os.environ.get('OPEN_FILE_ACCEL_SAM_PREFIX', '/protected-sam-contracts/').strip('/') + '/'
+OPEN_FILE_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+OPEN_FILE_EXTS = {'.pdf', '.doc', '.docx', '.xlsx', '.xls', '.txt', '.zip'}
+
+
+def _manifest_hashes(folder: str) -> dict:
+    """{(file name, size): sha256} from a folder's sync manifest, cached until the manifest changes."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    with _folder_listing_lock:
+        cached = _folder_listing_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    manifest = _load_manifest(folder)
+    entries = list((manifest.get("attachments") or {}).values())
+    if manifest.get("main_pdf"):
+        entries.append(manifest["main_pdf"])
+    hashes = {
+        (os.path.basename(e["path"]), e.get("size")): e["sha256"]
+        for e in entries if e.get("path") and e.get("sha256")
+    }
+    with _folder_listing_lock:
+        _folder_listing_cache[path] = (mtime, hashes)
+    return hashes
+
+
+def _file_version(path: str, st: os.stat_result) -> str:
+    """Cache-busting version of a file: its content hash when known, else size and mtime."""
+    folder, name = os.path.split(path)
+    return _manifest_hashes(folder).get((name, st.st_size)) or f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+def _accel_file_response(abs_path: str, rel_path: str, root: str) -> Response:
+    """Empty response telling the fronting web server which file to send."""
+    mimetype = mimetypes.guess_type(abs_path)[0] or 'application/octet-stream'
+    resp = Response(mimetype=mimetype)
+    if OPEN_FILE_ACCEL == 'nginx':
+        prefix = OPEN_FILE_ACCEL_PREFIX if root == LOCAL_CONTRACTS_DIR else OPEN_FILE_ACCEL_SAM_PREFIX
+        resp.headers['X-Accel-Redirect'] = prefix + quote(rel_path.replace(os.sep, '/'))
+    else:
+        resp.headers['X-Sendfile'] = abs_path
+    return resp
+
+
+def send_contract_file(abs_path: str, rel_path: str, root: str = LOCAL_CONTRACTS_DIR) -> Response:
+    """Serve a file from a contract root with range, conditional GET and cache headers."""
+    st = os.stat(abs_path)
+    version = _file_version(abs_path, st)
+    etag = version if len(version) == 64 else None  # content hash -> strong ETag
+
+    if OPEN_FILE_ACCEL in ('nginx', 'sendfile'):
+        resp = _accel_file_response(abs_path, rel_path, root)
+        resp.set_etag(etag or version)
+        resp.last_modified = datetime.fromtimestamp(st.st_mtime)
+    else:
+        resp = send_file(abs_path, conditional=True, etag=etag or True, last_modified=st.st_mtime)
+
+    resp.cache_control.public = False
+    resp.cache_control.private = True
+    if request.args.get('v') == version:
+        resp.cache_control.no_cache = None
+        resp.cache_control.max_age = OPEN_FILE_IMMUTABLE_MAX_AGE
+        resp.cache_control.immutable = True
+    else:
+        resp.cache_control.max_age = None
+        resp.cache_control.no_cache = True
+
+    if OPEN_FILE_ACCEL in ('nginx', 'sendfile'):
+        # Let the web server handle ranges; a matching validator is answered here
+        resp = resp.make_conditional(request)
+    return resp
+
+
+# ====================== CONTRACT FOLDER ZIP ======================
+# Contract folders are streamed as a ZIP built on the fly. zipfile writes into a
+# small sink that is drained after every chunk, so nothing is staged on disk,
+# memory stays around one chunk and the first bytes go out immediately.
+# Formats that are already compressed are stored rather than deflated again.
+ZIP_STORED_EXTS = {'.pdf', '.zip', '.xlsx', '.xlsm', '.docx', '.pptx', '.7z', '.gz', '.rar',
+                   '.png', '.jpg', '.jpeg', '.gif'}
+
+
+class _ZipStreamBuffer:
+    """Write-only, unseekable sink for zipfile; drain() returns what was written since the last call."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_folder_entries(folder: str):
+    """Yield (path, relative path) for the files of a contract folder, skipping dotfiles and partial downloads."""
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or _is_temp_download(name):
+                continue
+            path = os.path.join(root, name)
+            yield path, os.path.relpath(path, folder).replace(os.sep, "/")
+
+
+def stream_contract_zip(folders: list[str]):
+    """Generate a ZIP of the given folders chunk by chunk; each folder becomes a top-level directory."""
+    sink = _ZipStreamBuffer()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for folder in folders:
+            base = os.path.basename(folder.rstrip(os.sep))
+            for path, rel in _zip_folder_entries(folder):
+                try:
+                    src = open(path, "rb")
+                    info = zipfile.ZipInfo.from_file(path, f"{base}/{rel}", strict_timestamps=False)
+                except OSError as e:
+                    sam_logger.warning(f"Skipping {path} in ZIP: {e}")
+                    continue
+                ext = os.path.splitext(path)[1].lower()
+                info.compress_type = zipfile.ZIP_STORED if ext in ZIP_STORED_EXTS else zipfile.ZIP_DEFLATED
+                with src, zf.open(info, "w") as dst:
+                    for chunk in iter(lambda: src.read(ATTACHMENT_CHUNK_SIZE), b""):
+                        dst.write(chunk)
+                        yield sink.drain()
+                # Data descriptor of the entry (and the header of an empty file)
+                yield sink.drain()
+    # Central directory
+    yield sink.drain()
+
+
+def _zip_folders_for(notice_ids: list[str], titles: list[str]) -> list[str]:
+    """Existing contract folders for Notice IDs (SAM download and local folder) and titles (local folder)."""
+    sam_folders = {}
+    if notice_ids:
+        for notice_id, folder in _contract_folders():
+            sam_folders.setdefault(notice_id, folder)
+
+    candidates = []
+    for notice_id in notice_ids:
+        candidates.append(sam_folders.get(notice_id))
+        candidates.append(_contract_folder_path(_resolve_local_folder("", notice_id)))
+    for title in titles:
+        candidates.append(_contract_folder_path(_resolve_local_folder(title)))
+
+    folders, seen = [], set()
+    for folder in candidates:
+        if folder and os.path.isdir(folder) and os.path.realpath(folder) not in seen:
+            seen.add(os.path.realpath(folder))
+            folders.append(folder)
+    return folders
+
+
+# ====================== SAM JOB QUEUE ======================
+SAM_JOBS_FILE = os.path.join(DATA_DIR, "sam_jobs.json")
+SAM_WORKERS = int(os.environ.get('SAM_WORKERS', str(SAM_POOL_SIZE)))
+SAM_JOBS_KEPT = 200
+
+_sam_jobs_lock = threading.Lock()
+_sam_jobs = None  # job_id -> job record, loaded lazily from SAM_JOBS_FILE
+_sam_job_queue = queue.Queue()
+_sam_job_local = threading.local()
+_sam_workers = []
+
+
+def _load_sam_jobs() -> dict:
+    """Return the in-memory job table, reading it from disk on first use."""
+    global _sam_jobs
+    if _sam_jobs is None:
+        _sam_jobs = {}
+        if os.path.exists(SAM_JOBS_FILE):
+            try:
+                with open(SAM_JOBS_FILE, 'r', encoding='utf-8') as f:
+                    _sam_jobs = json.load(f)
+            except Exception as e:
+                sam_logger.error(f"Error reading jobs file: {e}")
+    return _sam_jobs
+
+
+def _persist_sam_jobs():
+    """Write the job table atomically, keeping only the most recent finished jobs."""
+    finished = sorted(
+        (j for j in _sam_jobs.values() if j["status"] in ("done", "failed")),
+        key=lambda j: j["created"]
+    )
+    for job in finished[:-SAM_JOBS_KEPT]:
+        _sam_jobs.pop(job["id"], None)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = SAM_JOBS_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(_sam_jobs, f, indent=2, default=str)
+    os.replace(tmp, SAM_JOBS_FILE)
+
+
+def _update_sam_job(job_id: str, stage_times: dict | None = None, **fields) -> dict | None:
+    """Update one job record; the table is only written to disk on a status change.
+
+    Stage changes stay in memory (clients follow them over SSE) and are saved
+    with the job's next status transition.
+    """
+    with _sam_jobs_lock:
+        job = _load_sam_jobs().get(job_id)
+        if job is None:
+            return None
+        status_changed = "status" in fields and fields["status"] != job.get("status")
+        job.update(fields)
+        if stage_times:
+            job.setdefault("stages", {}).update(stage_times)
+        if status_changed:
+            _persist_sam_jobs()
+        return dict(job)
+
+
+def enqueue_sam_job(notice_id: str, job_title: str, folder: str, batch_id: str | None = None,
+                    force: bool = False, mode: str | None = None, last_modified: str = "") -> dict:
+    """Queue a SAM download for a notice, reusing a job already queued or running for it."""
+    _ensure_sam_workers()
+    with _sam_jobs_lock:
+        jobs = _load_sam_jobs()
+        for job in jobs.values():
+            if job["notice_id"] == notice_id and job["status"] in ("queued", "running"):
+                return dict(job)
+
+        job = {
+            "id": secrets.token_hex(8),
+            "notice_id": notice_id,
+            "job_title": job_title,
+            "folder": folder,
+            "batch_id": batch_id,
+            "force": force,
+            "browser_mode": mode,
+            "last_modified": last_modified,
+            "status": "queued",
+            "stage": "queued",
+            "stages": {},
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "message": None
+        }
+        jobs[job["id"]] = job
+        _persist_sam_jobs()
+
+    _sam_job_queue.put(job["id"])
+    publish_event("sam", {"notice_id": notice_id, "job_id": job["id"], "stage": "queued"})
+    return dict(job)
+
+
+def _run_sam_job(job_id: str):
+    """Run one queued SAM job on the calling worker thread."""
+    with _sam_jobs_lock:
+        job = dict(_load_sam_jobs().get(job_id) or {})
+    if not job or job["status"] not in ("queued", "running"):
+        return
+
+    notice_id, folder = job["notice_id"], job["folder"]
+    _update_sam_job(job_id, status="running", started=datetime.now().isoformat())
+    _sam_job_local.job_id = job_id
+    _sam_job_local.stage = None
+    try:
+        _sam_progress(notice_id, "started", folder=folder)
+        result = _sam_download_with_persistent_session(notice_id, job["job_title"], folder,
+                                                       force=job.get("force", False),
+                                                       mode=job.get("browser_mode"))
+        _update_sam_job(job_id, status="done", finished=datetime.now().isoformat(), result=result)
+        for stage, secs in (result.get("timings") or {}).items():
+            observe_stage("sam-job", stage, secs)
+        cache_opportunity(notice_id, job.get("last_modified", ""), result)
+        index_contract_folder(notice_id, folder)
+        _sam_progress(notice_id, "done", folder=folder, pdf=result.get("pdf"),
+                      changed_files=result.get("changed_files", []))
+        sam_logger.info(f"Job {job_id} completed for {notice_id}", extra={"job_id": job_id, "notice_id": notice_id})
+    except Exception as e:
+        sam_logger.warning(f"Job {job_id} failed: {e}")
+        _update_sam_job(job_id, status="failed", finished=datetime.now().isoformat(), message=str(e))
+        _sam_progress(notice_id, "failed", folder=folder, message=str(e))
+    finally:
+        _sam_job_local.job_id = None
+
+
+def _sam_worker_loop():
+    """Take job ids off the queue forever."""
+    while True:
+        job_id = _sam_job_queue.get()
+        try:
+            _run_sam_job(job_id)
+        except Exception as e:
+            sam_logger.error(f"Worker error on job {job_id}: {e}")
+        finally:
+            _sam_job_queue.task_done()
+
+
+def _ensure_sam_workers():
+    """Start the worker threads once and requeue jobs left over from a previous run."""
+    with _sam_jobs_lock:
+        if _sam_workers:
+            return
+        pending = sorted(
+            (j for j in _load_sam_jobs().values() if j["status"] in ("queued", "running")),
+            key=lambda j: j["created"]
+        )
+        for job in pending:
+            job["status"] = "queued"
+            _sam_job_queue.put(job["id"])
+        if pending:
+            _persist_sam_jobs()
+            sam_logger.info(f"Requeued {len(pending)} unfinished jobs")
+
+        for i in range(max(1, SAM_WORKERS)):
+            t = threading.Thread(target=_sam_worker_loop, name=f"sam-worker-{i}", daemon=True)
+            t.start()
+            _sam_workers.append(t)
+
+
+# ====================== SAM BATCH DOWNLOADS ======================
+SAM_BATCHES_FILE = os.path.join(DATA_DIR, "sam_batches.json")
+SAM_BATCHES_KEPT = 50
+
+_sam_batches = None  # batch_id -> batch record, guarded by _sam_jobs_lock
+
+
+def _load_sam_batches() -> dict:
+    """Return the in-memory batch table, reading it from disk on first use."""
+    global _sam_batches
+    if _sam_batches is None:
+        _sam_batches = {}
+        if os.path.exists(SAM_BATCHES_FILE):
+            try:
+                with open(SAM_BATCHES_FILE, 'r', encoding='utf-8') as f:
+                    _sam_batches = json.load(f)
+            except Exception as e:
+                sam_logger.error(f"Error reading batches file: {e}")
+    return _sam_batches
+
+
+def _persist_sam_batches():
+    """Write the batch table atomically, keeping only the most recent batches."""
+    ordered = sorted(_sam_batches.values(), key=lambda b: b["created"])
+    for batch in ordered[:-SAM_BATCHES_KEPT]:
+        _sam_batches.pop(batch["id"], None)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = SAM_BATCHES_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(_sam_batches, f, indent=2, default=str)
+    os.replace(tmp, SAM_BATCHES_FILE)
+
+
+def start_sam_batch(notices: list, force: bool = False, mode: str | None = None) -> dict:
+    """
+    Queue SAM downloads for many notices at once.
+
+    `notices` is a list of (notice_id, job_title, last_modified) tuples. Notices whose contract
+    folder is already complete are skipped unless `force` is set; the rest go
+    onto the shared job queue, so concurrency is bounded by SAM_WORKERS and the
+    browser pool.
+    """
+    batch_id = secrets.token_hex(8)
+    items = []
+    seen = set()
+    for notice_id, job_title, last_modified in notices:
+        if not notice_id or notice_id in seen:
+            continue
+        seen.add(notice_id)
+        folder = _create_contract_folder(job_title, notice_id)
+        item = {"notice_id": notice_id, "job_title": job_title, "folder": folder, "job_id": None}
+        if not force and _contract_folder_complete(notice_id, folder) and not _notice_changed(notice_id, last_modified):
+            item["status"] = "skipped"
+        else:
+            item["job_id"] = enqueue_sam_job(notice_id, job_title, folder, batch_id=batch_id, force=force,
+                                             mode=mode, last_modified=last_modified)["id"]
+        items.append(item)
+
+    batch = {
+        "id": batch_id,
+        "created": datetime.now().isoformat(),
+        "items": items
+    }
+    with _sam_jobs_lock:
+        _load_sam_batches()[batch_id] = batch
+        _persist_sam_batches()
+
+    queued = sum(1 for i in items if i["job_id"])
+    sam_logger.info(f"Batch {batch_id}: {queued} queued, {len(items) - queued} skipped")
+    publish_event("sam-batch", {"batch_id": batch_id, "queued": queued, "total": len(items)})
+    return _sam_batch_status(batch_id)
+
+
+def _sam_batch_status(batch_id: str) -> dict | None:
+    """Join a batch with its jobs: per-notice status, totals and throughput."""
+    with _sam_jobs_lock:
+        batch = _load_sam_batches().get(batch_id)
+        if batch is None:
+            return None
+        jobs = _load_sam_jobs()
+        notices = []
+        for item in batch["items"]:
+            job = jobs.get(item["job_id"]) if item["job_id"] else None
+            entry = dict(item)
+            if job:
+                entry.update({
+                    "status": job["status"],
+                    "stage": job.get("stage"),
+                    "started": job.get("started"),
+                    "finished": job.get("finished"),
+                    "message": job.get("message")
+                })
+            elif item["job_id"]:
+                entry["status"] = "unknown"
+            notices.append(entry)
+
+    counts = {}
+    for entry in notices:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+
+    started = [n["started"] for n in notices if n.get("started")]
+    finished = [n["finished"] for n in notices if n.get("finished")]
+    pending = counts.get("queued", 0) + counts.get("running", 0)
+    elapsed = None
+    per_minute = None
+    if started:
+        end = max(finished) if finished and not pending else datetime.now().isoformat()
+        elapsed = (datetime.fromisoformat(end) - datetime.fromisoformat(min(started))).total_seconds()
+        if elapsed > 0:
+            per_minute = round(len(finished) * 60.0 / elapsed, 2)
+
+    return {
+        "id": batch_id,
+        "created": batch["created"],
+        "total": len(notices),
+        "counts": counts,
+        "complete": pending == 0,
+        "elapsed_secs": round(elapsed, 1) if elapsed is not None else None,
+        "notices_per_minute": per_minute,
+        "notices": notices
+    }
+
+
+# ====================== METRICS ======================
+# Request counts and latency histograms per route, plus named stage timers for
+# the phases inside a request (file load, summary merge, filtering,
+# serialization, Excel writing, AI calls) and for the stages of SAM browser
+# jobs. Exposed in Prometheus text format on /metrics; each response also
+# carries its own stages in a Server-Timing header. Set METRICS_TOKEN to require
+# "Authorization: Bearer <token>" on /metrics.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_metrics_lock = threading.Lock()
+_http_requests = {}        # (route, method, status) -> count
+_http_latency = {}         # (route, method) -> histogram
+_stage_latency = {}        # (route, stage) -> histogram
+
+
+def _observe(series: dict, key: tuple, secs: float):
+    """Add one observation to a histogram in `series`."""
+    with _metrics_lock:
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = {"buckets": [0] * len(METRICS_BUCKETS), "sum": 0.0, "count": 0}
+        i = bisect.bisect_left(METRICS_BUCKETS, secs)
+        if i < len(METRICS_BUCKETS):
+            hist["buckets"][i] += 1
+        hist["sum"] += secs
+        hist["count"] += 1
+
+
+def _metrics_route() -> str:
+    """Route label for the current request: the URL rule, so IDs in the path don't add series."""
+    return request.url_rule.rule if request.url_rule else "<unmatched>"
+
+
+def observe_stage(route: str, stage: str, secs: float):
+    """Record a stage duration under a route (or a background job name)."""
+    _observe(_stage_latency, (route, stage), secs)
+
+
+@contextmanager
+def stage_timer(name: str, route: str | None = None):
+    """Time a named phase of the current request, or of `route` outside a request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        secs = time.perf_counter() - started
+        if route is None and has_request_context():
+            g.setdefault("_stage_timings", []).append((name, secs))
+            route = _metrics_route()
+        observe_stage(route or "background", name, secs)
+
+
+@app.before_request
+def _metrics_request_started():
+    g._request_started = time.perf_counter()
+
+
+@app.after_request
+def _metrics_request_finished(response):
+    """Count the request, record its latency and add the Server-Timing header."""
+    started = g.pop("_request_started", None)
+    if started is None:
+        return response
+    secs = time.perf_counter() - started
+    route = _metrics_route()
+    _observe(_http_latency, (route, request.method), secs)
+    with _metrics_lock:
+        key = (route, request.method, str(response.status_code))
+        _http_requests[key] = _http_requests.get(key, 0) + 1
+
+    timings = [f"{name};dur={stage_secs * 1000:.1f}" for name, stage_secs in g.get("_stage_timings", [])]
+    timings.append(f"total;dur={secs * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return response
+
 
-def _cleanup_persistent_session():
-    """Clean up the persistent browser session"""
-    global _persistent_driver, _session_start_time
-    
-    if _persistent_driver:
+@app.teardown_request
+def _metrics_request_failed(exc):
+    """Count requests that ended in an unhandled exception (after_request never ran)."""
+    started = g.pop("_request_started", None)
+    if started is None or exc is None:
+        return
+    route = _metrics_route()
+    _observe(_http_latency, (route, request.method), time.perf_counter() - started)
+    with _metrics_lock:
+        key = (route, request.method, "500")
+        _http_requests[key] = _http_requests.get(key, 0) + 1
+
+
+def _prom_labels(**labels) -> str:
+    """Prometheus label set with values escaped."""
+    def esc(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def _prom_histogram(lines: list, name: str, help_text: str, series: dict, label_names: tuple):
+    """Append a histogram family in Prometheus text format."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, hist in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(METRICS_BUCKETS, hist["buckets"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_prom_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_prom_labels(**labels, le='+Inf')} {hist['count']}")
+        lines.append(f"{name}_sum{_prom_labels(**labels)} {hist['sum']:.6f}")
+        lines.append(f"{name}_count{_prom_labels(**labels)} {hist['count']}")
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format."""
+    with _metrics_lock:
+        requests_total = dict(_http_requests)
+        latency = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                   for k, v in _http_latency.items()}
+        stages = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                  for k, v in _stage_latency.items()}
+
+    lines = [
+        "# HELP http_requests_total Requests handled, by route, method and status.",
+        "# TYPE http_requests_total counter"
+    ]
+    for (route, method, status), count in sorted(requests_total.items()):
+        lines.append(f"http_requests_total{_prom_labels(route=route, method=method, status=status)} {count}")
+    _prom_histogram(lines, "http_request_duration_seconds",
+                    "Time to produce a response, by route and method.", latency, ("route", "method"))
+    _prom_histogram(lines, "app_stage_duration_seconds",
+                    "Time spent in named stages, by route (or background job) and stage.", stages, ("route", "stage"))
+    return "\n".join(lines) + "\n"
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint."""
+    if METRICS_TOKEN and request.headers.get('Authorization', '') != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"ok": False, "message": "Unauthorized"}), 401
+    response = Response(render_metrics(), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# ====================== SERVER-SENT EVENTS ======================
+EVENT_HISTORY_SIZE = 200
+EVENT_KEEPALIVE_SECS = 15
+
+_event_lock = threading.Lock()
+_event_subscribers = set()
+_event_history = deque(maxlen=EVENT_HISTORY_SIZE)
+_event_counter = 0
+
+
+def publish_event(event_type: str, data: dict):
+    """Push a change event to every open /events stream."""
+    global _event_counter
+    with _event_lock:
+        _event_counter += 1
+        event = (_event_counter, event_type, json.dumps(data, default=str))
+        _event_history.append(event)
+        subscribers = list(_event_subscribers)
+
+    for q in subscribers:
         try:
-            _persistent_driver.quit()
-            print("[SAM] Persistent Edge session closed")
-        except Exception:
+            q.put_nowait(event)
+        except queue.Full:
+            # Slow client: it replays from Last-Event-ID when it reconnects
             pass
-        _persistent_driver = None
-        _session_start_time = None
+
+
+def _format_sse(event) -> str:
+    """Serialize an (id, type, json) event tuple in text/event-stream format."""
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
 
 
 # ====================== FLASK ROUTES ======================
@@ -1240,12 +3601,14 @@ def index():
 @app.route("/filter", methods=["POST"])
 def filter_data():
     """Filter the data based on keyword and date criteria."""
-    df = load_data()
+    with stage_timer("load"):
+        df = load_data()
     if df.empty:
         return jsonify({"count": 0, "columns": [], "solicitations": []})
 
     # Add the Highlight Summary column
-    df = add_highlight_summary_column(df)
+    with stage_timer("summaries"):
+        df = add_highlight_summary_column(df)
 
     payload = request.get_json(silent=True) or {}
     keyword = (payload.get("keyword") or "").strip()
@@ -1255,49 +3618,52 @@ def filter_data():
     desc_col  = _find_col(df, DESC_CANDS)
     resp_date_col = detect_current_response_date_col(df)
 
-    filtered = df
-
-    # Keyword across Title/Description
-    if keyword and (title_col or desc_col):
-        mask = False
-        if title_col:
-            mask = filtered[title_col].astype(str).str.contains(keyword, case=False, na=False)
-        if desc_col:
-            mask = mask | filtered[desc_col].astype(str).str.contains(keyword, case=False, na=False)
-        filtered = filtered[mask]
-
-    # Date filter on "Current Response Date" (if present and dates selected)
-    if resp_date_col and date_filter and len(date_filter) > 0:
-        # Parse dates from the filtered data
-        def parse_date_for_comparison(date_str):
-            """Parse date and return it in MM/DD/YYYY format for comparison."""
-            if not date_str or pd.isna(date_str):
-                return None
+    with stage_timer("filter"):
+        filtered = df
+
+        # Keyword across Title/Description
+        if keyword and (title_col or desc_col):
+            mask = False
+            if title_col:
+                mask = filtered[title_col].astype(str).str.contains(keyword, case=False, na=False)
+            if desc_col:
+                mask = mask | filtered[desc_col].astype(str).str.contains(keyword, case=False, na=False)
+            filtered = filtered[mask]
+
+        # Date filter on "Current Response Date" (if present and dates selected)
+        if resp_date_col and date_filter and len(date_filter) > 0:
+            # Parse dates from the filtered data
+            def parse_date_for_comparison(date_str):
+                """Parse date and return it in MM/DD/YYYY format for comparison."""
+                if not date_str or pd.isna(date_str):
+                    return None
 
-            try:
-                # Try parsing with pandas
-                parsed = pd.to_datetime(str(date_str), errors='coerce')
-                if pd.isna(parsed):
+                try:
+                    # Try parsing with pandas
+                    parsed = pd.to_datetime(str(date_str), errors='coerce')
+                    if pd.isna(parsed):
+                        return None
+                    return parsed.strftime('%m/%d/%Y')
+                except:
                     return None
-                return parsed.strftime('%m/%d/%Y')
-            except:
-                return None
 
-        # Convert all dates in the column to MM/DD/YYYY format for comparison
-        filtered['_temp_date_formatted'] = filtered[resp_date_col].apply(parse_date_for_comparison)
+            # Convert all dates in the column to MM/DD/YYYY format for comparison
+            filtered['_temp_date_formatted'] = filtered[resp_date_col].apply(parse_date_for_comparison)
 
-        # Filter by selected dates
-        date_mask = filtered['_temp_date_formatted'].isin(date_filter)
-        filtered = filtered[date_mask]
+            # Filter by selected dates
+            date_mask = filtered['_temp_date_formatted'].isin(date_filter)
+            filtered = filtered[date_mask]
 
-        # Remove the temporary column
-        filtered = filtered.drop('_temp_date_formatted', axis=1)
+            # Remove the temporary column
+            filtered = filtered.drop('_temp_date_formatted', axis=1)
 
-    return jsonify({
-        "count": int(len(filtered)),
-        "columns": list(df.columns),  # preserve original header order
-        "solicitations": filtered.to_dict(orient="records")
-    })
+    with stage_timer("serialize"):
+        response = jsonify({
+            "count": int(len(filtered)),
+            "columns": list(df.columns),  # preserve original header order
+            "solicitations": filtered.to_dict(orient="records")
+        })
+    return response
 
 
 @app.route("/upload-data", methods=["POST"])
@@ -1341,6 +3707,7 @@ def upload_data():
         session['active_file'] = save_path
 
         df = load_data()
+        publish_event("dataset", {"file": fname, "rows": int(len(df))})
         return jsonify({"ok": True, "saved_as": fname, "rows": int(len(df))})
     except Exception as e:
         logger.error(f"File upload error: {e}")
@@ -1356,12 +3723,14 @@ def upload_data():
 @app.route("/export", methods=["POST"])
 def export_filtered():
     """Export the currently filtered rows to an Excel download."""
-    df = load_data()
+    with stage_timer("load"):
+        df = load_data()
     if df.empty:
         return "No data to export", 400
 
     # Add the Highlight Summary column
-    df = add_highlight_summary_column(df)
+    with stage_timer("summaries"):
+        df = add_highlight_summary_column(df)
 
     payload = request.get_json(silent=True) or {}
     keyword = (payload.get("keyword") or "").strip()
@@ -1371,46 +3740,48 @@ def export_filtered():
     desc_col   = _find_col(df, DESC_CANDS)
     resp_date_col = detect_current_response_date_col(df)
 
-    filtered = df
-
-    if keyword and (title_col or desc_col):
-        mask = False
-        if title_col:
-            mask = filtered[title_col].astype(str).str.contains(keyword, case=False, na=False)
-        if desc_col:
-            mask = mask | filtered[desc_col].astype(str).str.contains(keyword, case=False, na=False)
-        filtered = filtered[mask]
-
-    # Date filter on "Current Response Date" (if present and dates selected)
-    if resp_date_col and date_filter and len(date_filter) > 0:
-        def parse_date_for_comparison(date_str):
-            """Parse date and return it in MM/DD/YYYY format for comparison."""
-            if not date_str or pd.isna(date_str):
-                return None
+    with stage_timer("filter"):
+        filtered = df
+
+        if keyword and (title_col or desc_col):
+            mask = False
+            if title_col:
+                mask = filtered[title_col].astype(str).str.contains(keyword, case=False, na=False)
+            if desc_col:
+                mask = mask | filtered[desc_col].astype(str).str.contains(keyword, case=False, na=False)
+            filtered = filtered[mask]
+
+        # Date filter on "Current Response Date" (if present and dates selected)
+        if resp_date_col and date_filter and len(date_filter) > 0:
+            def parse_date_for_comparison(date_str):
+                """Parse date and return it in MM/DD/YYYY format for comparison."""
+                if not date_str or pd.isna(date_str):
+                    return None
 
-            try:
-                # Try parsing with pandas
-                parsed = pd.to_datetime(str(date_str), errors='coerce')
-                if pd.isna(parsed):
+                try:
+                    # Try parsing with pandas
+                    parsed = pd.to_datetime(str(date_str), errors='coerce')
+                    if pd.isna(parsed):
+                        return None
+                    return parsed.strftime('%m/%d/%Y')
+                except:
                     return None
-                return parsed.strftime('%m/%d/%Y')
-            except:
-                return None
 
-        # Convert all dates in the column to MM/DD/YYYY format for comparison
-        filtered['_temp_date_formatted'] = filtered[resp_date_col].apply(parse_date_for_comparison)
+            # Convert all dates in the column to MM/DD/YYYY format for comparison
+            filtered['_temp_date_formatted'] = filtered[resp_date_col].apply(parse_date_for_comparison)
 
-        # Filter by selected dates
-        date_mask = filtered['_temp_date_formatted'].isin(date_filter)
-        filtered = filtered[date_mask]
+            # Filter by selected dates
+            date_mask = filtered['_temp_date_formatted'].isin(date_filter)
+            filtered = filtered[date_mask]
 
-        # Remove the temporary column
-        filtered = filtered.drop('_temp_date_formatted', axis=1)
+            # Remove the temporary column
+            filtered = filtered.drop('_temp_date_formatted', axis=1)
 
-    bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
-        filtered.to_excel(writer, index=False, sheet_name="Filtered")
-    bio.seek(0)
+    with stage_timer("excel"):
+        bio = BytesIO()
+        with pd.ExcelWriter(bio, engine="openpyxl") as writer:
+            filtered.to_excel(writer, index=False, sheet_name="Filtered")
+        bio.seek(0)
     fname = f"Government_Contracts_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     return send_file(
         bio,
@@ -1449,7 +3820,7 @@ def add_to_my_solicitations():
         try:
             cur = pd.read_excel(MY_FILE, dtype=str)
         except Exception as e:
-            print("[MY_SOL] Failed reading existing:", e)
+            my_logger.error(f"Failed reading existing: {e}")
             cur = pd.DataFrame()
     else:
         cur = pd.DataFrame()
@@ -1475,7 +3846,7 @@ def add_to_my_solicitations():
         with pd.ExcelWriter(MY_FILE, engine="openpyxl") as w:
             cur.to_excel(w, index=False)
     except Exception as e:
-        print("[MY_SOL] Write failed:", e)
+        my_logger.error(f"Write failed: {e}")
         return jsonify({"ok": False, "message": "Could not save My Solicitations."}), 500
 
     return jsonify({"ok": True, "saved": 1, "total": int(len(cur))})
@@ -1575,93 +3946,63 @@ def delete_solicitation():
 @app.route("/my-filter", methods=["POST"])
 def my_filter():
     """Filter only the My Solicitations dataset (keyword search across ALL columns)."""
-    base_cols = list(load_data().columns)  # fallback if file empty
-    df = load_my_data(columns_fallback=base_cols)
+    with stage_timer("load"):
+        base_cols = list(load_data().columns)  # fallback if file empty
+        df = load_my_data(columns_fallback=base_cols)
     if df.empty:
         return jsonify({"count": 0, "columns": list(df.columns), "solicitations": []})
 
     # Add the Highlight Summary column
-    df = add_highlight_summary_column(df)
+    with stage_timer("summaries"):
+        df = add_highlight_summary_column(df)
 
     payload = request.get_json(silent=True) or {}
     keyword = (payload.get("keyword") or "").strip()
 
-    print(f"[MY-SEARCH] Available columns: {list(df.columns)}")
-    print(f"[MY-SEARCH] Keyword: '{keyword}'")
+    my_logger.debug(f"Available columns: {list(df.columns)}")
 
     filtered = df
+    matches_by_column = {}
+    matched_columns = []
+    document_matches = {}
 
     # Search ALL columns in the entire spreadsheet including Highlight Summary content
     if keyword:
-        print(f"[MY-SEARCH] Searching ALL columns for keyword: '{keyword}'")
-        mask = pd.Series([False] * len(df), index=df.index)
-        matches_by_column = {}
-
-        # Load saved highlights for searching
-        highlights_data = {}
-        try:
-            if os.path.exists(HIGHLIGHTS_FILE):
-                with open(HIGHLIGHTS_FILE, 'r', encoding='utf-8') as f:
-                    highlights_data = json.load(f)
-        except Exception as e:
-            print(f"[MY-SEARCH] Could not load highlights: {e}")
-
-        # Load AI summaries for searching
-        ai_summaries = load_ai_summaries()
-
-        for col in df.columns:
-            try:
-                if col == "Highlight Summary":
-                    # Special handling for Highlight Summary column - search AI summaries and saved highlights
-                    notice_col = _find_notice_col(df)
-                    if notice_col:
-                        highlight_mask = pd.Series([False] * len(df), index=df.index)
-
-                        for idx, row in df.iterrows():
-                            notice_id = str(row.get(notice_col, "")).strip()
-                            found_match = False
-
-                            # Search in AI summary
-                            if notice_id in ai_summaries:
-                                summary_text = ai_summaries[notice_id].get("summary", "")
-                                if keyword.lower() in summary_text.lower():
-                                    found_match = True
-
-                            # Search in saved highlights
-                            if notice_id in highlights_data:
-                                highlights_text = highlights_data.get(notice_id, "")
-                                if keyword.lower() in highlights_text.lower():
-                                    found_match = True
-
-                            if found_match:
-                                highlight_mask.iloc[idx] = True
-
-                        matches_count = highlight_mask.sum()
-                        if matches_count > 0:
-                            matches_by_column[col] = matches_count
-                            mask = mask | highlight_mask
-                else:
-                    # Regular column search
-                    col_mask = df[col].astype(str).str.contains(keyword, case=False, na=False, regex=False)
-                    matches_count = col_mask.sum()
-                    if matches_count > 0:
-                        matches_by_column[col] = matches_count
-                        mask = mask | col_mask
-            except Exception as e:
-                print(f"[MY-SEARCH] Could not search column '{col}': {e}")
-                continue
+        with stage_timer("search"):
+            mask, matches_by_column, row_matches = _search_my_solicitations(df, keyword)
+
+        # ...and inside the downloaded solicitation documents
+        notice_col = _find_notice_col(df)
+        if notice_col and payload.get("search_documents", True):
+            notice_ids = df[notice_col].astype(str).str.strip()
+            with stage_timer("documents"):
+                document_matches = search_documents(keyword, set(notice_ids))
+            if document_matches:
+                doc_mask = notice_ids.isin(list(document_matches))
+                for ix in df.index[doc_mask]:
+                    row_matches.setdefault(ix, []).append("Documents")
+                matches_by_column["Documents"] = int(doc_mask.sum())
+                mask = mask | doc_mask
 
         filtered = df[mask]
-        print(f"[MY-SEARCH] Total rows with matches: {len(filtered)} out of {len(df)}")
-        print(f"[MY-SEARCH] Matches by column: {matches_by_column}")
+        matched_columns = [row_matches[ix] for ix in filtered.index]
+        my_logger.info(
+            f"Search '{keyword}': {len(filtered)} of {len(df)} rows match; by column: {matches_by_column}",
+            extra={"keyword": keyword, "matches": int(len(filtered)), "rows": int(len(df))}
+        )
     else:
-        print(f"[MY-SEARCH] No keyword provided, returning all data")
+        my_logger.debug("No keyword provided, returning all data")
 
-    return jsonify({
-        "count": int(len(filtered)),
-        "columns": list(df.columns),
-        "solicitations": filtered.to_dict(orient="records")
-    })
+    with stage_timer("serialize"):
+        response = jsonify({
+            "count": int(len(filtered)),
+            "columns": list(df.columns),
+            "solicitations": filtered.to_dict(orient="records"),
+            "matches_by_column": matches_by_column,
+            "matched_columns": matched_columns,
+            "document_matches": document_matches
+        })
+    return response
 
 
 @app.route("/my-export", methods=["POST"])
@@ -1712,61 +4053,386 @@ def project_tracking():
 
 # ====================== PROJECT DATE PERSISTENCE ======================
 PROJECT_DATES_FILE = os.path.join(DATA_DIR, "project_dates.json")
+PROJECT_DATES_REV_FILE = os.path.join(DATA_DIR, "project_dates_rev.json")
+_project_dates_lock = threading.Lock()
+
+
+def _load_project_dates() -> dict:
+    """Load the saved project dates keyed by Notice ID."""
+    if not os.path.exists(PROJECT_DATES_FILE):
+        return {}
+    try:
+        with open(PROJECT_DATES_FILE, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        dates_logger.error(f"Error reading dates file: {e}")
+        return {}
+
+
+def _load_project_dates_revisions() -> dict:
+    """Load the revision counter and the revision at which each field last changed."""
+    revs = {"revision": 0, "fields": {}}
+    if os.path.exists(PROJECT_DATES_REV_FILE):
+        try:
+            with open(PROJECT_DATES_REV_FILE, 'r') as f:
+                revs.update(json.load(f))
+        except Exception as e:
+            dates_logger.error(f"Error reading revisions file: {e}")
+    return revs
+
+
+def _apply_project_date_changes(changes: list[dict]) -> int:
+    """Apply a list of {notice_id, field, value} changes and return the new revision.
+
+    Every change bumps the store-wide revision counter, so clients can ask for
+    everything after the revision they last saw instead of re-reading the file.
+    """
+    with _project_dates_lock:
+        dates_data = _load_project_dates()
+        revs = _load_project_dates_revisions()
+        revision = int(revs.get("revision", 0))
+        now = datetime.now().isoformat()
+
+        for change in changes:
+            notice_id = change['notice_id']
+            field = change['field']
+            revision += 1
+            dates_data.setdefault(notice_id, {})[field] = change.get('value')
+            dates_data[notice_id]['last_updated'] = now
+            revs["fields"].setdefault(notice_id, {})[field] = revision
+
+        revs["revision"] = revision
+        # Write both files to temp names first, then swap them in, so a crash
+        # or a concurrent reader never sees a half-written file
+        os.makedirs(DATA_DIR, exist_ok=True)
+        dates_tmp = PROJECT_DATES_FILE + ".tmp"
+        revs_tmp = PROJECT_DATES_REV_FILE + ".tmp"
+        with open(dates_tmp, 'w') as f:
+            json.dump(dates_data, f, indent=2)
+        with open(revs_tmp, 'w') as f:
+            json.dump(revs, f)
+        os.replace(dates_tmp, PROJECT_DATES_FILE)
+        os.replace(revs_tmp, PROJECT_DATES_REV_FILE)
+        return revision
+
+
+def _project_dates_since(since: int) -> tuple[dict, int]:
+    """Return only the fields changed after revision `since`, plus the current revision."""
+    with _project_dates_lock:
+        dates_data = _load_project_dates()
+        revs = _load_project_dates_revisions()
+
+    delta = {}
+    for notice_id, fields in revs["fields"].items():
+        current = dates_data.get(notice_id, {})
+        for field, rev in fields.items():
+            if rev > since and field in current:
+                delta.setdefault(notice_id, {})[field] = current[field]
+        if notice_id in delta:
+            delta[notice_id]['last_updated'] = current.get('last_updated')
+    return delta, int(revs.get("revision", 0))
+
 
 @app.route('/save-project-dates', methods=['POST'])
 def save_project_dates():
     """Save project date changes to server storage."""
     try:
-        payload = request.get_json() or {}
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"ok": False, "message": "Request body must be a JSON object"}), 400
         notice_id = payload.get('notice_id')
         field = payload.get('field')
         value = payload.get('value')
 
-        if not notice_id or not field:
+        if not isinstance(notice_id, str) or not isinstance(field, str) or not notice_id or not field:
             return jsonify({"ok": False, "message": "Missing notice_id or field"}), 400
 
-        # Load existing dates
-        dates_data = {}
-        if os.path.exists(PROJECT_DATES_FILE):
-            try:
-                with open(PROJECT_DATES_FILE, 'r') as f:
-                    dates_data = json.load(f)
-            except Exception as e:
-                print(f"[DATES] Error reading dates file: {e}")
+        revision = _apply_project_date_changes([{"notice_id": notice_id, "field": field, "value": value}])
 
-        # Update dates
-        if notice_id not in dates_data:
-            dates_data[notice_id] = {}
-        dates_data[notice_id][field] = value
-        dates_data[notice_id]['last_updated'] = datetime.now().isoformat()
+        dates_logger.info(f"Saved {field} = {value} for {notice_id}")
+        publish_event("project-dates", {"revision": revision, "notice_ids": [notice_id]})
+
+        return jsonify({"ok": True, "saved": f"{field} = {value}", "revision": revision})
+
+    except Exception as e:
+        dates_logger.error(f"Save error: {e}")
+        return jsonify({"ok": False, "message": str(e)}), 500
 
-        # Save dates
-        with open(PROJECT_DATES_FILE, 'w') as f:
-            json.dump(dates_data, f, indent=2)
 
-        print(f"[DATES] Saved {field} = {value} for {notice_id}")
+@app.route('/save-project-dates-batch', methods=['POST'])
+def save_project_dates_batch():
+    """Save many project date changes in one request.
+
+    Also the target of navigator.sendBeacon on page unload, which may not send
+    a JSON content type, so the body is parsed regardless of it.
+    """
+    try:
+        payload = request.get_json(force=True, silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"ok": False, "message": "Request body must be a JSON object"}), 400
+        changes = payload.get('changes')
+
+        if not isinstance(changes, list) or not changes:
+            return jsonify({"ok": False, "message": "No changes provided"}), 400
+
+        for change in changes:
+            if (not isinstance(change, dict)
+                    or not isinstance(change.get('notice_id'), str) or not change['notice_id']
+                    or not isinstance(change.get('field'), str) or not change['field']):
+                return jsonify({"ok": False, "message": "Each change needs notice_id and field"}), 400
+
+        revision = _apply_project_date_changes(changes)
+
+        dates_logger.info(f"Saved {len(changes)} changes in batch (revision {revision})")
+        publish_event("project-dates", {
+            "revision": revision,
+            "notice_ids": sorted({c['notice_id'] for c in changes})
+        })
 
-        return jsonify({"ok": True, "saved": f"{field} = {value}"})
+        return jsonify({"ok": True, "saved": len(changes), "revision": revision})
 
     except Exception as e:
-        print(f"[DATES] Save error: {e}")
+        dates_logger.error(f"Batch save error: {e}")
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
 @app.route('/get-project-dates', methods=['GET'])
 def get_project_dates():
-    """Get saved project dates from server storage."""
+    """Get saved project dates from server storage.
+
+    With ``?since=<revision>`` only the fields changed after that revision are returned.
+    """
     try:
-        if not os.path.exists(PROJECT_DATES_FILE):
-            return jsonify({"ok": True, "dates": {}})
+        since = request.args.get('since', type=int)
+
+        if since is not None:
+            delta, revision = _project_dates_since(since)
+            # A client ahead of the server (store reset) must start over from a full read
+            if since <= revision:
+                return jsonify({"ok": True, "dates": delta, "revision": revision, "full": False})
+
+        with _project_dates_lock:
+            dates_data = _load_project_dates()
+            revision = int(_load_project_dates_revisions().get("revision", 0))
+
+        return jsonify({"ok": True, "dates": dates_data, "revision": revision, "full": True})
+
+    except Exception as e:
+        dates_logger.error(f"Load error: {e}")
+        return jsonify({"ok": False, "message": str(e)}), 500
+
+
+# ====================== PROJECT PERSISTENCE ======================
+PROJECTS_FILE = os.path.join(DATA_DIR, "projects.json")
+_projects_lock = threading.Lock()
+
+# What /save-project stores. Title, response date etc. come from the dataset,
+# except for manually added tasks, which exist only in the project store.
+TRACKED_DATE_FIELDS = ("site_visit_date", "work_start_date", "completion_date")
+PROJECT_TRACKED_FIELDS = ("status", "progress") + TRACKED_DATE_FIELDS
+MANUAL_TASK_FIELDS = ("title", "agency", "response_date", "type")
+
+
+def _load_projects() -> dict:
+    """Load saved project tracking records keyed by Notice ID."""
+    if not os.path.exists(PROJECTS_FILE):
+        return {}
+    try:
+        with open(PROJECTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        projects_logger.error(f"Error reading projects file: {e}")
+        return {}
+
+
+def _save_projects(projects: dict):
+    """Write project tracking records atomically (caller holds _projects_lock)."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = PROJECTS_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(projects, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, PROJECTS_FILE)
+
+
+def _project_fields(notice_id: str) -> tuple:
+    """Fields /save-project stores for a notice; manual tasks also own their descriptive fields."""
+    if notice_id.startswith("MANUAL_"):
+        return PROJECT_TRACKED_FIELDS + MANUAL_TASK_FIELDS
+    return PROJECT_TRACKED_FIELDS
+
+
+@app.route('/save-project', methods=['POST'])
+def save_project():
+    """Merge a partial update into one tracked project.
+
+    The client sends the ``version`` it last saw; if another tab saved in the
+    meantime the update is rejected with 409 and the current record is returned.
+    """
+    try:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"ok": False, "message": "Request body must be a JSON object"}), 400
+        project = payload.get('project') or {}
+        if not isinstance(project, dict):
+            return jsonify({"ok": False, "message": "Project must be an object"}), 400
+        notice_id = str(payload.get('notice_id') or project.get('notice_id') or '').strip()
+        expected_version = payload.get('version')
+
+        if not notice_id:
+            return jsonify({"ok": False, "message": "Missing notice_id"}), 400
+
+        if expected_version is not None:
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                return jsonify({"ok": False, "message": "Invalid version"}), 400
+
+        fields = _project_fields(notice_id)
+        changes = {
+            k: v for k, v in project.items()
+            if k in fields and (v is None or isinstance(v, (str, int, float, bool)))
+        }
+
+        with _projects_lock:
+            projects = _load_projects()
+            current = projects.get(notice_id, {"notice_id": notice_id, "version": 0})
+
+            if expected_version is not None and expected_version != current.get("version", 0):
+                return jsonify({
+                    "ok": False,
+                    "message": "Version conflict",
+                    "project": current,
+                    "version": current.get("version", 0)
+                }), 409
+
+            current.update(changes)
+            current["notice_id"] = notice_id
+            current["version"] = current.get("version", 0) + 1
+            current["last_updated"] = datetime.now().isoformat()
+            projects[notice_id] = current
+            _save_projects(projects)
+
+        projects_logger.info(f"Saved {len(changes)} fields for {notice_id} (version {current['version']})")
+        publish_event("project", {"notice_id": notice_id, "version": current["version"]})
+
+        return jsonify({"ok": True, "project": current, "version": current["version"]})
+
+    except Exception as e:
+        projects_logger.error(f"Save error: {e}")
+        return jsonify({"ok": False, "message": str(e)}), 500
 
-        with open(PROJECT_DATES_FILE, 'r') as f:
-            dates_data = json.load(f)
 
-        return jsonify({"ok": True, "dates": dates_data})
+@app.route('/get-projects', methods=['GET'])
+def get_projects():
+    """Get all saved project tracking records."""
+    try:
+        with _projects_lock:
+            projects = _load_projects()
+        return jsonify({"ok": True, "projects": projects})
+
+    except Exception as e:
+        projects_logger.error(f"Load error: {e}")
+        return jsonify({"ok": False, "message": str(e)}), 500
+
+
+# ====================== PROJECT TRACKING DATA ======================
+def _overlay_saved_dates(row: dict, dates_data: dict):
+    """Apply the dates saved through the project dates API to a timeline row."""
+    for field in TRACKED_DATE_FIELDS:
+        value = dates_data.get(row["notice_id"], {}).get(field)
+        if value:
+            row[field] = value
+
+
+def _project_tracking_etag() -> str:
+    """Build an ETag from the stat of every file the timeline data is joined from."""
+    parts = []
+    for path in (MY_FILE, PROJECT_DATES_FILE, PROJECTS_FILE):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns:x}-{st.st_size:x}")
+        except OSError:
+            parts.append("0")
+    return "pt-" + "-".join(parts)
+
+
+def _my_solicitation_rows(df: pd.DataFrame, saved_projects: dict, dates_data: dict) -> list[dict]:
+    """Timeline rows for My Solicitations, with saved project fields and dates applied."""
+    if df.empty:
+        return []
+
+    notice_col = _find_notice_col(df)
+    title_col = _find_col(df, TITLE_CANDS)
+    resp_col = detect_current_response_date_col(df)
+    agency_col = _find_col(df, ["agency", "department/ind. agency", "department"])
+    type_col = _find_col(df, ["contract opportunity type", "type"])
+
+    def col_values(col):
+        return df[col].tolist() if col else [""] * len(df)
+
+    rows = []
+    for notice_id, title, response_date, agency, opp_type in zip(
+        col_values(notice_col), col_values(title_col), col_values(resp_col),
+        col_values(agency_col), col_values(type_col)
+    ):
+        notice_id = str(notice_id).strip()
+        row = {
+            "notice_id": notice_id,
+            "title": title or "Untitled Project",
+            "response_date": response_date,
+            "agency": agency,
+            "type": opp_type or "Unknown",
+            "status": None,
+            "progress": 0,
+            **{field: "" for field in TRACKED_DATE_FIELDS},
+        }
+        # Only tracked fields come from the project store; title, response date
+        # etc. always reflect the current dataset
+        saved = saved_projects.get(notice_id)
+        if saved:
+            row.update({k: v for k, v in saved.items() if k in PROJECT_TRACKED_FIELDS or k == "version"})
+        _overlay_saved_dates(row, dates_data)
+        rows.append(row)
+    return rows
+
+
+def _project_tracking_rows() -> list[dict]:
+    """Join My Solicitations with saved dates and project records into timeline rows."""
+    with _project_dates_lock:
+        dates_data = _load_project_dates()
+    with _projects_lock:
+        saved_projects = _load_projects()
+    rows = _my_solicitation_rows(load_my_data(), saved_projects, dates_data)
+
+    # Manually created tasks only exist in the project store, so they are listed
+    # even when My Solicitations is empty
+    listed = {row["notice_id"] for row in rows}
+    for nid, saved in saved_projects.items():
+        if nid.startswith("MANUAL_") and nid not in listed:
+            row = dict(saved)
+            _overlay_saved_dates(row, dates_data)
+            rows.append(row)
+    return rows
+
+
+@app.route('/project-tracking-data', methods=['GET'])
+def project_tracking_data():
+    """Return only the fields the timeline needs, with ETag revalidation."""
+    try:
+        etag = _project_tracking_etag()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            with _project_dates_lock:
+                dates_revision = int(_load_project_dates_revisions().get("revision", 0))
+            rows = _project_tracking_rows()
+            response = jsonify({"ok": True, "projects": rows, "dates_revision": dates_revision})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
-        print(f"[DATES] Load error: {e}")
+        projects_logger.error(f"Tracking data error: {e}")
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
@@ -1791,7 +4457,7 @@ def save_highlights():
                 with open(HIGHLIGHTS_FILE, 'r', encoding='utf-8') as f:
                     highlights_data = json.load(f)
             except Exception as e:
-                print(f"[HIGHLIGHTS] Error reading highlights file: {e}")
+                highlights_logger.error(f"Error reading highlights file: {e}")
 
         # Update highlights
         highlights_data[notice_id] = highlights
@@ -1802,12 +4468,14 @@ def save_highlights():
         with open(HIGHLIGHTS_FILE, 'w', encoding='utf-8') as f:
             json.dump(highlights_data, f, indent=2, ensure_ascii=False)
 
-        print(f"[HIGHLIGHTS] Saved highlights for {notice_id}: {highlights[:50]}...")
+        highlights_logger.info(f"Saved highlights for {notice_id}: {highlights[:50]}...")
+        _refresh_my_search_entry(notice_id)
+        publish_event("highlights", {"notice_id": notice_id})
 
         return jsonify({"ok": True, "saved": True})
 
     except Exception as e:
-        print(f"[HIGHLIGHTS] Save error: {e}")
+        highlights_logger.error(f"Save error: {e}")
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
@@ -1828,12 +4496,12 @@ def load_highlights():
             highlights_data = json.load(f)
 
         highlights = highlights_data.get(notice_id, "")
-        print(f"[HIGHLIGHTS] Loaded highlights for {notice_id}: {highlights[:50]}...")
+        highlights_logger.debug(f"Loaded highlights for {notice_id}: {highlights[:50]}...")
 
         return jsonify({"ok": True, "highlights": highlights})
 
     except Exception as e:
-        print(f"[HIGHLIGHTS] Load error: {e}")
+        highlights_logger.error(f"Load error: {e}")
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
@@ -1847,7 +4515,7 @@ def opportunity():
 @app.route("/opportunity/<notice_id>")
 def opportunity_by_id(notice_id):
     """View a specific opportunity by Notice ID."""
-    print(f"[SAM] ContractView nid={notice_id}")
+    sam_logger.info(f"ContractView nid={notice_id}")
     df = load_data()
     my_df = load_my_data(columns_fallback=list(df.columns) if not df.empty else None)
     row = _match_row_by_notice(df, notice_id) or _match_row_by_notice(my_df, notice_id)
@@ -1859,38 +4527,34 @@ def opportunity_by_id(notice_id):
                 job_title = str(row[key]).strip()
                 break
 
-    sam_url = f"https://sam.gov/opp/{notice_id}/view"
+    sam_url = f"{SAM_BASE_URL}/opp/{notice_id}/view"
     return render_template("opportunity.html",
                            notice_id=notice_id,
                            job_title=job_title,
                            record=row or {},
-                           sam_url=sam_url)
+                           sam_url=sam_url,
+                           cached=get_cached_opportunity(notice_id, _notice_last_modified(row)))
 
 
 # ====================== SAM.GOV AUTOMATION ROUTES ======================
 @app.route('/sam-start/<notice_id>', methods=['POST','GET'])
 def sam_start(notice_id):
-    """Enhanced SAM automation with persistent login sessions"""
-    print(f"[SAM] Enhanced automation starting for notice_id: {notice_id}")
+    """Queue SAM automation for a notice and return the job id immediately."""
+    sam_logger.info(f"Enhanced automation requested for notice_id: {notice_id}")
     
     # Get job details
-    df = load_data()
-    my_df = load_my_data(columns_fallback=list(df.columns) if not df.empty else None)
-    row = _match_row_by_notice(df, notice_id) or _match_row_by_notice(my_df, notice_id)
+    with stage_timer("load"):
+        df = load_data()
+        my_df = load_my_data(columns_fallback=list(df.columns) if not df.empty else None)
+        row = _match_row_by_notice(df, notice_id) or _match_row_by_notice(my_df, notice_id)
 
-    job_title = ""
-    if row:
-        for key in ["Title","Opportunity Title","Notice Title","Name","Project Title","Solicitation Title","Description","Summary"]:
-            if key in row and str(row[key]).strip():
-                job_title = str(row[key]).strip()
-                break
-    
-    if not job_title:
-        job_title = f"Notice {notice_id}"
+    job_title = _notice_job_title(row, notice_id)
+    last_modified = _notice_last_modified(row)
     
     # Create folder for this opportunity
-    folder = _create_contract_folder(job_title)
-    print(f"[SAM] Created folder: {folder}")
+    with stage_timer("folder"):
+        folder = _create_contract_folder(job_title, notice_id)
+    sam_logger.info(f"Created folder: {folder}")
 
     if not _SELENIUM_AVAILABLE:
         return jsonify({
@@ -1898,31 +4562,179 @@ def sam_start(notice_id):
             "message": "Selenium not installed in this environment.",
             "folder": folder
         }), 500
-    
-    try:
-        result = _sam_download_with_persistent_session(notice_id, job_title, folder)
-        
-        print(f"[SAM] Automation completed successfully")
-        print(f"[SAM] PDF: {result.get('pdf')}")
-        print(f"[SAM] Attachments: {len(result.get('attachments', []))}")
-        print(f"[SAM] Links: {len(result.get('links_info', []))}")
-        
+
+    force = request.args.get("force") == "1"
+
+    # Unchanged notice with its documents already on disk: answer from the cache
+    with stage_timer("cache"):
+        cached = None if force or request.args.get("refresh") == "1" else get_cached_opportunity(notice_id, last_modified)
+        cached = cached if cached and _contract_folder_complete(notice_id, folder) else None
+    if cached:
+        sam_logger.info(f"Serving {notice_id} from the opportunity cache")
         return jsonify({
-            "ok": True, 
-            "folder": folder, 
-            "pdf": result.get("pdf"), 
-            "attachments": result.get("attachments", []),
-            "links_info": result.get("links_info", []),
-            "attachments_info": result.get("attachments_info", [])
+            "ok": True,
+            "cached": True,
+            "status": "done",
+            "folder": folder,
+            "job": {"status": "done", "folder": folder, "result": cached}
         })
-        
-    except Exception as e:
-        print(f"[SAM] Automation failed: {e}")
+
+    with stage_timer("enqueue"):
+        job = enqueue_sam_job(notice_id, job_title, folder, force=force, mode=request.args.get("mode"),
+                              last_modified=last_modified)
+    sam_logger.info(f"Queued job {job['id']} for {notice_id}")
+
+    return jsonify({
+        "ok": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "folder": folder
+    }), 202
+
+
+@app.route('/sam-job/<job_id>', methods=['GET'])
+def sam_job_status(job_id):
+    """Get the status, per-stage timestamps and result of a SAM job."""
+    _ensure_sam_workers()
+    with _sam_jobs_lock:
+        job = _load_sam_jobs().get(job_id)
+        job = dict(job) if job else None
+    if not job:
+        return jsonify({"ok": False, "message": "Job not found"}), 404
+    return jsonify({"ok": True, "job": job})
+
+
+@app.route('/sam-jobs', methods=['GET'])
+def sam_jobs():
+    """List SAM jobs, newest first."""
+    _ensure_sam_workers()
+    with _sam_jobs_lock:
+        jobs = sorted(_load_sam_jobs().values(), key=lambda j: j["created"], reverse=True)
+        jobs = [dict(j) for j in jobs]
+    return jsonify({
+        "ok": True,
+        "jobs": jobs,
+        "queued": _sam_job_queue.qsize(),
+        "pool": _browser_pool_status()
+    })
+
+
+def _filtered_notice_ids(my_df, notice_col: str, keyword: str | None) -> list[str]:
+    """Notice IDs of the My Solicitations rows matching the filter keyword (all rows when empty)."""
+    rows = my_df
+    keyword = (keyword or "").strip()
+    if keyword:
+        rows = add_highlight_summary_column(my_df)
+        mask, _, _ = _search_my_solicitations(rows, keyword)
+        rows = rows[mask]
+    return [str(n).strip() for n in rows[notice_col].tolist() if str(n).strip()]
+
+
+@app.route('/sam-batch', methods=['POST'])
+def sam_batch_start():
+    """
+    Queue document downloads for many notices.
+
+    Body: {"notice_ids": [...]} for an explicit list, or {"keyword": "..."} to
+    use the My Solicitations filter result (all rows when empty). Set
+    "force": true to re-fetch folders that are already complete, and "mode"
+    ("auto", "visible" or "fast") to pick the browser profile.
+    """
+    if not _SELENIUM_AVAILABLE:
+        return jsonify({"ok": False, "message": "Selenium not installed in this environment."}), 500
+
+    payload = request.get_json(silent=True) or {}
+    df = load_data()
+    my_df = load_my_data(columns_fallback=list(df.columns) if not df.empty else None)
+    notice_col = _find_notice_col(my_df)
+
+    notice_ids = [str(n).strip() for n in (payload.get("notice_ids") or []) if str(n).strip()]
+    if not notice_ids:
+        if my_df.empty or not notice_col:
+            return jsonify({"ok": False, "message": "No My Solicitations with a Notice ID column"}), 400
+        notice_ids = _filtered_notice_ids(my_df, notice_col, payload.get("keyword"))
+
+    notices = []
+    for notice_id in notice_ids:
+        row = _match_row_by_notice(my_df, notice_id) or _match_row_by_notice(df, notice_id)
+        notices.append((notice_id, _notice_job_title(row, notice_id), _notice_last_modified(row)))
+
+    batch = start_sam_batch(notices, force=bool(payload.get("force")), mode=payload.get("mode"))
+    return jsonify({"ok": True, "batch": batch}), 202
+
+
+@app.route('/sam-batch/<batch_id>', methods=['GET'])
+def sam_batch_status(batch_id):
+    """Per-notice status and throughput for a batch download."""
+    batch = _sam_batch_status(batch_id)
+    if batch is None:
+        return jsonify({"ok": False, "message": "Batch not found"}), 404
+    return jsonify({"ok": True, "batch": batch})
+
+
+@app.route('/contract-zip', methods=['GET'])
+def contract_zip():
+    """
+    Stream a ZIP of one or more contract folders.
+
+    Query: notice_id=... (repeatable), title=... (repeatable), or keyword=... to
+    take every Notice ID of the My Solicitations filter result (all rows when
+    the keyword is empty and nothing else is given).
+    """
+    notice_ids = [n.strip() for n in request.args.getlist('notice_id') if n.strip()]
+    titles = [t.strip() for t in request.args.getlist('title') if t.strip()]
+    if not notice_ids and not titles:
+        df = load_data()
+        my_df = load_my_data(columns_fallback=list(df.columns) if not df.empty else None)
+        notice_col = _find_notice_col(my_df)
+        if my_df.empty or not notice_col:
+            return jsonify({"ok": False, "message": "No My Solicitations with a Notice ID column"}), 400
+        notice_ids = _filtered_notice_ids(my_df, notice_col, request.args.get('keyword'))
+
+    folders = _zip_folders_for(notice_ids, titles)
+    if not folders:
+        return jsonify({"ok": False, "message": "No contract folders found"}), 404
+
+    if len(folders) == 1:
+        zip_name = f"{os.path.basename(folders[0].rstrip(os.sep))}.zip"
+    else:
+        zip_name = f"contracts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    ascii_name = zip_name.encode('ascii', 'ignore').decode() or "contracts.zip"
+
+    response = Response(stream_contract_zip(folders), mimetype='application/zip', direct_passthrough=True)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{ascii_name}"; filename*=UTF-8\'\'{quote(zip_name)}'
+    )
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/doc-index/rebuild', methods=['POST'])
+def doc_index_rebuild():
+    """Index every contract folder; only content not indexed before is extracted."""
+    queued = 0
+    notices = 0
+    for notice_id, folder in _contract_folders():
+        queued += index_contract_folder(notice_id, folder)
+        notices += 1
+    docs_logger.info(f"Rebuild: {notices} folders, {queued} documents queued for extraction")
+    return jsonify({"ok": True, "notices": notices, "queued": queued})
+
+
+@app.route('/doc-index/status', methods=['GET'])
+def doc_index_status():
+    """Counts of indexed, failed and pending documents."""
+    with _doc_index_lock:
+        index = _load_doc_index()
+        files = index["files"].values()
         return jsonify({
-            "ok": False, 
-            "folder": folder, 
-            "message": str(e)
-        }), 500
+            "ok": True,
+            "notices": len(index["notices"]),
+            "indexed": sum(1 for f in files if not f.get("error")),
+            "failed": sum(1 for f in files if f.get("error")),
+            "pending": len(_doc_pending)
+        })
 
 
 @app.route('/sam-cleanup', methods=['POST'])
@@ -1935,6 +4747,41 @@ def sam_cleanup():
         return jsonify({"ok": False, "message": str(e)}), 500
 
 
+@app.route('/events')
+def events():
+    """Server-Sent Events stream of change notifications.
+
+    Event types: project-dates, project, highlights, summary, sam, dataset.
+    Reconnecting clients send Last-Event-ID and get the events they missed.
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    q = queue.Queue(maxsize=500)
+    with _event_lock:
+        backlog = [e for e in _event_history if last_id is not None and e[0] > last_id]
+        _event_subscribers.add(q)
+
+    def stream():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield _format_sse(event)
+            while True:
+                try:
+                    event = q.get(timeout=EVENT_KEEPALIVE_SECS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            with _event_lock:
+                _event_subscribers.discard(q)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/create-opportunity-folder', methods=['POST'])
 def create_opportunity_folder():
     """Create a folder for an opportunity in the Contracts directory"""
@@ -1946,23 +4793,18 @@ def create_opportunity_folder():
         if not title:
             return jsonify({"ok": False, "message": "No title provided for folder creation"}), 400
 
-        # Sanitize the title for use as a folder name
-        sanitized_title = _sanitize_folder_name(title)
-
-        # Create the full path to the Contracts directory
-        contracts_dir = os.path.join(os.path.dirname(__file__), "Contracts")
-        folder_path = os.path.join(contracts_dir, sanitized_title)
-
-        # Create the folder
+        # Create the folder the SAM automation downloads into: "<Notice ID> - <title>"
+        # (title only when the row has no Notice ID)
         try:
-            os.makedirs(folder_path, exist_ok=True)
+            folder_path = _create_contract_folder(title, notice_id or None)
+            folder_name = os.path.basename(folder_path)
             logger.info(f"Created opportunity folder: {folder_path}")
 
             return jsonify({
                 "ok": True,
                 "folder_path": folder_path,
-                "title": sanitized_title,
-                "message": f"Folder created successfully: {sanitized_title}"
+                "title": folder_name,
+                "message": f"Folder created successfully: {folder_name}"
             })
 
         except Exception as e:
@@ -1983,67 +4825,52 @@ def get_folder_files():
     try:
         payload = request.get_json() or {}
         title = payload.get('title', '').strip()
+        notice_id = payload.get('notice_id', '').strip()
 
-        if not title:
+        if not title and not notice_id:
             return jsonify({"ok": False, "files": []})
 
-        # Sanitize the title for use as a folder name
-        sanitized_title = _sanitize_folder_name(title)
-
-        # Create the full path to the Contracts directory
-        contracts_dir = os.path.join(os.path.dirname(__file__), "Contracts")
-        folder_path = os.path.join(contracts_dir, sanitized_title)
+        return jsonify(list_folder_files(_resolve_local_folder(title, notice_id)))
 
-        files = []
-        if os.path.exists(folder_path) and os.path.isdir(folder_path):
-            try:
-                for filename in os.listdir(folder_path):
-                    file_path = os.path.join(folder_path, filename)
-                    if os.path.isfile(file_path):
-                        # Get file size for display
-                        file_size = os.path.getsize(file_path)
-                        size_str = ""
-                        if file_size < 1024:
-                            size_str = f"{file_size} B"
-                        elif file_size < 1024 * 1024:
-                            size_str = f"{file_size / 1024:.1f} KB"
-                        else:
-                            size_str = f"{file_size / (1024 * 1024):.1f} MB"
-
-                        # Create relative path from Contracts directory with forward slashes for web URLs
-                        relative_path = f"{sanitized_title}/{filename}"
+    except Exception as e:
+        logger.error(f"Error in get_folder_files: {e}")
+        return jsonify({"ok": False, "files": []})
 
-                        files.append({
-                            "name": filename,
-                            "size": size_str,
-                            "path": relative_path
-                        })
 
-                # Sort files by name
-                files.sort(key=lambda x: x['name'].lower())
+@app.route('/get-folder-files/batch', methods=['POST'])
+def get_folder_files_batch():
+    """File listings for many rows in one call.
 
-            except Exception as e:
-                logger.error(f"Error reading folder contents: {e}")
+    Body: {"folders": [{"title": "...", "notice_id": "..."}, ...]}; the response's
+    "folders" list is in the same order, each entry shaped like /get-folder-files.
+    """
+    try:
+        payload = request.get_json() or {}
+        items = payload.get('folders') or []
+        if not isinstance(items, list):
+            return jsonify({"ok": False, "message": "folders must be a list", "folders": []}), 400
+
+        listings = []
+        for item in items:
+            item = item if isinstance(item, dict) else {}
+            title = str(item.get('title') or '').strip()
+            notice_id = str(item.get('notice_id') or '').strip()
+            if not title and not notice_id:
+                listings.append({"ok": False, "files": []})
+                continue
+            listings.append(list_folder_files(_resolve_local_folder(title, notice_id)))
 
-        return jsonify({
-            "ok": True,
-            "files": files,
-            "folder_path": folder_path,
-            "folder_exists": os.path.exists(folder_path)
-        })
+        return jsonify({"ok": True, "folders": listings})
 
     except Exception as e:
-        logger.error(f"Error in get_folder_files: {e}")
-        return jsonify({"ok": False, "files": []})
+        logger.error(f"Error in get_folder_files_batch: {e}")
+        return jsonify({"ok": False, "message": "Internal server error", "folders": []}), 500
 
 
 @app.route('/open-file/<path:file_path>')
 def open_file(file_path):
-    """Serve files from the Contracts directory"""
+    """Serve files from the contract folders"""
     try:
-        # Secure file serving with proper path validation
-        contracts_dir = os.path.join(os.path.dirname(__file__), "Contracts")
-
         # Convert forward slashes to OS-appropriate path separators
         normalized_file_path = file_path.replace('/', os.sep)
 
@@ -2051,28 +4878,32 @@ def open_file(file_path):
         if '..' in normalized_file_path or os.path.isabs(normalized_file_path):
             return "Access denied - path traversal detected", 403
 
-        # Construct the full file path
-        full_file_path = os.path.join(contracts_dir, normalized_file_path)
-
-        # Use realpath for additional security and path normalization
-        abs_contracts_dir = os.path.realpath(contracts_dir)
-        abs_file_path = os.path.realpath(full_file_path)
-
-        # Double-check the path is within the contracts directory
-        if not abs_file_path.startswith(abs_contracts_dir + os.sep):
+        # Hidden entries (the attachment store, manifests) are never served
+        if any(part.startswith('.') for part in normalized_file_path.split(os.sep)):
             return "Access denied", 403
 
-        if not os.path.exists(abs_file_path) or not os.path.isfile(abs_file_path):
-            return "File not found", 404
-
         # Validate file extension against allowed types
-        allowed_extensions = {'.pdf', '.doc', '.docx', '.xlsx', '.xls', '.txt', '.zip'}
-        file_ext = os.path.splitext(abs_file_path)[1].lower()
-        if file_ext not in allowed_extensions:
+        file_ext = os.path.splitext(normalized_file_path)[1].lower()
+        if file_ext not in OPEN_FILE_EXTS:
             return "File type not allowed", 403
 
-        return send_file(abs_file_path)
+        for root in CONTRACT_FILE_ROOTS:
+            # Use realpath for additional security and path normalization
+            abs_contracts_dir = os.path.realpath(root)
+            abs_file_path = os.path.realpath(os.path.join(root, normalized_file_path))
 
+            # Double-check the path is within the contracts directory
+            if not abs_file_path.startswith(abs_contracts_dir + os.sep):
+                return "Access denied", 403
+
+            if os.path.isfile(abs_file_path):
+                return send_contract_file(abs_file_path, os.path.relpath(abs_file_path, abs_contracts_dir), root)
+
+        return "File not found", 404
+
+    except HTTPException:
+        # e.g. 416 Range Not Satisfiable from the conditional response
+        raise
     except Exception as e:
         logger.error(f"Error serving file: {e}")
         return "Internal server error", 500
@@ -2108,19 +4939,23 @@ def generate_ai_summary_endpoint():
 
         # Check if we already have a summary for this Notice ID
         if notice_id:
-            existing_summary = get_ai_summary_for_notice(notice_id)
+            with stage_timer("lookup"):
+                existing_summary = get_ai_summary_for_notice(notice_id)
             if existing_summary:
-                print(f"[AI] Using existing summary for Notice ID: {notice_id}")
+                ai_logger.info(f"Using existing summary for Notice ID: {notice_id}")
                 return jsonify({"ok": True, "summary": existing_summary})
 
         # Generate the AI summary
-        summary = generate_ai_summary(description)
+        with stage_timer("openai"):
+            summary = generate_ai_summary(description)
 
         if summary:
             # Save the summary if we have a notice_id
             if notice_id:
-                save_ai_summary_for_notice(notice_id, summary)
-                print(f"[AI] Saved new summary for Notice ID: {notice_id}")
+                with stage_timer("save"):
+                    save_ai_summary_for_notice(notice_id, summary)
+                ai_logger.info(f"Saved new summary for Notice ID: {notice_id}")
+                publish_event("summary", {"notice_id": notice_id})
 
             return jsonify({"ok": True, "summary": summary})
         else:
@@ -2154,16 +4989,14 @@ if not PRODUCTION_MODE:
         if not _SELENIUM_AVAILABLE:
             return {"ok": False, "message": "Selenium is not installed in this environment."}, 500
         try:
-            tmp_dir = os.path.join(os.getcwd(), "downloads_test")
-            os.makedirs(tmp_dir, exist_ok=True)
-            drv = _get_persistent_edge_driver(tmp_dir)
+            browser = _acquire_browser_session(timeout=30)
             try:
-                drv.get("https://example.com/")
-                title = drv.title
+                browser["driver"].get("https://example.com/")
+                title = browser["driver"].title
             finally:
-                # Don't quit the persistent driver in diagnostic mode
-                pass
-            return {"ok": True, "title": title}
+                # Return the session to the pool rather than quitting it
+                _release_browser_session(browser)
+            return {"ok": True, "title": title, "pool": _browser_pool_status()}
         except Exception as e:
             return {"ok": False, "message": str(e)}, 500
 
@@ -2256,20 +5089,47 @@ def internal_error(error):
 
 # ====================== CLEANUP AND STARTUP ======================
 # Cleanup on app shutdown
-import atexit
 atexit.register(_cleanup_persistent_session)
 
 
+# Background services (SAM workers resuming unfinished jobs, the browser
+# pool warmer) are started explicitly, never on import, so tests and tools
+# that import this module stay side-effect free. The development server
+# starts them below; under a WSGI server (gunicorn, waitress) set
+# SAM_AUTOSTART=1 and they start with the first request.
+SAM_AUTOSTART = os.environ.get('SAM_AUTOSTART', '0').lower() in ('1', 'true', 'yes')
+
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def _start_background_services():
+    """Resume SAM jobs left over from the last run and warm the browser pool (SAM_PREWARM), once."""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    _ensure_sam_workers()
+    _start_browser_keepalive()
+
+
+@app.before_request
+def _autostart_background_services():
+    if SAM_AUTOSTART and not _background_started:
+        _start_background_services()
+
+
 # Application startup
 if __name__ == "__main__":
-    print("=" * 60)
-    print("GOVERNMENT CONTRACTING SEARCH TOOL")
-    print("=" * 60)
-    print("[APP] Starting Government Contracting Search Tool...")
-    print(f"[APP] Data directory: {os.path.abspath(DATA_DIR)}")
-    print(f"[APP] Contracts folder: {CONTRACTS_BASE}")
-    print(f"[APP] Selenium available: {_SELENIUM_AVAILABLE}")
-    print("[APP] Starting Flask development server...")
-    print("=" * 60)
+    logger.info("Starting Government Contracting Search Tool...")
+    logger.info(f"Data directory: {os.path.abspath(DATA_DIR)}")
+    logger.info(f"Contracts folder: {CONTRACTS_BASE}")
+    logger.info(f"Selenium available: {_SELENIUM_AVAILABLE}")
+    logger.info("Starting Flask development server...")
+
+    # Resume SAM jobs and warm the browser pool (only in the reloader's serving process)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        _start_background_services()
     
     app.run(debug=True, host="127.0.0.1", port=5000)
\ No newline at end of file
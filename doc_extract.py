@@ -0,0 +1,67 @@
+"""
+Document text extraction
+Pulls plain text out of downloaded contract documents (PDF, DOCX, XLSX, plain
+text) for the full-text search in app.py. It lives apart from app.py so the
+extraction process pool imports only this module and its parsers, never the
+Flask app.
+"""
+
+import os
+import re
+
+# Optional parsers; those formats fail extraction without them
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+try:
+    import docx as _docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+DOC_TEXT_EXTENSIONS = (".pdf", ".docx", ".xlsx", ".txt", ".csv")
+DOC_MAX_CHARS = 2_000_000
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def extract_document_text(path: str) -> str:
+    """Pull plain text out of one document (at most DOC_MAX_CHARS characters)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        if not PYPDF_AVAILABLE:
+            raise RuntimeError("pypdf not installed")
+        reader = PdfReader(path)
+        text = "\n".join((page.extract_text() or "") for page in reader.pages)
+    elif ext == ".docx":
+        if not DOCX_AVAILABLE:
+            raise RuntimeError("python-docx not installed")
+        document = _docx.Document(path)
+        parts = [p.text for p in document.paragraphs]
+        for table in document.tables:
+            for row in table.rows:
+                parts.append(" | ".join(cell.text for cell in row.cells))
+        text = "\n".join(parts)
+    elif ext == ".xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        parts = []
+        for ws in wb.worksheets:
+            for row in ws.iter_rows(values_only=True):
+                cells = [str(c) for c in row if c is not None]
+                if cells:
+                    parts.append(" | ".join(cells))
+        wb.close()
+        text = "\n".join(parts)
+    else:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    return text[:DOC_MAX_CHARS]
+
+
+def tokenize(text: str) -> set:
+    """Distinct lowercase word tokens of a text, as the search index stores them."""
+    return set(_TOKEN_RE.findall(text.lower()))
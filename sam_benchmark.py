@@ -0,0 +1,200 @@
+"""
+SAM automation benchmark
+Starts the local SAM.gov stand-in (sam_standin.py), points app.py's automation
+at it and drives the real _sam_download_with_persistent_session for a set of
+notices, reporting per-stage timings, page load time and browser memory per
+browser mode. Regressions in the automation path show up here without
+touching the live sam.gov.
+
+    python sam_benchmark.py --notices 5 --modes visible,fast --latency-ms 150 --out bench.json
+
+Everything runs in a scratch directory (contract folders, data/, browser
+profiles), so the real workspace is not touched. Requires Selenium and Edge.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+import sam_standin
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ("login", "search", "open", "attachments", "pdf", "total")
+
+
+def _free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_standin(args):
+    """Serve the stand-in on a background thread; returns (server, base_url)."""
+    standin = sam_standin.create_app(
+        latency_ms=args.latency_ms,
+        attachments=args.attachments,
+        attachment_kb=args.attachment_kb,
+        pdf_kb=args.pdf_kb,
+        asset_kb=args.asset_kb
+    )
+    port = args.port or _free_port()
+    server = make_server("127.0.0.1", port, standin, threaded=True)
+    threading.Thread(target=server.serve_forever, name="sam-standin", daemon=True).start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _stats(values: list[float]) -> dict | None:
+    """Median / p95 / max of a list of numbers, ignoring missing ones."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {
+        "median": round(statistics.median(values), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(max(values), 3)
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Per mode and phase: stage timing stats (warm runs only), page load and RSS."""
+    summary = {}
+    for run in runs:
+        key = f"{run['mode']}/{run['phase']}"
+        summary.setdefault(key, []).append(run)
+
+    out = {}
+    for key, group in summary.items():
+        ok = [r for r in group if r["ok"]]
+        warm = [r for r in ok if not r["cold"]] or ok
+        out[key] = {
+            "runs": len(group),
+            "failed": len(group) - len(ok),
+            "cold_total": next((r["timings"].get("total") for r in ok if r["cold"]), None),
+            "stages": {stage: _stats([r["timings"].get(stage) for r in warm]) for stage in STAGES},
+            "page_load_ms": _stats([r["browser"].get("page_load_ms") for r in warm]),
+            "rss_mb": _stats([r["browser"].get("rss_mb") for r in warm])
+        }
+    return out
+
+
+def run_benchmark(args) -> dict:
+    """Start the stand-in, run every notice in every mode and return raw runs plus a summary."""
+    server, base_url = _start_standin(args)
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="sam-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+
+    # app.py reads these at import time: point it at the stand-in and keep its
+    # contract folders, data/ and browser profiles inside the scratch directory
+    os.environ["SAM_BASE_URL"] = base_url
+    os.environ["HOME"] = os.environ["USERPROFILE"] = workdir
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    import app as samapp
+
+    print(f"[BENCH] Stand-in at {base_url}, scratch dir {workdir}")
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    phases = ["full", "resync"] if args.resync else ["full"]
+    runs = []
+    try:
+        for mode in modes:
+            for phase in phases:
+                for i in range(args.notices):
+                    notice_id = f"BENCH-{i + 1:03d}"
+                    title = f"Benchmark Notice {i + 1}"
+                    folder = samapp._create_contract_folder(title, notice_id)
+                    run = {"mode": mode, "phase": phase, "notice_id": notice_id,
+                           "cold": phase == "full" and i == 0}
+                    started = time.monotonic()
+                    try:
+                        result = samapp._sam_download_with_persistent_session(
+                            notice_id, title, folder, force=phase == "full", mode=mode
+                        )
+                        run.update({
+                            "ok": bool(result.get("pdf")),
+                            "timings": result.get("timings", {}),
+                            "browser": result.get("browser", {}),
+                            "changed_files": result.get("changed_files", [])
+                        })
+                    except Exception as e:
+                        run.update({"ok": False, "error": str(e), "timings": {}, "browser": {}})
+                    run["wall_secs"] = round(time.monotonic() - started, 3)
+                    runs.append(run)
+                    print(f"[BENCH] {mode}/{phase} {notice_id}: "
+                          f"{'ok' if run['ok'] else 'FAILED'} in {run['wall_secs']}s "
+                          f"{run['timings'] or run.get('error', '')}")
+            # Each mode starts from a cold browser
+            samapp._cleanup_persistent_session()
+    finally:
+        server.shutdown()
+
+    return {
+        "config": {
+            "notices": args.notices, "modes": modes, "latency_ms": args.latency_ms,
+            "attachments": args.attachments, "attachment_kb": args.attachment_kb,
+            "pdf_kb": args.pdf_kb, "asset_kb": args.asset_kb
+        },
+        "summary": summarize(runs),
+        "runs": runs
+    }
+
+
+def _print_summary(summary: dict):
+    """Median (p95) seconds per stage for each mode/phase."""
+    header = f"{'mode/phase':<18}" + "".join(f"{s:>16}" for s in STAGES) + f"{'load ms':>12}{'rss MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for key, row in summary.items():
+        cells = []
+        for stage in STAGES:
+            st = row["stages"][stage]
+            cells.append(f"{st['median']:>8.2f} ({st['p95']:.2f})" if st else f"{'-':>16}")
+        load = row["page_load_ms"]["median"] if row["page_load_ms"] else "-"
+        rss = row["rss_mb"]["median"] if row["rss_mb"] else "-"
+        print(f"{key:<18}" + "".join(f"{c:>16}" for c in cells) + f"{load:>12}{rss:>10}")
+
+
+def main():
+    """Parse arguments, run the benchmark and print / save the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the SAM automation against a local stand-in")
+    parser.add_argument("--notices", type=int, default=3, help="notices to run per mode")
+    parser.add_argument("--modes", default="visible,fast", help="comma-separated browser modes")
+    parser.add_argument("--resync", action="store_true", help="also time an incremental re-sync pass")
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--attachments", type=int, default=3)
+    parser.add_argument("--attachment-kb", type=int, default=256)
+    parser.add_argument("--pdf-kb", type=int, default=512)
+    parser.add_argument("--asset-kb", type=int, default=64)
+    parser.add_argument("--port", type=int, default=0, help="stand-in port (default: any free port)")
+    parser.add_argument("--workdir", help="scratch directory (default: a new temp dir)")
+    parser.add_argument("--out", help="write raw runs and summary as JSON")
+    args = parser.parse_args()
+    if args.out:
+        args.out = os.path.abspath(args.out)  # run_benchmark changes into the scratch dir
+
+    report = run_benchmark(args)
+    print()
+    _print_summary(report["summary"])
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
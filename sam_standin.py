@@ -0,0 +1,237 @@
+"""
+Local SAM.gov stand-in
+A small Flask site that mimics the parts of SAM.gov the automation drives: the
+search page, /opp/<id>/view, the Attachments/Links tab, More -> Download (PDF)
+and Download All. Latency and attachment sizes are configurable so the
+automation in app.py can be exercised and timed offline.
+
+Run it on its own and point the app at it:
+
+    python sam_standin.py --port 5055 --latency-ms 150
+    set SAM_BASE_URL=http://127.0.0.1:5055   (PowerShell: $env:SAM_BASE_URL = "...")
+
+or let sam_benchmark.py start it for you.
+"""
+
+import argparse
+import hashlib
+import time
+import zipfile
+from datetime import datetime, timezone
+from io import BytesIO
+
+from flask import Flask, Response, abort, jsonify, render_template_string, request
+
+_PAGE_HEAD = """
+<!doctype html>
+<html><head><meta charset="utf-8"><title>{{ title }} | SAM.gov stand-in</title>
+<link rel="stylesheet" href="/assets/site.css">
+<style>.hidden{display:none}</style>
+</head><body>
+<header>
+  <img src="/assets/banner.png" alt="">
+  <img src="/assets/seal.png" alt="">
+  <button aria-label="Account">Account</button>
+</header>
+<script src="/assets/analytics.js"></script>
+"""
+
+_HOME_HTML = _PAGE_HEAD + """
+<main>
+  <form action="/search" method="get">
+    <input type="search" name="keywords" placeholder="Search" aria-label="Search">
+  </form>
+</main>
+</body></html>
+"""
+
+_SEARCH_HTML = _PAGE_HEAD + """
+<main>
+  <h1>Search results for {{ keywords }}</h1>
+  <ul><li><a href="/opp/{{ notice_id }}/view">{{ opp_title }}</a></li></ul>
+</main>
+</body></html>
+"""
+
+_OPP_HTML = _PAGE_HEAD + """
+<main>
+  <h1>{{ opp_title }}</h1>
+  <p>Notice ID: {{ notice_id }}</p>
+
+  <button aria-label="More" id="more">More</button>
+  <div id="menu" class="hidden"><button id="menu-download">Download</button></div>
+
+  <form id="dialog" class="hidden" onsubmit="return false;">
+    <label><input type="radio" name="format" value="PDF" checked>PDF</label>
+    <button type="submit" id="submit-download">Download</button>
+  </form>
+
+  <nav><a href="#attachments" id="tab">Attachments/Links</a></nav>
+  <section id="attachments" class="hidden"></section>
+</main>
+<script>
+const nid = {{ notice_id|tojson }};
+document.getElementById('more').onclick = () => {
+  setTimeout(() => document.getElementById('menu').classList.remove('hidden'), {{ ui_delay_ms }});
+};
+document.getElementById('menu-download').onclick = () => {
+  document.getElementById('menu').classList.add('hidden');
+  setTimeout(() => document.getElementById('dialog').classList.remove('hidden'), {{ ui_delay_ms }});
+};
+document.getElementById('submit-download').onclick = () => {
+  window.location.href = '/opp/' + encodeURIComponent(nid) + '/download.pdf';
+};
+document.getElementById('tab').onclick = async (e) => {
+  e.preventDefault();
+  const res = await fetch('/api/opp/' + encodeURIComponent(nid) + '/resources');
+  const data = await res.json();
+  const section = document.getElementById('attachments');
+  section.innerHTML = '<button id="download-all">Download All</button>' +
+    data.attachments.map(a =>
+      '<div class="attachment"><a href="' + a.url + '">' + a.name + '</a> <span>' + a.size + '</span></div>'
+    ).join('') +
+    data.links.map(l => '<div><a href="' + l.url + '">' + l.text + '</a></div>').join('');
+  document.getElementById('download-all').onclick = () => {
+    window.location.href = '/opp/' + encodeURIComponent(nid) + '/download-all.zip';
+  };
+  section.classList.remove('hidden');
+};
+</script>
+</body></html>
+"""
+
+# Served for every decorative asset so fast (blocking) mode has something to skip
+_ASSET_TYPES = {
+    ".png": "image/png",
+    ".css": "text/css",
+    ".js": "application/javascript",
+    ".woff2": "font/woff2"
+}
+
+_LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _opp_title(notice_id: str) -> str:
+    """Title shown for a notice in search results and on its page."""
+    return f"Stand-in Opportunity {notice_id}"
+
+
+def _attachment_names(notice_id: str, count: int) -> list[str]:
+    """File names of a notice's attachments."""
+    return [f"{notice_id}_Attachment_{i + 1}.pdf" for i in range(count)]
+
+
+def _payload(seed: str, size: int) -> bytes:
+    """Deterministic bytes, so repeat runs see the same content and ETag."""
+    block = hashlib.sha256(seed.encode("utf-8")).digest() * 128
+    header = b"%PDF-1.4\n% stand-in\n"
+    body = (block * (size // len(block) + 1))[:max(0, size - len(header))]
+    return header + body
+
+
+def _file_response(data: bytes, filename: str, mimetype: str) -> Response:
+    """Attachment response with ETag / Last-Modified and 304 handling."""
+    resp = Response(data, mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp.set_etag(hashlib.sha1(data).hexdigest())
+    resp.last_modified = _LAST_MODIFIED
+    return resp.make_conditional(request)
+
+
+def create_app(latency_ms: int = 0, attachments: int = 3, attachment_kb: int = 256,
+               pdf_kb: int = 512, asset_kb: int = 64, ui_delay_ms: int = 100) -> Flask:
+    """Build the stand-in site with the given latency and payload sizes."""
+    standin = Flask(__name__)
+    standin.config.update(
+        LATENCY_MS=latency_ms,
+        ATTACHMENTS=attachments,
+        ATTACHMENT_KB=attachment_kb,
+        PDF_KB=pdf_kb,
+        ASSET_KB=asset_kb,
+        UI_DELAY_MS=ui_delay_ms
+    )
+    cfg = standin.config
+
+    @standin.before_request
+    def simulate_latency():
+        if cfg["LATENCY_MS"]:
+            time.sleep(cfg["LATENCY_MS"] / 1000.0)
+
+    @standin.route("/")
+    def home():
+        return render_template_string(_HOME_HTML, title="Home")
+
+    @standin.route("/search")
+    def search():
+        keywords = (request.args.get("keywords") or "").strip()
+        if not keywords:
+            return render_template_string(_HOME_HTML, title="Home")
+        return render_template_string(_SEARCH_HTML, title="Search", keywords=keywords,
+                                      notice_id=keywords, opp_title=_opp_title(keywords))
+
+    @standin.route("/opp/<notice_id>/view")
+    def opportunity(notice_id):
+        return render_template_string(_OPP_HTML, title=notice_id, notice_id=notice_id,
+                                      opp_title=_opp_title(notice_id), ui_delay_ms=cfg["UI_DELAY_MS"])
+
+    @standin.route("/api/opp/<notice_id>/resources")
+    def resources(notice_id):
+        size = f"{cfg['ATTACHMENT_KB']} KB"
+        return jsonify({
+            "attachments": [
+                {"name": name, "url": f"{request.host_url}files/{notice_id}/{name}", "size": size}
+                for name in _attachment_names(notice_id, cfg["ATTACHMENTS"])
+            ],
+            "links": [{"url": f"https://example.com/{notice_id}/wage-determination", "text": "Wage Determination"}]
+        })
+
+    @standin.route("/opp/<notice_id>/download.pdf")
+    def download_pdf(notice_id):
+        return _file_response(_payload(f"pdf:{notice_id}", cfg["PDF_KB"] * 1024),
+                              f"{notice_id}.pdf", "application/pdf")
+
+    @standin.route("/files/<notice_id>/<name>")
+    def attachment(notice_id, name):
+        if name not in _attachment_names(notice_id, cfg["ATTACHMENTS"]):
+            abort(404)
+        return _file_response(_payload(f"{notice_id}/{name}", cfg["ATTACHMENT_KB"] * 1024),
+                              name, "application/pdf")
+
+    @standin.route("/opp/<notice_id>/download-all.zip")
+    def download_all(notice_id):
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+            for name in _attachment_names(notice_id, cfg["ATTACHMENTS"]):
+                zf.writestr(name, _payload(f"{notice_id}/{name}", cfg["ATTACHMENT_KB"] * 1024))
+        return _file_response(buf.getvalue(), f"{notice_id}_attachments.zip", "application/zip")
+
+    @standin.route("/assets/<name>")
+    def asset(name):
+        ext = name[name.rfind("."):] if "." in name else ""
+        if ext not in _ASSET_TYPES:
+            abort(404)
+        data = b"" if ext in (".css", ".js") else _payload(f"asset:{name}", cfg["ASSET_KB"] * 1024)
+        return Response(data, mimetype=_ASSET_TYPES[ext])
+
+    return standin
+
+
+def main():
+    """Run the stand-in from the command line."""
+    parser = argparse.ArgumentParser(description="Local SAM.gov stand-in for offline automation runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency-ms", type=int, default=0, help="delay added to every request")
+    parser.add_argument("--attachments", type=int, default=3, help="attachments per notice")
+    parser.add_argument("--attachment-kb", type=int, default=256)
+    parser.add_argument("--pdf-kb", type=int, default=512)
+    parser.add_argument("--asset-kb", type=int, default=64, help="size of each image on the page")
+    args = parser.parse_args()
+
+    standin = create_app(args.latency_ms, args.attachments, args.attachment_kb, args.pdf_kb, args.asset_kb)
+    print(f"[STANDIN] SAM.gov stand-in on http://{args.host}:{args.port}")
+    standin.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
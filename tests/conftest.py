@@ -0,0 +1,50 @@
+"""
+Shared test setup
+app.py resolves CONTRACTS_BASE from HOME and DATA_DIR from the working
+directory when it is imported, so both point at a scratch directory before the
+first import. Tests never touch the real contract folders or data/.
+"""
+
+import atexit
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+_SCRATCH = tempfile.mkdtemp(prefix="govcon-tests-")
+os.environ["HOME"] = _SCRATCH
+os.environ["USERPROFILE"] = _SCRATCH
+os.chdir(_SCRATCH)
+
+
+@pytest.fixture(scope="session")
+def samapp():
+    """The app module, imported against the scratch HOME and data directory."""
+    import app
+    # Log synchronously so pytest captures each record with the test that emitted it
+    atexit.unregister(app._log_listener.stop)
+    app._log_listener.stop()
+    logging.getLogger().handlers[:] = list(app._log_listener.handlers)
+    yield app
+    # Clean up while pytest's captured stderr is still open for the log output
+    atexit.unregister(app._cleanup_persistent_session)
+    app._cleanup_persistent_session()
+
+
+@pytest.fixture
+def client(samapp):
+    """Flask test client for the app."""
+    return samapp.app.test_client()
+
+
+@pytest.fixture
+def data_dir(samapp, tmp_path, monkeypatch):
+    """Point My Solicitations and the project/date stores at a fresh directory for one test."""
+    for name in ("MY_FILE", "PROJECTS_FILE", "PROJECT_DATES_FILE", "PROJECT_DATES_REV_FILE"):
+        monkeypatch.setattr(samapp, name, str(tmp_path / os.path.basename(getattr(samapp, name))))
+    return tmp_path
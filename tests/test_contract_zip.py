@@ -0,0 +1,72 @@
+"""
+Contract folder ZIPs (/contract-zip, stream_contract_zip): the streamed archive
+is valid, already-compressed formats are stored and everything else deflated.
+"""
+
+import io
+import zipfile
+
+import pytest
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 64
+TEXT = b"Statement of work. " * 2048
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "Roof Repair"
+    (folder / "amendments").mkdir(parents=True)
+    (folder / "sow.pdf").write_bytes(PDF)
+    (folder / "notes.txt").write_bytes(TEXT)
+    (folder / "amendments" / "a1.txt").write_bytes(b"")
+    (folder / ".sam_manifest.json").write_text("{}")
+    (folder / "wage.pdf.partial").write_bytes(b"half")
+    return folder
+
+
+def _archive(samapp, folders) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(samapp.stream_contract_zip([str(f) for f in folders]))))
+
+
+def test_zip_is_valid_and_complete(samapp, folder):
+    zf = _archive(samapp, [folder])
+
+    assert zf.testzip() is None
+    assert sorted(zf.namelist()) == ["Roof Repair/amendments/a1.txt", "Roof Repair/notes.txt", "Roof Repair/sow.pdf"]
+    assert zf.read("Roof Repair/sow.pdf") == PDF
+    assert zf.read("Roof Repair/notes.txt") == TEXT
+
+
+def test_pdfs_are_stored_and_text_deflated(samapp, folder):
+    zf = _archive(samapp, [folder])
+
+    assert zf.getinfo("Roof Repair/sow.pdf").compress_type == zipfile.ZIP_STORED
+    text = zf.getinfo("Roof Repair/notes.txt")
+    assert text.compress_type == zipfile.ZIP_DEFLATED and text.compress_size < len(TEXT)
+
+
+def test_each_folder_is_a_top_level_directory(samapp, folder, tmp_path):
+    other = tmp_path / "Paving"
+    other.mkdir()
+    (other / "plan.pdf").write_bytes(PDF)
+
+    zf = _archive(samapp, [folder, other])
+
+    assert "Paving/plan.pdf" in zf.namelist() and "Roof Repair/sow.pdf" in zf.namelist()
+
+
+def test_route_streams_attachment(samapp, client, folder, monkeypatch):
+    monkeypatch.setattr(samapp, "_zip_folders_for", lambda notice_ids, titles: [str(folder)])
+
+    resp = client.get("/contract-zip?notice_id=N1")
+
+    assert resp.status_code == 200 and resp.mimetype == "application/zip"
+    assert 'filename="Roof Repair.zip"' in resp.headers["Content-Disposition"]
+    assert resp.headers["Cache-Control"] == "no-store"
+    assert zipfile.ZipFile(io.BytesIO(resp.data)).testzip() is None
+
+
+def test_route_without_folders_gets_404(samapp, client, monkeypatch):
+    monkeypatch.setattr(samapp, "_zip_folders_for", lambda notice_ids, titles: [])
+
+    assert client.get("/contract-zip?notice_id=N1").status_code == 404
@@ -0,0 +1,161 @@
+"""
+Direct attachment downloads (download_attachments_direct / _download_attachment)
+against a local http.server: retries on 5xx, SHA-256 checksums, conditional
+requests answered with 304, .partial cleanup and filename collisions.
+"""
+
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+BODY = b"%PDF-1.4 attachment body " * 4096
+
+
+class _AttachmentHandler(BaseHTTPRequestHandler):
+    """Routes: /flaky/<n>/<name> fails n times with 503; /truncated/<name> drops the
+    connection mid-body; /missing/<name> is 404; /etag/<tag>/<name> honours
+    If-None-Match; anything else serves BODY."""
+
+    hits = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self) -> int:
+        with self.lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+            return self.hits[self.path]
+
+    def _send_body(self, etag='"v1"'):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def do_GET(self):
+        hit = self._count()
+        parts = self.path.strip("/").split("/")
+        if parts[0] == "flaky" and hit <= int(parts[1]):
+            self.send_error(503)
+        elif parts[0] == "missing":
+            self.send_error(404)
+        elif parts[0] == "truncated":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY[: len(BODY) // 2])
+            self.close_connection = True
+        elif parts[0] == "etag":
+            etag = f'"{parts[1]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+            else:
+                self._send_body(etag)
+        else:
+            self._send_body()
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _AttachmentHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(samapp, monkeypatch):
+    """Skip the retry back-off sleeps."""
+    monkeypatch.setattr(samapp.time, "sleep", lambda secs: None)
+    _AttachmentHandler.hits.clear()
+
+
+def test_download_writes_file_with_checksum(samapp, server, tmp_path):
+    results = samapp.download_attachments_direct([], [f"{server}/files/sow.pdf"], str(tmp_path))
+
+    assert len(results) == 1 and results[0]["ok"]
+    assert results[0]["sha256"] == hashlib.sha256(BODY).hexdigest()
+    assert results[0]["size"] == len(BODY)
+    assert results[0]["etag"] == '"v1"'
+    assert results[0]["change"] == "new"
+    with open(tmp_path / "sow.pdf", "rb") as f:
+        assert f.read() == BODY
+
+
+def test_retries_server_errors(samapp, server, tmp_path):
+    url = f"{server}/flaky/2/retry.pdf"
+    results = samapp.download_attachments_direct([], [url], str(tmp_path))
+
+    assert results[0]["ok"]
+    assert _AttachmentHandler.hits["/flaky/2/retry.pdf"] == 3
+    assert os.listdir(tmp_path) == ["retry.pdf"]
+
+
+def test_gives_up_after_retries(samapp, server, tmp_path):
+    url = f"{server}/flaky/99/down.pdf"
+    results = samapp.download_attachments_direct([], [url], str(tmp_path))
+
+    assert not results[0]["ok"]
+    assert _AttachmentHandler.hits["/flaky/99/down.pdf"] == samapp.ATTACHMENT_RETRIES
+
+
+def test_client_errors_are_not_retried(samapp, server, tmp_path):
+    results = samapp.download_attachments_direct([], [f"{server}/missing/gone.pdf"], str(tmp_path))
+
+    assert not results[0]["ok"]
+    assert _AttachmentHandler.hits["/missing/gone.pdf"] == 1
+
+
+def test_interrupted_download_leaves_no_partial(samapp, server, tmp_path):
+    results = samapp.download_attachments_direct([], [f"{server}/truncated/cut.pdf"], str(tmp_path))
+
+    assert not results[0]["ok"]
+    assert _AttachmentHandler.hits["/truncated/cut.pdf"] == samapp.ATTACHMENT_RETRIES
+    assert os.listdir(tmp_path) == []
+
+
+def test_not_modified_keeps_existing_file(samapp, server, tmp_path):
+    url = f"{server}/etag/abc/spec.pdf"
+    first = samapp.download_attachments_direct([], [url], str(tmp_path))[0]
+    manifest = {"attachments": {url: first}}
+
+    second = samapp.download_attachments_direct([], [url], str(tmp_path), manifest=manifest)[0]
+
+    assert second["ok"] and second["change"] == "unchanged"
+    assert second["path"] == first["path"]
+    assert second["sha256"] == first["sha256"]
+    assert os.listdir(tmp_path) == ["spec.pdf"]
+
+
+def test_changed_etag_downloads_again(samapp, server, tmp_path):
+    url = f"{server}/etag/new/spec.pdf"
+    known = {"path": str(tmp_path / "spec.pdf"), "size": 3, "sha256": "0" * 64, "etag": '"old"'}
+    (tmp_path / "spec.pdf").write_bytes(b"old")
+
+    result = samapp.download_attachments_direct([], [url], str(tmp_path),
+                                                manifest={"attachments": {url: known}})[0]
+
+    assert result["ok"] and result["change"] == "updated"
+    assert result["sha256"] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_name_collisions_get_suffixes(samapp, server, tmp_path):
+    (tmp_path / "same.pdf").write_bytes(b"already here")
+    urls = [f"{server}/a/same.pdf", f"{server}/b/same.pdf", f"{server}/c/same.pdf"]
+
+    results = samapp.download_attachments_direct([], urls, str(tmp_path), workers=3)
+
+    assert all(r["ok"] for r in results)
+    names = sorted(os.path.basename(r["path"]) for r in results)
+    assert names == ["same (1).pdf", "same (2).pdf", "same (3).pdf"]
+    assert (tmp_path / "same.pdf").read_bytes() == b"already here"
@@ -0,0 +1,77 @@
+"""
+Contract file serving (/open-file): byte ranges, conditional GETs, cache headers
+and the path checks that keep requests inside the contract roots.
+"""
+
+import pytest
+
+BODY = b"%PDF-1.4 contract body " * 512
+
+
+@pytest.fixture
+def contracts(samapp, tmp_path, monkeypatch):
+    """A contract root with one folder, a hidden attachment store and a file outside the root."""
+    root = tmp_path / "contracts"
+    (root / "Roof Repair").mkdir(parents=True)
+    (root / "Roof Repair" / "sow.pdf").write_bytes(BODY)
+    (root / ".store" / "ab").mkdir(parents=True)
+    (root / ".store" / "ab" / "blob.pdf").write_bytes(BODY)
+    (tmp_path / "secret.pdf").write_bytes(b"outside")
+    monkeypatch.setattr(samapp, "CONTRACT_FILE_ROOTS", (str(root),))
+    monkeypatch.setattr(samapp, "OPEN_FILE_ACCEL", "")
+    return root
+
+
+def test_serves_whole_file(client, contracts):
+    resp = client.get("/open-file/Roof Repair/sow.pdf")
+
+    assert resp.status_code == 200 and resp.data == BODY
+    assert resp.headers["Accept-Ranges"] == "bytes"
+    assert resp.headers["ETag"] and "no-cache" in resp.headers["Cache-Control"]
+
+
+def test_range_request_gets_206(client, contracts):
+    resp = client.get("/open-file/Roof Repair/sow.pdf", headers={"Range": "bytes=100-199"})
+
+    assert resp.status_code == 206 and resp.data == BODY[100:200]
+    assert resp.headers["Content-Range"] == f"bytes 100-199/{len(BODY)}"
+
+
+def test_unsatisfiable_range_gets_416(client, contracts):
+    resp = client.get("/open-file/Roof Repair/sow.pdf", headers={"Range": f"bytes={len(BODY) + 10}-"})
+
+    assert resp.status_code == 416
+    assert resp.headers["Content-Range"] == f"bytes */{len(BODY)}"
+
+
+def test_matching_etag_gets_304(client, contracts):
+    etag = client.get("/open-file/Roof Repair/sow.pdf").headers["ETag"]
+
+    resp = client.get("/open-file/Roof Repair/sow.pdf", headers={"If-None-Match": etag})
+
+    assert resp.status_code == 304 and not resp.data
+
+
+def test_versioned_url_is_immutable(samapp, client, contracts):
+    path = contracts / "Roof Repair" / "sow.pdf"
+    version = samapp._file_version(str(path), path.stat())
+
+    resp = client.get(f"/open-file/Roof Repair/sow.pdf?v={version}")
+
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert f"max-age={samapp.OPEN_FILE_IMMUTABLE_MAX_AGE}" in resp.headers["Cache-Control"]
+
+
+@pytest.mark.parametrize("path", [
+    "Roof Repair/../../secret.pdf",
+    "..%2Fsecret.pdf",
+    ".store/ab/blob.pdf",
+    "Roof Repair/.store/blob.pdf",
+    "Roof Repair/run.exe",
+])
+def test_rejects_paths_outside_the_folders(client, contracts, path):
+    assert client.get(f"/open-file/{path}").status_code == 403
+
+
+def test_missing_file_gets_404(client, contracts):
+    assert client.get("/open-file/Roof Repair/missing.pdf").status_code == 404
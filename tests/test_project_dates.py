@@ -0,0 +1,86 @@
+"""
+Project date store: batch saves, the revision counter and ?since= delta reads.
+"""
+
+import json
+import os
+
+
+def _save_batch(client, *changes):
+    body = {"changes": [{"notice_id": n, "field": f, "value": v} for n, f, v in changes]}
+    return client.post("/save-project-dates-batch", json=body)
+
+
+def test_batch_save_bumps_revision_per_change(client, data_dir):
+    first = _save_batch(client, ("N1", "site_visit_date", "2026-03-01"),
+                        ("N2", "completion_date", "2026-09-30")).get_json()
+    assert first["ok"] and first["saved"] == 2 and first["revision"] == 2
+
+    second = _save_batch(client, ("N1", "work_start_date", "2026-04-01")).get_json()
+    assert second["revision"] == 3
+
+    data = client.get("/get-project-dates").get_json()
+    assert data["full"] and data["revision"] == 3
+    assert data["dates"]["N1"]["site_visit_date"] == "2026-03-01"
+    assert data["dates"]["N1"]["work_start_date"] == "2026-04-01"
+    assert data["dates"]["N2"]["completion_date"] == "2026-09-30"
+
+
+def test_since_returns_only_later_changes(client, data_dir):
+    _save_batch(client, ("N1", "site_visit_date", "2026-03-01"), ("N2", "completion_date", "2026-09-30"))
+    revision = client.get("/get-project-dates").get_json()["revision"]
+    _save_batch(client, ("N2", "site_visit_date", "2026-05-05"))
+
+    data = client.get(f"/get-project-dates?since={revision}").get_json()
+
+    assert not data["full"] and data["revision"] == revision + 1
+    assert list(data["dates"]) == ["N2"]
+    fields = {k for k in data["dates"]["N2"] if k != "last_updated"}
+    assert fields == {"site_visit_date"}
+
+
+def test_since_current_revision_is_empty(client, data_dir):
+    revision = _save_batch(client, ("N1", "site_visit_date", "2026-03-01")).get_json()["revision"]
+
+    data = client.get(f"/get-project-dates?since={revision}").get_json()
+
+    assert data["dates"] == {} and not data["full"]
+
+
+def test_since_zero_returns_every_change(client, data_dir):
+    _save_batch(client, ("N1", "site_visit_date", "2026-03-01"), ("N2", "completion_date", "2026-09-30"))
+
+    data = client.get("/get-project-dates?since=0").get_json()
+
+    assert set(data["dates"]) == {"N1", "N2"}
+
+
+def test_unknown_revision_falls_back_to_full_read(client, data_dir):
+    _save_batch(client, ("N1", "site_visit_date", "2026-03-01"))
+
+    ahead = client.get("/get-project-dates?since=999").get_json()
+    garbage = client.get("/get-project-dates?since=abc").get_json()
+
+    for data in (ahead, garbage):
+        assert data["full"] and data["revision"] == 1
+        assert data["dates"]["N1"]["site_visit_date"] == "2026-03-01"
+
+
+def test_batch_accepts_beacon_content_type(client, data_dir):
+    body = json.dumps({"changes": [{"notice_id": "N1", "field": "completion_date", "value": "2026-12-01"}]})
+    resp = client.post("/save-project-dates-batch", data=body, content_type="text/plain;charset=UTF-8")
+
+    assert resp.status_code == 200 and resp.get_json()["revision"] == 1
+
+
+def test_batch_rejects_malformed_bodies(client, data_dir):
+    for body in ("[]", '{"changes": []}', '{"changes": "x"}', '{"changes": [{"notice_id": ["N1"], "field": "f"}]}'):
+        resp = client.post("/save-project-dates-batch", data=body, content_type="application/json")
+        assert resp.status_code == 400, body
+    assert not os.path.exists(data_dir / "project_dates.json")
+
+
+def test_writes_leave_no_temp_files(client, data_dir):
+    _save_batch(client, ("N1", "site_visit_date", "2026-03-01"))
+
+    assert sorted(os.listdir(data_dir)) == ["project_dates.json", "project_dates_rev.json"]
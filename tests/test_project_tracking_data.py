@@ -0,0 +1,60 @@
+"""
+Timeline data (/project-tracking-data): the join of My Solicitations with saved
+projects and dates, and ETag revalidation answered with 304.
+"""
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def my_solicitations(samapp, data_dir):
+    pd.DataFrame({
+        "Notice ID": ["N1", "N2"],
+        "Title": ["Roof repair", "Paving"],
+        "Department/Ind. Agency": ["GSA", "DOT"],
+    }).to_excel(samapp.MY_FILE, index=False)
+
+
+def test_rows_join_saved_projects_and_dates(client, my_solicitations):
+    client.post("/save-project", json={"notice_id": "N1", "project": {"status": "active", "progress": 40}})
+    client.post("/save-project-dates-batch",
+                json={"changes": [{"notice_id": "N2", "field": "site_visit_date", "value": "2026-03-01"}]})
+
+    data = client.get("/project-tracking-data").get_json()
+
+    rows = {row["notice_id"]: row for row in data["projects"]}
+    assert set(rows) == {"N1", "N2"} and data["dates_revision"] == 1
+    assert rows["N1"]["title"] == "Roof repair" and rows["N1"]["agency"] == "GSA"
+    assert rows["N1"]["status"] == "active" and rows["N1"]["progress"] == 40
+    assert rows["N2"]["site_visit_date"] == "2026-03-01"
+
+
+def test_matching_etag_gets_304(client, my_solicitations):
+    first = client.get("/project-tracking-data")
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/project-tracking-data", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304 and not again.data
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_saves_change_the_etag(client, my_solicitations):
+    etag = client.get("/project-tracking-data").headers["ETag"]
+    client.post("/save-project", json={"notice_id": "N1", "project": {"status": "done"}})
+
+    resp = client.get("/project-tracking-data", headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+    rows = {row["notice_id"]: row for row in resp.get_json()["projects"]}
+    assert rows["N1"]["status"] == "done"
+
+
+def test_manual_tasks_are_listed(client, data_dir):
+    client.post("/save-project", json={"notice_id": "MANUAL_1", "project": {"title": "Bid walk", "status": "active"}})
+
+    rows = client.get("/project-tracking-data").get_json()["projects"]
+
+    assert [row["title"] for row in rows] == ["Bid walk"]
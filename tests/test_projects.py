@@ -0,0 +1,62 @@
+"""
+Project store (/save-project): partial merges, the field whitelist and optimistic
+versioning with 409 on a stale version.
+"""
+
+
+def _save(client, notice_id, project, version=None):
+    body = {"notice_id": notice_id, "project": project}
+    if version is not None:
+        body["version"] = version
+    return client.post("/save-project", json=body)
+
+
+def test_partial_updates_merge(client, data_dir):
+    first = _save(client, "N1", {"status": "active", "progress": 10}).get_json()
+    assert first["ok"] and first["version"] == 1
+
+    second = _save(client, "N1", {"completion_date": "2026-09-30"}, version=1).get_json()
+
+    assert second["version"] == 2
+    project = client.get("/get-projects").get_json()["projects"]["N1"]
+    assert project["status"] == "active" and project["progress"] == 10
+    assert project["completion_date"] == "2026-09-30"
+    assert project["version"] == 2
+
+
+def test_stale_version_is_rejected(client, data_dir):
+    _save(client, "N1", {"status": "active"})
+    _save(client, "N1", {"progress": 50}, version=1)
+
+    resp = _save(client, "N1", {"status": "on-hold"}, version=1)
+
+    assert resp.status_code == 409
+    data = resp.get_json()
+    assert not data["ok"] and data["version"] == 2
+    assert data["project"]["status"] == "active" and data["project"]["progress"] == 50
+    assert client.get("/get-projects").get_json()["projects"]["N1"]["status"] == "active"
+
+
+def test_save_without_version_always_applies(client, data_dir):
+    _save(client, "N1", {"status": "active"})
+    _save(client, "N1", {"status": "done"})
+
+    project = client.get("/get-projects").get_json()["projects"]["N1"]
+    assert project["status"] == "done" and project["version"] == 2
+
+
+def test_untracked_fields_are_dropped(client, data_dir):
+    _save(client, "N1", {"status": "active", "title": "Renamed", "notes": {"x": 1}})
+    _save(client, "MANUAL_1", {"status": "active", "title": "Manual task"})
+
+    projects = client.get("/get-projects").get_json()["projects"]
+    assert "title" not in projects["N1"] and "notes" not in projects["N1"]
+    assert projects["MANUAL_1"]["title"] == "Manual task"
+
+
+def test_rejects_bad_requests(client, data_dir):
+    assert client.post("/save-project", json=[1, 2]).status_code == 400
+    assert _save(client, "", {"status": "active"}).status_code == 400
+    assert _save(client, "N1", ["active"]).status_code == 400
+    assert _save(client, "N1", {"status": "active"}, version="abc").status_code == 400
+    assert client.get("/get-projects").get_json()["projects"] == {}
@@ -0,0 +1,74 @@
+"""
+End-to-end smoke test of the SAM automation against the local stand-in
+(sam_standin.py): one browser mode, one notice. Skipped when Selenium or Edge
+is not installed.
+
+    SAM_SMOKE_MODE=visible python -m pytest tests/test_sam_standin_smoke.py
+"""
+
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from werkzeug.serving import make_server
+
+import sam_standin
+
+SMOKE_MODE = os.environ.get("SAM_SMOKE_MODE", "fast")
+ATTACHMENTS = 2
+EDGE_BINARIES = ("msedge", "microsoft-edge", "microsoft-edge-stable")
+EDGE_WINDOWS_PATHS = (
+    r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+)
+
+
+def _edge_installed() -> bool:
+    """Whether an Edge browser is available for Selenium to drive."""
+    return any(shutil.which(name) for name in EDGE_BINARIES) or any(os.path.exists(p) for p in EDGE_WINDOWS_PATHS)
+
+
+pytestmark = pytest.mark.skipif(not _edge_installed(), reason="Microsoft Edge is not installed")
+
+
+@pytest.fixture
+def standin(samapp, monkeypatch):
+    """Serve the stand-in on a free port and point the automation at it."""
+    server = make_server("127.0.0.1", 0, sam_standin.create_app(
+        attachments=ATTACHMENTS, attachment_kb=32, pdf_kb=64, asset_kb=4, ui_delay_ms=50
+    ), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(samapp, "SAM_BASE_URL", base_url)
+    monkeypatch.setattr(samapp, "SAM_HOST", "127.0.0.1")
+    yield base_url
+    samapp._cleanup_persistent_session()
+    server.shutdown()
+
+
+def test_download_against_standin(samapp, standin):
+    notice_id, title = "SMOKE-001", "Smoke Test Notice"
+    folder = samapp._create_contract_folder(title, notice_id)
+
+    result = samapp._sam_download_with_persistent_session(notice_id, title, folder, force=True, mode=SMOKE_MODE)
+
+    assert result.get("pdf") and os.path.isfile(result["pdf"])
+    assert os.path.dirname(os.path.abspath(result["pdf"])) == os.path.abspath(folder)
+    expected = set(sam_standin._attachment_names(notice_id, ATTACHMENTS))
+    assert expected <= set(os.listdir(folder))
+    assert not [name for name in os.listdir(folder) if samapp._is_temp_download(name)]
+
+    with open(os.path.join(folder, samapp.MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["notice_id"] == notice_id
+    assert manifest["main_pdf"]["path"] == result["pdf"]
+    recorded = {os.path.basename(entry["path"]): entry for entry in manifest["attachments"].values()}
+    assert expected <= set(recorded)
+    for name in expected:
+        assert len(recorded[name]["sha256"]) == 64
+        assert recorded[name]["size"] == os.path.getsize(os.path.join(folder, name))